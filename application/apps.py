@@ -5,3 +5,6 @@ class ApplicationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'application'
     verbose_name = 'App'
+
+    def ready(self):
+        from application import signals  # noqa: F401
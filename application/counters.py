@@ -0,0 +1,185 @@
+"""
+Incremental ticket counters.
+
+Every live ticket counts once in the 'status' and 'reporter_status' dimensions and, while it is not Done, once in the
+'priority' and 'reporter' dimensions. Soft deleted tickets are not counted. Saving or deleting a ticket moves it
+between counters with UPDATE ... SET count = count + delta statements in the same transaction as the ticket change.
+Each statement adds to the stored count rather than writing a value read earlier, so concurrent saves of different
+tickets never overwrite each other's changes, and counters are always updated (and locked) in (dimension, key) order,
+so saves moving tickets in opposite directions, e.g. To do -> In progress and In progress -> To do, cannot deadlock.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F
+
+from application.models import Ticket, TicketCounter
+
+
+def get_counter_keys(values):
+    """
+    Get the counters a ticket counts towards.
+
+    Parameters:
+        values (dict): The ticket's tracked values (at least Ticket.COUNTED_FIELDS), or None for no ticket.
+
+    Returns:
+        list: (dimension, key) tuples.
+    """
+    if values is None or values['deleted_at'] is not None:
+        return []
+    keys = [
+        (TicketCounter.Dimension.STATUS, values['status']),
+        (TicketCounter.Dimension.REPORTER_STATUS, reporter_status_key(values['reporter_id'], values['status'])),
+    ]
+    if values['status'] != Ticket.Status.D:
+        keys.append((TicketCounter.Dimension.PRIORITY, values['priority']))
+        keys.append((TicketCounter.Dimension.REPORTER, str(values['reporter_id'])))
+    return keys
+
+
+def reporter_status_key(reporter_id, status):
+    """
+    Get the key of a 'reporter_status' counter, e.g. '12:IP'.
+    """
+    return f"{reporter_id}:{status}"
+
+
+def update_counters(old_values, new_values, using='default'):
+    """
+    Move a ticket from the counters of its old values to those of its new values.
+
+    Parameters:
+        old_values (dict): The counted values before the change, or None for a new ticket.
+        new_values (dict): The counted values after the change, or None for a deleted ticket.
+        using (str, optional): The database alias. Defaults to 'default'.
+    """
+    deltas = Counter()
+    for counter_key in get_counter_keys(old_values):
+        deltas[counter_key] -= 1
+    for counter_key in get_counter_keys(new_values):
+        deltas[counter_key] += 1
+    apply_deltas(deltas, using=using)
+
+
+def remove_from_counters(tickets, using='default'):
+    """
+    Remove a queryset of live tickets from the counters before they are soft deleted in bulk.
+
+    Parameters:
+        tickets (QuerySet): The tickets about to be soft deleted.
+        using (str, optional): The database alias. Defaults to 'default'.
+    """
+    apply_deltas({counter_key: -count for counter_key, count in compute_counters(using, tickets).items()}, using)
+
+
+def apply_deltas(deltas, using='default'):
+    """
+    Add deltas to counters, creating the counters that do not exist yet. Counters are updated in (dimension, key)
+    order, so concurrent transactions lock their rows in the same order.
+
+    Parameters:
+        deltas (dict): Changes by (dimension, key).
+        using (str, optional): The database alias. Defaults to 'default'.
+    """
+    counters = TicketCounter.objects.using(using)
+    for (dimension, key), delta in sorted(deltas.items()):
+        if not delta:
+            continue
+        if not counters.filter(dimension=dimension, key=key).update(count=F('count') + delta):
+            # First ticket for this key; another transaction may create the row at the same time
+            counters.bulk_create([TicketCounter(dimension=dimension, key=key)], ignore_conflicts=True)
+            counters.filter(dimension=dimension, key=key).update(count=F('count') + delta)
+
+
+def compute_counters(using='default', tickets=None):
+    """
+    Count tickets with GROUP BY queries over the ticket table.
+
+    Parameters:
+        using (str, optional): The database alias. Defaults to 'default'.
+        tickets (QuerySet, optional): The tickets to count. Defaults to all live tickets.
+
+    Returns:
+        dict: Ticket counts by (dimension, key).
+    """
+    tickets = (Ticket.objects if tickets is None else tickets).using(using)
+    open_tickets = tickets.exclude(status=Ticket.Status.D)
+    groups = (
+        (TicketCounter.Dimension.STATUS, tickets, 'status'),
+        (TicketCounter.Dimension.PRIORITY, open_tickets, 'priority'),
+        (TicketCounter.Dimension.REPORTER, open_tickets, 'reporter_id'),
+    )
+    counts = {}
+    for dimension, queryset, field in groups:
+        for row in queryset.order_by().values(field).annotate(total=Count('pk')):
+            counts[(dimension, str(row[field]))] = row['total']
+    for row in tickets.order_by().values('reporter_id', 'status').annotate(total=Count('pk')):
+        counts[(TicketCounter.Dimension.REPORTER_STATUS, reporter_status_key(row['reporter_id'], row['status']))] = \
+            row['total']
+    return counts
+
+
+def reconcile_counters(using='default'):
+    """
+    Rebuild the counters from the ticket table, fixing any that drifted.
+
+    The counter rows are locked before the tickets are counted, so tickets saved concurrently either are counted or
+    update their counters after the rebuild.
+
+    Returns:
+        dict: The corrected counters, mapping (dimension, key) to (old count, new count).
+    """
+    with transaction.atomic(using=using):
+        counters = TicketCounter.objects.using(using)
+        existing = {(counter.dimension, counter.key): counter for counter in counters.select_for_update()}
+        expected = compute_counters(using)
+
+        corrections = {}
+        changed = []
+        for counter_key in existing.keys() | expected.keys():
+            counter = existing.get(counter_key)
+            old_count = counter.count if counter else 0
+            new_count = expected.get(counter_key, 0)
+            if old_count == new_count:
+                continue
+            corrections[counter_key] = (old_count, new_count)
+            if counter is None:
+                counters.create(dimension=counter_key[0], key=counter_key[1], count=new_count)
+            else:
+                counter.count = new_count
+                changed.append(counter)
+        counters.bulk_update(changed, ['count'])
+    return corrections
+
+
+def get_dashboard_counts():
+    """
+    Read the dashboard's counters: every counter except the per-reporter status counts.
+
+    Returns:
+        dict: Counts by dimension, each a dict of counts by key.
+    """
+    dimensions = [dimension for dimension in TicketCounter.Dimension.values
+                  if dimension != TicketCounter.Dimension.REPORTER_STATUS]
+    counts = {dimension: {} for dimension in dimensions}
+    for dimension, key, count in TicketCounter.objects.filter(dimension__in=dimensions).values_list(
+            'dimension', 'key', 'count'):
+        counts[dimension][key] = count
+    return counts
+
+
+def get_reporter_status_counts(reporter_id):
+    """
+    Read the number of live tickets of a reporter in each status.
+
+    Parameters:
+        reporter_id (int): The reporter's primary key.
+
+    Returns:
+        list: (status label, count) tuples, in the order of Ticket.Status.
+    """
+    keys = {reporter_status_key(reporter_id, status): label for status, label in Ticket.Status.choices}
+    counts = dict(TicketCounter.objects.filter(dimension=TicketCounter.Dimension.REPORTER_STATUS, key__in=keys)
+                  .values_list('key', 'count'))
+    return [(label, counts.get(key, 0)) for key, label in keys.items()]
@@ -28,16 +28,22 @@ References:
     (Accessed: 13 April 2022).
 """
 import logging
+import time
 
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Submit
 from django import forms
-from django.contrib.auth.forms import UserCreationForm, UserChangeForm
+from django.contrib.auth.forms import AuthenticationForm, UserCreationForm, UserChangeForm
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
 from django.core.validators import MinLengthValidator, MaxLengthValidator
 from django.utils import timezone
 from django.utils.html import escape
+from django.utils.translation import gettext_lazy as _
 
 from application.models import Ticket, EngineerUser
+from application.ratelimit import get_client_ip, get_login_limiters
+from application.widgets import EngineerAutocompleteSelect
+from logger.events import LogEvent, event_extra
 
 XSS_MSG = 'Cross-Site Scripting attempt detected'
 SQL_MSG = 'SQL Injection attempt detected'
@@ -150,6 +156,72 @@ class EngineerUserChangeForm(UserChangeForm):
         return cleaned_data
 
 
+class LoginForm(AuthenticationForm):
+    """
+    Authentication form that rate limits login attempts before checking the password.
+
+    Attempts are limited per client IP and per username with the token buckets configured in LOGIN_RATE_LIMITS.
+    A refused attempt never reaches the password hasher, so bursts of guesses cannot tie up the workers.
+    The user is authenticated once in clean() and is available from get_user() afterwards.
+    """
+
+    error_messages = {
+        **AuthenticationForm.error_messages,
+        "rate_limited": _("Too many login attempts. Please try again later."),
+    }
+
+    def clean(self):
+        """
+        Custom clean method for LoginForm.
+
+        Checks the rate limits before authenticating the user.
+
+        Returns:
+            dict: A dictionary containing the cleaned form data.
+        """
+        username = self.cleaned_data.get("username")
+        password = self.cleaned_data.get("password")
+
+        if username is not None and password and not self.is_login_allowed(username):
+            raise ValidationError(self.error_messages["rate_limited"], code="rate_limited")
+
+        return super().clean()
+
+    def is_login_allowed(self, username):
+        """
+        Take a token from the client IP and username buckets, or from neither if either is empty.
+
+        Parameters:
+            username (str): The username being logged in to.
+
+        Returns:
+            bool: True if neither bucket is empty, False otherwise.
+        """
+        keys = {
+            "ip": get_client_ip(self.request) if self.request else "",
+            "username": username.lower(),
+        }
+        now = time.time()
+        taken = []
+        for scope, limiter in get_login_limiters().items():
+            if not limiter.allow(keys[scope], now=now):
+                # A refused attempt uses no token, so attempts on a locked username don't drain the IP bucket
+                for taken_limiter, key in taken:
+                    taken_limiter.refund(key, now=now)
+                return False
+            taken.append((limiter, keys[scope]))
+        return True
+
+    def is_rate_limited(self):
+        """
+        Check if the form was rejected by the rate limiter.
+
+        Returns:
+            bool: True if the login attempt was refused by a rate limit, False otherwise.
+        """
+        return self.has_error(NON_FIELD_ERRORS, "rate_limited")
+
+
 class TicketCreationForm(forms.ModelForm):
     """
     A form to create a Ticket.
@@ -208,6 +280,7 @@ class TicketCreationForm(forms.ModelForm):
         ticket = super().save(commit=False)
         ticket.created = timezone.now()
         ticket.reporter = self.user
+        ticket.changed_by = self.user
 
         if commit:
             ticket.save()
@@ -222,6 +295,7 @@ class TicketChangeForm(forms.ModelForm):
     Attributes:
         title (forms.CharField): Read-only field for the ticket's title.
         created (forms.DateTimeField): Read-only field for the ticket's creation date.
+        version (forms.IntegerField): Hidden field holding the version of the ticket the form was rendered from.
 
     Meta:
         model (Ticket): The model associated with this form.
@@ -230,6 +304,11 @@ class TicketChangeForm(forms.ModelForm):
 
     title = forms.CharField(disabled=True)
     created = forms.DateTimeField(disabled=True)
+    version = forms.IntegerField(widget=forms.HiddenInput, required=False)
+
+    error_messages = {
+        "conflict": _("This ticket was changed by someone else. Review the latest version and try again."),
+    }
 
     class Meta:
         model = Ticket
@@ -247,6 +326,7 @@ class TicketChangeForm(forms.ModelForm):
         """
         self.user = kwargs.pop('user', None)
         super(TicketChangeForm, self).__init__(*args, **kwargs)
+        self.fields["version"].initial = self.instance.version
 
     def clean(self):
         """
@@ -260,20 +340,72 @@ class TicketChangeForm(forms.ModelForm):
         cleaned_data = super().clean()
         cleaned_description = clean_field(self, cleaned_data, "description", self.user)
         cleaned_data["description"] = cleaned_description
+        # The read-only date is rendered without microseconds, so keep the stored value instead of the rendered one
+        cleaned_data["created"] = self.instance.created
+
+        if self.is_conflicting_version(cleaned_data.get("version")):
+            raise ValidationError(self.error_messages["conflict"], code="conflict")
 
         return cleaned_data
 
+    def is_conflicting_version(self, version):
+        """
+        Check if the ticket was saved by someone else after the form was rendered.
+
+        A form submitted without a version, e.g. rendered before the field existed or built by hand, cannot prove it
+        was rendered from the stored version, so it is treated as a conflict rather than overwriting the ticket.
+
+        Parameters:
+            version (int): The submitted version, or None if the form did not submit one.
+
+        Returns:
+            bool: True if the submitted version is missing or not the stored version, False otherwise.
+        """
+        return version is None or version != self.instance.version
+
+    def has_conflict(self):
+        """
+        Check if the form was rejected because of a concurrent edit.
+
+        Returns:
+            bool: True if the submitted version was out of date, False otherwise.
+        """
+        return self.has_error(NON_FIELD_ERRORS, "conflict")
+
+    def save(self, commit=True):
+        """
+        Save method for TicketChangeForm.
+
+        Records the form's user as the author of the change in the ticket history. Only the changed fields are
+        written, and only if the ticket is still at the submitted version.
+
+        Parameters:
+            commit (bool, optional): If True, the ticket is saved to the database. Defaults to True.
+
+        Returns:
+            Ticket: The changed Ticket instance.
+
+        Raises:
+            TicketEditConflict: If the ticket was saved by someone else after the form was validated.
+        """
+        self.instance.changed_by = self.user
+        if self.cleaned_data.get("version") is not None:
+            self.instance._loaded_version = self.cleaned_data["version"]
+        return super().save(commit=commit)
+
 
 class OnCallChangeForm(forms.Form):
     """
     A form to change the engineer on-call.
 
     Attributes:
-        engineer (forms.ModelChoiceField): A ModelChoiceField to select an engineer.
+        engineer (forms.ModelChoiceField): A ModelChoiceField to select an engineer, searched as the user types
+            (see application.widgets) instead of listing every engineer.
     """
 
     engineer = forms.ModelChoiceField(
-        label="Engineer Choices", queryset=EngineerUser.objects.all(), required=True)
+        label="Engineer Choices", queryset=EngineerUser.objects.all(), required=True,
+        widget=EngineerAutocompleteSelect)
 
 
 def clean_field(self, cleaned_data, field_name, user=None):
@@ -320,7 +452,7 @@ def sql_injection_check(input_string, user):
 
     for keyword in sql_keywords:
         if keyword in input_string:
-            logger.warning(SQL_MSG, extra={'username': get_username(user)})
+            logger.warning(SQL_MSG, extra=event_extra(LogEvent.SQL_INJECTION, user, username=get_username(user)))
             return True
     return False
 
@@ -337,7 +469,7 @@ def cross_site_scripting_check(input_string, user):
         bool: True if XSS is detected, False otherwise.
     """
     if '<script>' in input_string:
-        logger.warning(XSS_MSG, extra={'username': get_username(user)})
+        logger.warning(XSS_MSG, extra=event_extra(LogEvent.CROSS_SITE_SCRIPTING, user, username=get_username(user)))
         return True
     return False
 
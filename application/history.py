@@ -0,0 +1,112 @@
+"""
+Ticket change history.
+
+Each ticket save appends a TicketHistory row holding only the fields that changed, as a compact JSON object keyed by
+field attribute name. The first row of a ticket holds every tracked field, so rebuild_ticket() can replay the rows up
+to any point in time to get the ticket as it was then.
+"""
+from datetime import datetime
+
+from django.db.models import Q
+
+from application.models import EngineerUser, Ticket, TicketHistory
+
+
+def get_changes(old_values, new_values):
+    """
+    Get the fields that differ between two sets of tracked values.
+
+    Parameters:
+        old_values (dict): The values before the save, or None for a new ticket.
+        new_values (dict): The values after the save.
+
+    Returns:
+        dict: The new values of the changed fields (all fields for a new ticket).
+    """
+    if old_values is None:
+        return dict(new_values)
+    return {field: value for field, value in new_values.items() if old_values.get(field) != value}
+
+
+def record_history(ticket, old_values, new_values, using='default'):
+    """
+    Append a history row for a saved ticket. Saves that change nothing are not recorded.
+
+    The actor is read from the ticket's 'changed_by' attribute, which the ticket forms and admin set to the user
+    making the change.
+
+    Parameters:
+        ticket (Ticket): The saved ticket.
+        old_values (dict): The tracked values before the save, or None for a new ticket.
+        new_values (dict): The tracked values after the save.
+        using (str, optional): The database alias. Defaults to 'default'.
+
+    Returns:
+        TicketHistory: The new history row, or None if nothing changed.
+    """
+    changes = get_changes(old_values, new_values)
+    if not changes:
+        return None
+    # Store datetimes with full precision (DjangoJSONEncoder would round them to milliseconds)
+    changes = {field: value.isoformat() if isinstance(value, datetime) else value for field, value in changes.items()}
+    actor = getattr(ticket, 'changed_by', None)
+    return TicketHistory.objects.using(using).create(ticket=ticket, actor_id=getattr(actor, 'pk', None),
+                                                     changes=changes)
+
+
+def rebuild_ticket(ticket_id, at=None, entry=None, using='default'):
+    """
+    Rebuild a ticket as it was at a point in its history.
+
+    Parameters:
+        ticket_id (int): The primary key of the ticket.
+        at (datetime, optional): Rebuild the ticket as it was at this time. Defaults to now.
+        entry (TicketHistory, optional): Rebuild the ticket as it was right after this history row.
+        using (str, optional): The database alias. Defaults to 'default'.
+
+    Returns:
+        Ticket: An unsaved Ticket with the past values, or None if the ticket had no history by then.
+    """
+    history = TicketHistory.objects.using(using).filter(ticket_id=ticket_id)
+    if at is not None:
+        history = history.filter(timestamp__lte=at)
+    if entry is not None:
+        history = history.filter(Q(timestamp__lt=entry.timestamp) | Q(timestamp=entry.timestamp, id__lte=entry.id))
+
+    values = {}
+    for changes in history.order_by('timestamp', 'id').values_list('changes', flat=True):
+        values.update(changes)
+    if not values:
+        return None
+    return Ticket(id=ticket_id, **{
+        field: Ticket._meta.get_field(field).to_python(value) for field, value in values.items()
+    })
+
+
+def describe_changes(entries):
+    """
+    Get readable changes for history rows, e.g. for the timeline view.
+
+    Parameters:
+        entries (list): TicketHistory rows.
+
+    Returns:
+        list: (entry, [(field label, display value), ...]) tuples.
+    """
+    reporter_ids = {entry.changes['reporter_id'] for entry in entries if 'reporter_id' in entry.changes}
+    reporters = EngineerUser.objects.in_bulk(reporter_ids) if reporter_ids else {}
+
+    described = []
+    for entry in entries:
+        fields = []
+        for name, value in entry.changes.items():
+            field = Ticket._meta.get_field(name)
+            if name == 'reporter_id':
+                display = reporters.get(value, value)
+            elif field.choices:
+                display = dict(field.flatchoices).get(value, value)
+            else:
+                display = field.to_python(value)
+            fields.append((field.verbose_name, display))
+        described.append((entry, fields))
+    return described
@@ -0,0 +1,67 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+
+from application.models import EngineerUser
+from application.notifications import notify, schedule_delivery, send_pending_notifications
+
+
+class Command(BaseCommand):
+    """
+    Measure notification throughput with one email per event versus batched delivery per recipient.
+
+    The benchmark adds temporary engineers and notifications in a transaction that is rolled back at the end, and sends
+    email through the in-memory backend unless --email-backend is given, so it measures the pipeline rather than a mail
+    server. As that transaction never commits, the deliveries notify() leaves for the commit are scheduled directly.
+    """
+
+    help = "Measure notification throughput with and without batching per recipient (changes are rolled back)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=1000, help="The number of events. Defaults to 1000.")
+        parser.add_argument('--recipients', type=int, default=20,
+                            help="The number of engineers the events are spread over. Defaults to 20.")
+        parser.add_argument('--email-backend', default='django.core.mail.backends.locmem.EmailBackend',
+                            help="The email backend used for delivery. Defaults to the in-memory backend.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            recipients = EngineerUser.objects.bulk_create([
+                EngineerUser(username=f"benchmark-{i}", email=f"benchmark-{i}@example.com", first_name="Benchmark",
+                             last_name=str(i))
+                for i in range(options['recipients'])
+            ])
+            events = [(recipients[i % len(recipients)], f"Benchmark event {i}.") for i in range(options['events'])]
+
+            # Every event emailed on its own, as if it were sent inside the request
+            with override_settings(EMAIL_BACKEND=options['email_backend'], NOTIFICATION_BATCH_SECONDS=0,
+                                   TASKS={**settings.TASKS, 'BACKEND': 'immediate'}):
+                start = time.perf_counter()
+                for recipient, message in events:
+                    notify([recipient], message)
+                    schedule_delivery(recipient.pk)
+                unbatched = time.perf_counter() - start
+            self.report("One email per event", len(events), len(events), unbatched)
+
+            # Events queued for the database backend, then each recipient's pending notifications emailed together
+            with override_settings(EMAIL_BACKEND=options['email_backend'], NOTIFICATION_BATCH_SECONDS=3600,
+                                   TASKS={**settings.TASKS, 'BACKEND': 'database'}):
+                start = time.perf_counter()
+                for recipient, message in events:
+                    notify([recipient], message)
+                    schedule_delivery(recipient.pk)
+                queued = time.perf_counter() - start
+                emails = sum(1 for recipient in recipients if send_pending_notifications(recipient.pk))
+                batched = time.perf_counter() - start
+            self.report("Batched per recipient", len(events), emails, batched)
+            self.stdout.write(f"  of which {queued:.3f}s queuing events in requests and {batched - queued:.3f}s "
+                              f"delivering in the worker")
+
+            transaction.set_rollback(True)
+
+    def report(self, label, events, emails, seconds):
+        self.stdout.write(f"{label}: {events} event(s), {emails} email(s), {seconds:.3f}s, "
+                          f"{events / seconds if seconds else 0:.0f} events/s")
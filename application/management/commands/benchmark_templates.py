@@ -0,0 +1,77 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates
+from django.test import RequestFactory
+
+from webapplicationproject.template_warmup import find_templates, warm_template_cache
+
+
+class Command(BaseCommand):
+    """
+    Compare the cost of rendering the app's templates in a cold worker with a worker whose template cache was warmed.
+
+    Each cold render uses a new template engine, so the template and everything it extends or includes is read and
+    parsed again, as on a worker's first request. Warm renders reuse an engine warmed with warm_template_cache().
+    Templates are rendered with an empty context; those that need context variables are only loaded.
+    """
+
+    help = "Compare cold and warm template render times for the templates warmed at worker boot."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20,
+                            help="The number of renders per template and mode. Defaults to 20.")
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        warm_engine = self.new_engine()
+        warm_template_cache(engine=warm_engine.engine)
+
+        totals = {'cold': 0.0, 'warm': 0.0}
+        self.stdout.write(f"{'Template':<40} {'Cold ms':>9} {'Warm ms':>9}")
+        for name in find_templates(warm_engine.engine, settings.TEMPLATE_WARMUP_PREFIXES):
+            if not name.startswith('application/'):
+                continue
+            times = {
+                'cold': self.time_render(lambda: self.new_engine(), name, request, options['iterations']),
+                'warm': self.time_render(lambda: warm_engine, name, request, options['iterations']),
+            }
+            if times['cold'] is None or times['warm'] is None:
+                continue
+            for mode, seconds in times.items():
+                totals[mode] += seconds
+            self.stdout.write(f"{name:<40} {times['cold'] * 1000:>9.3f} {times['warm'] * 1000:>9.3f}")
+
+        self.stdout.write(f"{'Total':<40} {totals['cold'] * 1000:>9.3f} {totals['warm'] * 1000:>9.3f}")
+        if totals['warm']:
+            self.stdout.write(self.style.SUCCESS(f"Warm renders are {totals['cold'] / totals['warm']:.1f}x faster."))
+
+    def new_engine(self):
+        params = {key: value for key, value in settings.TEMPLATES[0].items() if key != 'BACKEND'}
+        return DjangoTemplates({**params, 'NAME': 'benchmark', 'APP_DIRS': False})
+
+    def time_render(self, get_engine, name, request, iterations):
+        """
+        Get the mean time to get and render a template, or to get it if it cannot be rendered without context.
+
+        Returns:
+            float: The mean time in seconds, or None if the template does not exist.
+        """
+        elapsed = 0.0
+        for _ in range(iterations):
+            engine = get_engine()
+            start = time.perf_counter()
+            try:
+                template = engine.get_template(name)
+            except TemplateDoesNotExist:
+                return None
+            try:
+                template.render({}, request)
+            except Exception:
+                pass
+            elapsed += time.perf_counter() - start
+        return elapsed / iterations
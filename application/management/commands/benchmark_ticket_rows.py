@@ -0,0 +1,102 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.template import engines
+from django.test import RequestFactory
+from django.utils import timezone
+
+from application.models import EngineerUser, Ticket
+from application.ticket_rows import get_ticket_rows
+
+# The ticket table loop as it was before rows were precomputed
+LEGACY_ROWS_TEMPLATE = """
+{% for ticket in ticket_list %}
+    <tr>
+        <td class="align_center">{{ ticket.created | date:'d M Y' }}</td>
+        <td class="align_center">{{ ticket.created | time:'H:i:s' }}</td>
+        <td class="align_left">{{ ticket.title }}</td>
+        <td class="align_center">{{ ticket.priority }}</td>
+        <td class="align_left">{{ ticket.description }}</td>
+        <td class="align_center">{{ ticket.status }}</td>
+        <td class="align_center">{{ ticket.reporter }}</td>
+        <td class="align_center">
+            <a href="{% url 'edit_ticket' pk=ticket.id %}">Edit</a>
+            <a href="{% url 'ticket_history' pk=ticket.id %}">History</a>
+            {% if request.user.is_superuser %}
+                <a href="{% url 'delete_ticket' pk=ticket.id %}">Delete</a>
+            {% endif %}
+        </td>
+    </tr>
+{% endfor %}
+"""
+
+
+class Command(BaseCommand):
+    """
+    Compare the per-row cost of rendering a large ticket table from Ticket instances with rendering precomputed rows.
+
+    The benchmark adds temporary engineers and tickets in a transaction that is rolled back at the end. Each path is
+    timed from querying the tickets to the rendered table, for a superuser so that every row has all three links. The
+    old template is also timed with the reporters joined, to separate the template cost from the reporter queries.
+    """
+
+    help = "Compare the per-row cost of the ticket table before and after precomputing rows (changes are rolled back)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help="The number of tickets. Defaults to 10000.")
+        parser.add_argument('--reporters', type=int, default=10,
+                            help="The number of engineers reporting the tickets. Defaults to 10.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            reporters = EngineerUser.objects.bulk_create([
+                EngineerUser(username=f"benchmark-{i}", email=f"benchmark-{i}@example.com", first_name="Benchmark",
+                             last_name=str(i))
+                for i in range(options['reporters'])
+            ])
+            now = timezone.now()
+            Ticket.objects.bulk_create([
+                Ticket(title=f"Benchmark ticket {i}", created=now - timezone.timedelta(minutes=i),
+                       description="Benchmark ticket description", reporter=reporters[i % len(reporters)])
+                for i in range(options['rows'])
+            ])
+            queryset = Ticket.objects.filter(reporter__in=reporters)
+
+            request = RequestFactory().get('/tickets/')
+            request.user = EngineerUser(username="benchmark-admin", is_superuser=True)
+            engine = engines['django']
+            legacy_template = engine.from_string(LEGACY_ROWS_TEMPLATE)
+            rows_template = engine.get_template('application/tickets_base.html')
+
+            legacy = self.measure(lambda: legacy_template.render({'ticket_list': queryset.all()}, request))
+            joined = self.measure(lambda: legacy_template.render(
+                {'ticket_list': queryset.select_related('reporter')}, request,
+            ))
+            rows = self.measure(lambda: rows_template.render(
+                {'ticket_rows': get_ticket_rows(queryset.all(), request.user)}, request,
+            ))
+            self.report("Ticket instances", options['rows'], *legacy)
+            self.report("Ticket instances with select_related", options['rows'], *joined)
+            self.report("Precomputed rows", options['rows'], *rows)
+            if rows[0]:
+                self.stdout.write(self.style.SUCCESS(f"Precomputed rows are {legacy[0] / rows[0]:.1f}x faster."))
+
+            transaction.set_rollback(True)
+
+    def measure(self, render):
+        queries = []
+
+        def count_query(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_query):
+            start = time.perf_counter()
+            render()
+            elapsed = time.perf_counter() - start
+        return elapsed, len(queries)
+
+    def report(self, label, row_count, seconds, queries):
+        self.stdout.write(f"{label}: {row_count} row(s) in {seconds:.3f}s, "
+                          f"{seconds / row_count * 1e6:.1f} us/row, {queries} quer{'y' if queries == 1 else 'ies'}")
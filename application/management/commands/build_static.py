@@ -0,0 +1,105 @@
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.finders import find
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.template import engines
+from django.test import RequestFactory
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from webapplicationproject.template_warmup import find_templates
+
+STATIC_TAG = re.compile(r"""{%\s*static\s+['"]([^'"]+)['"]""")
+TEMPLATE_TAG = re.compile(r"""{%\s*(?:extends|include)\s+['"]([^'"]+)['"]""")
+
+
+def find_static_references(engine, name, seen=None):
+    """
+    Find the static files a template links, including those linked by the templates it extends or includes.
+
+    Parameters:
+        engine (Engine): The Django template engine.
+        name (str): The template name.
+
+    Returns:
+        list: The static file names, without duplicates.
+    """
+    seen = set() if seen is None else seen
+    seen.add(name)
+    source = engine.get_template(name).source
+    references = STATIC_TAG.findall(source)
+    for template_name in TEMPLATE_TAG.findall(source):
+        if template_name not in seen:
+            references += find_static_references(engine, template_name, seen)
+    return list(dict.fromkeys(references))
+
+
+class Command(BaseCommand):
+    """
+    Run collectstatic and report what the static file pipeline saves.
+
+    For each bundle in STATIC_BUNDLES the report compares the size of its source files with the bundle as WhiteNoise
+    serves it (minified, gzip and brotli), and shows the Cache-Control header of its hashed URL. It then counts the
+    static files each page template links, with and without bundling.
+    """
+
+    help = ("Build the static files (bundles, hashed names, gzip and brotli) and report bytes saved and requests "
+            "per page.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-collect', action='store_true', help="Only report on the files already collected.")
+        parser.add_argument('-i', '--ignore', action='append', default=[], metavar='PATTERN',
+                            help="Passed on to collectstatic; ignore files or directories matching the pattern.")
+
+    def handle(self, *args, **options):
+        if not options['no_collect']:
+            call_command('collectstatic', interactive=False, verbosity=0, ignore_patterns=options['ignore'])
+            self.stdout.write(f"Collected static files in {settings.STATIC_ROOT}")
+
+        bundles = getattr(settings, 'STATIC_BUNDLES', {})
+        whitenoise = WhiteNoiseMiddleware(get_response=lambda request: None)
+        total_source = total_served = 0
+        for name, sources in bundles.items():
+            source_bytes = sum(self.file_size(find(source)) for source in sources)
+            url = staticfiles_storage.url(name)
+            sizes = {encoding: self.served_size(whitenoise, url, encoding) for encoding in ('identity', 'gzip', 'br')}
+            served = min(size for size in sizes.values() if size is not None)
+            total_source += source_bytes
+            total_served += served
+            self.stdout.write(
+                f"{name}: {len(sources)} source file(s), {source_bytes} bytes; minified {sizes['identity']}, "
+                f"gzip {sizes['gzip'] or '-'}, brotli {sizes['br'] or '-'} bytes"
+            )
+            self.stdout.write(f"  {url}: Cache-Control: {self.cache_control(whitenoise, url)}")
+        if total_source:
+            self.stdout.write(self.style.SUCCESS(
+                f"Bundles save {total_source - total_served} of {total_source} bytes "
+                f"({(total_source - total_served) / total_source:.0%}) per page load with an empty cache."
+            ))
+
+        engine = engines['django'].engine
+        self.stdout.write(f"{'Template':<40} {'Unbundled':>9} {'Bundled':>9}")
+        for template_name in find_templates(engine, ('application/',)):
+            references = find_static_references(engine, template_name)
+            if references:
+                unbundled = sum(len(bundles.get(reference, [reference])) for reference in references)
+                self.stdout.write(f"{template_name:<40} {unbundled:>9} {len(references):>9}")
+
+    def file_size(self, path):
+        with open(path, 'rb') as static_file:
+            return len(static_file.read())
+
+    def served_size(self, whitenoise, url, encoding):
+        """
+        Get the size of a static file as WhiteNoise serves it with an encoding, or None if it has no such version.
+        """
+        response = whitenoise(RequestFactory().get(url, HTTP_ACCEPT_ENCODING=encoding))
+        if response is None or response.get('Content-Encoding', 'identity') != encoding:
+            return None
+        return int(response['Content-Length'])
+
+    def cache_control(self, whitenoise, url):
+        response = whitenoise(RequestFactory().get(url))
+        return response['Cache-Control'] if response is not None else "(not found, run collectstatic)"
@@ -0,0 +1,135 @@
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+IMPORT_TIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+# Run in a fresh interpreter: import the module a worker boots from and report the time taken and peak memory
+# (__import__ rather than importlib.import_module, which -X importtime does not report)
+STARTUP_SCRIPT = """
+import json, resource, sys, time
+start = time.perf_counter()
+__import__(sys.argv[1])
+print(json.dumps({'seconds': time.perf_counter() - start,
+                  'max_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+"""
+
+
+def parse_importtime(output):
+    """
+    Parse the report written to stderr by 'python -X importtime'.
+
+    Parameters:
+        output (str): The stderr output.
+
+    Returns:
+        list: A dict per imported module with 'module', 'self_us', 'cumulative_us' and 'depth' (0 for top-level
+            imports), in the order the imports finished.
+    """
+    imports = []
+    for line in output.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            imports.append({
+                'module': module,
+                'self_us': int(self_us),
+                'cumulative_us': int(cumulative_us),
+                'depth': (len(indent) - 1) // 2,
+            })
+    return imports
+
+
+def aggregate_by_package(imports):
+    """
+    Add up the import time of modules by top-level package.
+
+    Parameters:
+        imports (list): The modules returned by parse_importtime().
+
+    Returns:
+        list: (package, self time in microseconds, number of modules) tuples, slowest first.
+    """
+    totals = defaultdict(lambda: [0, 0])
+    for module in imports:
+        package = totals[module['module'].split('.')[0]]
+        package[0] += module['self_us']
+        package[1] += 1
+    return sorted(((name, total, count) for name, (total, count) in totals.items()), key=lambda item: -item[1])
+
+
+class Command(BaseCommand):
+    """
+    Report what a worker imports when it boots, and how long it takes, for each worker profile.
+
+    Each run starts a new interpreter with 'python -X importtime' that imports the WSGI module, as a gunicorn worker
+    does, with WORKER_PROFILE set to the profile. The import time report is aggregated per top-level package.
+    """
+
+    help = "Report worker start-up time, memory and per-module import time for the 'full' and 'api' worker profiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', action='append', choices=['full', 'api'],
+                            help="The worker profile to measure; repeat to compare. Defaults to both.")
+        parser.add_argument('--module', default=settings.WSGI_APPLICATION.rsplit('.', 1)[0],
+                            help="The module imported at start-up. Defaults to the WSGI module.")
+        parser.add_argument('--runs', type=int, default=3,
+                            help="Start-ups per profile; the median time and memory are reported. Defaults to 3.")
+        parser.add_argument('--top', type=int, default=10, help="The number of packages and modules listed.")
+
+    def handle(self, *args, **options):
+        results = {}
+        for profile in options['profile'] or ['full', 'api']:
+            runs = [self.start_worker(options['module'], profile) for _ in range(options['runs'])]
+            imports = runs[-1][1]
+            results[profile] = {
+                'seconds': statistics.median(stats['seconds'] for stats, _ in runs),
+                'max_rss': statistics.median(stats['max_rss'] for stats, _ in runs),
+                'modules': len(imports),
+            }
+            self.report(profile, options['module'], results[profile], imports, options['top'])
+
+        if len(results) > 1:
+            (base_name, base), *others = results.items()
+            for name, result in others:
+                self.stdout.write(self.style.SUCCESS(
+                    f"'{name}' against '{base_name}': {result['seconds'] - base['seconds']:+.3f}s, "
+                    f"{result['modules'] - base['modules']:+d} modules, "
+                    f"{(result['max_rss'] - base['max_rss']) / 1024:+.1f} MB max RSS"
+                ))
+
+    def start_worker(self, module, profile):
+        """
+        Import a module in a new interpreter with a worker profile.
+
+        Returns:
+            tuple: ({'seconds', 'max_rss'} from the interpreter, the parsed import time report).
+        """
+        env = {**os.environ, 'WORKER_PROFILE': profile, 'DJANGO_SETTINGS_MODULE': os.environ.get(
+            'DJANGO_SETTINGS_MODULE', 'webapplicationproject.settings')}
+        process = subprocess.run([sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT, module],
+                                 capture_output=True, text=True, env=env)
+        if process.returncode:
+            raise CommandError(f"Importing {module} with WORKER_PROFILE={profile} failed:\n{process.stderr}")
+        return json.loads(process.stdout.strip().splitlines()[-1]), parse_importtime(process.stderr)
+
+    def report(self, profile, module, result, imports, top):
+        # ru_maxrss is in kilobytes on Linux
+        self.stdout.write(
+            f"Profile '{profile}': {result['seconds']:.3f}s to import {module}, {result['modules']} modules "
+            f"({sum(item['self_us'] for item in imports) / 1000:.1f}ms import time), "
+            f"{result['max_rss'] / 1024:.1f} MB max RSS"
+        )
+        self.stdout.write("  Slowest packages (self time):")
+        for package, total_us, count in aggregate_by_package(imports)[:top]:
+            self.stdout.write(f"    {package:<40} {total_us / 1000:>8.1f}ms {count:>5} modules")
+        self.stdout.write("  Slowest modules (cumulative time):")
+        for item in sorted(imports, key=lambda item: -item['cumulative_us'])[:top]:
+            self.stdout.write(f"    {item['module']:<40} {item['cumulative_us'] / 1000:>8.1f}ms")
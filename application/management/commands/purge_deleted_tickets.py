@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from application.models import Ticket
+
+
+class Command(BaseCommand):
+    """
+    Permanently delete tickets that were soft deleted a while ago.
+
+    Tickets are deleted in chunks, each in its own short transaction, so a large backlog (e.g. after deleting an
+    engineer with many tickets) never holds locks for long. Run it periodically, e.g. daily with Heroku Scheduler.
+    """
+
+    help = "Permanently delete tickets soft deleted more than --days days ago, in chunks of --batch-size."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30,
+                            help="Only purge tickets deleted at least this many days ago. Defaults to 30.")
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="The number of tickets deleted per transaction. Defaults to 500.")
+        parser.add_argument('--sleep', type=float, default=0,
+                            help="Seconds to pause between chunks to leave room for other queries. Defaults to 0.")
+        parser.add_argument('--database', default='default', help="The database to purge. Defaults to 'default'.")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timezone.timedelta(days=options['days'])
+        deleted_tickets = Ticket.all_objects.using(options['database']).filter(deleted_at__lte=cutoff)
+
+        purged = 0
+        while True:
+            ids = list(deleted_tickets.order_by('deleted_at').values_list('pk', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            with transaction.atomic(using=options['database']):
+                Ticket.all_objects.using(options['database']).filter(pk__in=ids).delete()
+            purged += len(ids)
+            if options['verbosity'] >= 2:
+                self.stdout.write(f"Purged {purged} ticket(s)...")
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} deleted ticket(s)."))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from application.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the dashboard and per-engineer ticket counters from the ticket table.
+
+    Counters are kept up to date on every ticket save and delete, so this only fixes drift caused by bulk updates,
+    raw fixture loads or manual database changes. Run it periodically, e.g. daily with Heroku Scheduler.
+    """
+
+    help = "Rebuild the dashboard and per-engineer ticket counters from the ticket table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help="The database to reconcile. Defaults to 'default'.")
+
+    def handle(self, *args, **options):
+        corrections = reconcile_counters(using=options['database'])
+        for (dimension, key), (old_count, new_count) in sorted(corrections.items()):
+            self.stdout.write(f"{dimension}={key}: {old_count} -> {new_count}")
+        self.stdout.write(self.style.SUCCESS(f"Corrected {len(corrections)} ticket counter(s)."))
@@ -0,0 +1,99 @@
+import json
+import secrets
+
+from django.conf import settings
+from django.contrib.messages.storage.base import BaseStorage
+from django.contrib.messages.storage.cookie import MessageDecoder, MessageEncoder
+from django.core.cache import caches
+
+
+class CacheMessageStorage(BaseStorage):
+    """
+    Store messages in the cache instead of the session or a cookie.
+
+    Messages queued during a request are written as one cache entry when the response is processed and expire after
+    MESSAGE_CACHE_TIMEOUT seconds. The browser only holds a random key in a small cookie, which is set when messages
+    are stored and deleted once they have been displayed or their cache entry has expired. Requests without the cookie
+    never touch the cache, and the session is never written.
+
+    Attributes:
+        cookie_name (str): The name of the cookie holding the message key.
+    """
+
+    cookie_name = "messages_key"
+
+    def __init__(self, request, *args, **kwargs):
+        """
+        Constructor method for CacheMessageStorage.
+
+        Parameters:
+            request: The HTTP request object.
+        """
+        super().__init__(request, *args, **kwargs)
+        self.cache = caches[settings.MESSAGE_CACHE_ALIAS]
+        self.key = request.COOKIES.get(self.cookie_name)
+        self.key_expired = False
+
+    def get_cache_key(self):
+        return f"messages:{self.key}"
+
+    def _get(self, *args, **kwargs):
+        """
+        Retrieve the messages stored under the request's message key.
+
+        Returns:
+            tuple: The list of messages (or None if there is no message key) and True, as everything is always stored.
+        """
+        if not self.key:
+            return None, True
+        data = self.cache.get(self.get_cache_key())
+        if data:
+            return json.loads(data, cls=MessageDecoder), True
+        # The entry expired or was evicted; its cookie is deleted when the response is processed
+        self.key_expired = True
+        return [], True
+
+    def update(self, response):
+        """
+        Store the unread and new messages, and delete the message key cookie if its cache entry no longer exists.
+        """
+        unstored_messages = super().update(response)
+        if self.key_expired and not self.used and not self.added_new:
+            self.delete_cookie(response)
+        return unstored_messages
+
+    def delete_cookie(self, response):
+        response.delete_cookie(
+            self.cookie_name,
+            domain=settings.SESSION_COOKIE_DOMAIN,
+            samesite=settings.SESSION_COOKIE_SAMESITE,
+        )
+
+    def _store(self, messages, response, *args, **kwargs):
+        """
+        Store all messages in a single cache entry, or remove the entry if there are none left.
+
+        Parameters:
+            messages (list): The messages to store.
+            response: The HTTP response the message key cookie is set on.
+
+        Returns:
+            list: An empty list, as there is no limit to the number of messages stored.
+        """
+        if messages:
+            if not self.key:
+                self.key = secrets.token_urlsafe(16)
+                response.set_cookie(
+                    self.cookie_name,
+                    self.key,
+                    domain=settings.SESSION_COOKIE_DOMAIN,
+                    secure=settings.SESSION_COOKIE_SECURE or None,
+                    httponly=True,
+                    samesite=settings.SESSION_COOKIE_SAMESITE,
+                )
+            encoder = MessageEncoder(separators=(",", ":"))
+            self.cache.set(self.get_cache_key(), encoder.encode(messages), settings.MESSAGE_CACHE_TIMEOUT)
+        elif self.key:
+            self.cache.delete(self.get_cache_key())
+            self.delete_cookie(response)
+        return []
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.6 on 2026-10-19 01:59
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_counters(apps, schema_editor):
+    # Count the tickets that already exist (same rules as application.counters.compute_counters)
+    Ticket = apps.get_model('application', 'Ticket')
+    TicketCounter = apps.get_model('application', 'TicketCounter')
+    using = schema_editor.connection.alias
+    tickets = Ticket.objects.using(using)
+    open_tickets = tickets.exclude(status='D')
+    counters = []
+    for dimension, queryset, field in (('status', tickets, 'status'), ('priority', open_tickets, 'priority'),
+                                       ('reporter', open_tickets, 'reporter_id')):
+        for row in queryset.order_by().values(field).annotate(total=Count('pk')):
+            counters.append(TicketCounter(dimension=dimension, key=str(row[field]), count=row['total']))
+    TicketCounter.objects.using(using).bulk_create(counters)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('priority', 'Open tickets by priority'), ('status', 'Tickets by status'), ('reporter', 'Open tickets by reporter')], max_length=20)),
+                ('key', models.CharField(max_length=50)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='ticketcounter',
+            constraint=models.UniqueConstraint(fields=('dimension', 'key'), name='unique_ticket_counter'),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.6 on 2026-10-19 02:01
+
+from django.conf import settings
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+TRACKED_FIELDS = ('title', 'created', 'priority', 'description', 'status', 'reporter_id')
+
+
+def seed_history(apps, schema_editor):
+    # Give existing tickets a first history row holding their current values
+    Ticket = apps.get_model('application', 'Ticket')
+    TicketHistory = apps.get_model('application', 'TicketHistory')
+    using = schema_editor.connection.alias
+    entries = [
+        TicketHistory(ticket_id=values['id'], timestamp=values['created'], actor_id=values['reporter_id'],
+                      changes={**{field: values[field] for field in TRACKED_FIELDS},
+                               'created': values['created'].isoformat()})
+        for values in Ticket.objects.using(using).values('id', *TRACKED_FIELDS).iterator()
+    ]
+    TicketHistory.objects.using(using).bulk_create(entries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application', '0002_ticketcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now)),
+                ('changes', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('ticket', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='history', to='application.ticket')),
+            ],
+            options={
+                'verbose_name_plural': 'ticket history',
+                'ordering': ('timestamp', 'id'),
+                'indexes': [models.Index(fields=['ticket', 'timestamp'], name='ticket_history_timeline')],
+            },
+        ),
+        migrations.RunPython(seed_history, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.6 on 2026-10-19 02:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application', '0004_ticket_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='ticket',
+            name='reporter',
+            field=models.ForeignKey(blank=True, db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='ticket',
+            name='title',
+            field=models.CharField(help_text='Meaningful title of the ticket', max_length=100, verbose_name='ticket title'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['deleted_at'], name='ticket_deleted_at'),
+        ),
+        migrations.AddConstraint(
+            model_name='ticket',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted_at__isnull', True)), fields=('title',), name='unique_live_ticket_title', violation_error_message='Ticket with this Ticket title already exists.'),
+        ),
+    ]
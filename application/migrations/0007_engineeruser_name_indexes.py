@@ -0,0 +1,26 @@
+# Generated by Django 4.2.6 on 2026-10-19 02:36
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application', '0006_notification'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='engineeruser',
+            index=models.Index(django.db.models.functions.text.Lower('username'), name='engineer_username_lower'),
+        ),
+        migrations.AddIndex(
+            model_name='engineeruser',
+            index=models.Index(django.db.models.functions.text.Lower('first_name'), name='engineer_first_name_lower'),
+        ),
+        migrations.AddIndex(
+            model_name='engineeruser',
+            index=models.Index(django.db.models.functions.text.Lower('last_name'), name='engineer_last_name_lower'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+TRIGRAM_FIELDS = ('username', 'first_name', 'last_name')
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # Substring searches of engineers (see application.search); other databases only get the Lower() indexes
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for field in TRIGRAM_FIELDS:
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS engineer_{field}_trgm '
+                              f'ON application_engineeruser USING gin (lower({field}) gin_trgm_ops)')
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for field in TRIGRAM_FIELDS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS engineer_{field}_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application', '0007_engineeruser_name_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.6 on 2026-10-19 02:38
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_reporter_status_counters(apps, schema_editor):
+    # Count the live tickets that already exist (same rules as application.counters.compute_counters)
+    Ticket = apps.get_model('application', 'Ticket')
+    TicketCounter = apps.get_model('application', 'TicketCounter')
+    using = schema_editor.connection.alias
+    rows = (Ticket.objects.using(using).filter(deleted_at__isnull=True).order_by()
+            .values('reporter_id', 'status').annotate(total=Count('pk')))
+    TicketCounter.objects.using(using).bulk_create([
+        TicketCounter(dimension='reporter_status', key=f"{row['reporter_id']}:{row['status']}", count=row['total'])
+        for row in rows
+    ])
+
+
+def remove_reporter_status_counters(apps, schema_editor):
+    TicketCounter = apps.get_model('application', 'TicketCounter')
+    TicketCounter.objects.using(schema_editor.connection.alias).filter(dimension='reporter_status').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application', '0008_engineeruser_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ticketcounter',
+            name='dimension',
+            field=models.CharField(choices=[('priority', 'Open tickets by priority'), ('status', 'Tickets by status'), ('reporter', 'Open tickets by reporter'), ('reporter_status', 'Tickets by reporter and status')], max_length=20),
+        ),
+        migrations.RunPython(populate_reporter_status_counters, remove_reporter_status_counters),
+    ]
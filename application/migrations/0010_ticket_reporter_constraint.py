@@ -0,0 +1,38 @@
+# Generated by Django 4.2.6 on 2026-10-19 03:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def clear_missing_reporters(apps, schema_editor):
+    """
+    Clear the reporter of tickets whose engineer was deleted while the column had no foreign key constraint, so that
+    the constraint can be added.
+    """
+    Ticket = apps.get_model('application', 'Ticket')
+    EngineerUser = apps.get_model('application', 'EngineerUser')
+    using = schema_editor.connection.alias
+    Ticket.objects.using(using).exclude(reporter_id__in=EngineerUser.objects.using(using).values('pk')).update(
+        reporter_id=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application', '0009_ticketcounter_reporter_status'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ticket',
+            name='reporter',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(clear_missing_reporters, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='ticket',
+            name='reporter',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
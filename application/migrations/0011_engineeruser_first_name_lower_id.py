@@ -0,0 +1,22 @@
+# Generated by Django 4.2.6 on 2026-10-19 03:02
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application', '0010_ticket_reporter_constraint'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='engineeruser',
+            name='engineer_first_name_lower',
+        ),
+        migrations.AddIndex(
+            model_name='engineeruser',
+            index=models.Index(django.db.models.functions.text.Lower('first_name'), models.F('id'), name='engineer_first_name_lower_id'),
+        ),
+    ]
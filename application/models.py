@@ -11,7 +11,9 @@ References:
     Available at: https://code.visualstudio.com/docs/python/tutorial-django (Accessed: 13 April 2022).
 """
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, router, transaction
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
@@ -46,10 +48,34 @@ class EngineerUser(AbstractUser):
 
     REQUIRED_FIELDS = ["email", "first_name", "last_name"]
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Case-insensitive prefix searches of engineers (see application.search)
+            models.Index(models.functions.Lower('username'), name='engineer_username_lower'),
+            # Also gives the autocomplete its (lower(first_name), id) order without a sort
+            models.Index(models.functions.Lower('first_name'), models.F('id'), name='engineer_first_name_lower_id'),
+            models.Index(models.functions.Lower('last_name'), name='engineer_last_name_lower'),
+        ]
+
     def __str__(self):
         return self.get_full_name()
 
 
+class TicketEditConflict(Exception):
+    """
+    Raised when saving a ticket that was changed by someone else since it was loaded.
+    """
+
+
+class LiveTicketManager(models.Manager):
+    """
+    Manager returning only the tickets that have not been soft deleted.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Ticket(models.Model):
     """
     Model representing a ticket.
@@ -63,7 +89,14 @@ class Ticket(models.Model):
         priority (models.CharField): The priority of the ticket (default: Priority.LOW).
         description (models.TextField): The description of the ticket (max length: 1000 characters).
         status (models.CharField): The status of the ticket (default: Status.TD).
-        reporter (models.ForeignKey): The ForeignKey to the EngineerUser who reported the ticket.
+        reporter (models.ForeignKey): The ForeignKey to the EngineerUser who reported the ticket, None once that
+            engineer is deleted.
+        version (models.PositiveIntegerField): Incremented on every update, used to detect concurrent edits.
+        deleted_at (models.DateTimeField): When the ticket was soft deleted, or None for a live ticket.
+
+    Managers:
+        objects (LiveTicketManager): The default manager, which hides soft deleted tickets.
+        all_objects (models.Manager): A manager including soft deleted tickets.
     """
 
     class Priority(models.TextChoices):
@@ -82,7 +115,6 @@ class Ticket(models.Model):
             'Meaningful title of the ticket'
         ),
         max_length=100,
-        unique=True,
     )
     created = models.DateTimeField('date created')
     priority = models.CharField(
@@ -111,4 +143,210 @@ class Ticket(models.Model):
         ),
         max_length=50
     )
-    reporter = models.ForeignKey(EngineerUser, on_delete=models.CASCADE, blank=True)
+    # Deleting an engineer soft deletes their tickets (see application.signals) instead of cascading, and clears the
+    # reporter of all their tickets in one UPDATE, so the foreign key constraint holds
+    reporter = models.ForeignKey(EngineerUser, on_delete=models.SET_NULL, null=True, blank=True)
+    version = models.PositiveIntegerField(default=1)
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = LiveTicketManager()
+    all_objects = models.Manager()
+
+    # Fields whose changes are recorded in TicketHistory, and the subset counted in TicketCounter
+    TRACKED_FIELDS = ('title', 'created', 'priority', 'description', 'status', 'reporter_id', 'deleted_at')
+    COUNTED_FIELDS = ('priority', 'status', 'reporter_id', 'deleted_at')
+
+    class Meta:
+        constraints = [
+            # Titles only need to be unique among live tickets
+            models.UniqueConstraint(
+                fields=['title'],
+                condition=models.Q(deleted_at__isnull=True),
+                name='unique_live_ticket_title',
+                violation_error_message=_('Ticket with this Ticket title already exists.'),
+            ),
+        ]
+        indexes = [
+            # Small index of the soft deleted tickets waiting to be purged
+            models.Index(fields=['deleted_at'], condition=models.Q(deleted_at__isnull=False),
+                         name='ticket_deleted_at'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.track_loaded_values()
+        return instance
+
+    def track_loaded_values(self):
+        """
+        Remember the current values of the tracked fields and the version so that the next save knows what changed
+        and which version it replaces. Tickets with deferred fields are not tracked and have their values read from
+        the database when saved.
+        """
+        deferred = self.get_deferred_fields()
+        if 'version' in deferred or any(field in deferred for field in self.TRACKED_FIELDS):
+            self._loaded_values = None
+            self._loaded_version = None
+        else:
+            self._loaded_values = self.get_tracked_values()
+            self._loaded_version = self.version
+
+    def get_tracked_values(self):
+        return {field: getattr(self, field) for field in self.TRACKED_FIELDS}
+
+    def get_changed_fields(self):
+        """
+        Get the tracked fields changed since the ticket was loaded.
+
+        Returns:
+            list: The changed field attribute names, or None if the ticket is not tracked.
+        """
+        if getattr(self, '_loaded_values', None) is None:
+            return None
+        return [field for field, value in self.get_tracked_values().items() if self._loaded_values[field] != value]
+
+    def validate_constraints(self, exclude=None):
+        # Forms never include deleted_at, but the live title constraint cannot be checked without it
+        if exclude:
+            exclude = set(exclude) - {'deleted_at'}
+        super().validate_constraints(exclude)
+
+    def soft_delete(self):
+        """
+        Hide the ticket by setting deleted_at. The row is removed later by 'manage.py purge_deleted_tickets'.
+
+        Raises:
+            TicketEditConflict: If the ticket was changed by someone else since it was loaded.
+        """
+        self.deleted_at = timezone.now()
+        self.save()
+
+    def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
+        """
+        Save the ticket and update its counters and history in the same transaction.
+
+        Updates of a ticket loaded from the database only write the fields that changed (nothing at all if none did)
+        and only succeed if the stored version is still the one that was loaded.
+
+        Raises:
+            TicketEditConflict: If the ticket was changed by someone else since it was loaded.
+        """
+        if update_fields is None and not force_insert and not self._state.adding:
+            update_fields = self.get_changed_fields()
+        using = using or router.db_for_write(Ticket, instance=self)
+        with transaction.atomic(using=using):
+            super().save(force_insert=force_insert, force_update=force_update, using=using,
+                         update_fields=update_fields)
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        # UPDATE ... SET version = n + 1 WHERE id = pk AND version = n
+        expected_version = getattr(self, '_loaded_version', None)
+        if expected_version is None:
+            return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+        version_field = self._meta.get_field('version')
+        values = [value for value in values if value[0] is not version_field]
+        values.append((version_field, None, expected_version + 1))
+        updated = super()._do_update(base_qs.filter(version=expected_version), using, pk_val, values, update_fields,
+                                     forced_update)
+        if updated:
+            self.version = expected_version + 1
+        elif base_qs.filter(pk=pk_val).exists():
+            raise TicketEditConflict(f"Ticket {pk_val} was changed since version {expected_version} was loaded.")
+        return updated
+
+
+class TicketCounter(models.Model):
+    """
+    Model representing a precomputed ticket count, e.g. the number of open High priority tickets.
+
+    Counters are updated incrementally in the same transaction as every ticket save and delete (see
+    application.counters), so the dashboard reads a handful of rows instead of grouping the ticket table.
+    Bulk QuerySet.update() calls and raw fixture loads bypass them; 'manage.py reconcile_ticket_counters' rebuilds
+    them from the ticket table.
+
+    Attributes:
+        dimension (models.CharField): What is counted (see TicketCounter.Dimension).
+        key (models.CharField): The value counted within the dimension, e.g. 'H', a reporter ID or a reporter ID
+            and status ('12:IP').
+        count (models.IntegerField): The number of tickets.
+    """
+
+    class Dimension(models.TextChoices):
+        PRIORITY = 'priority', _('Open tickets by priority')
+        STATUS = 'status', _('Tickets by status')
+        REPORTER = 'reporter', _('Open tickets by reporter')
+        REPORTER_STATUS = 'reporter_status', _('Tickets by reporter and status')
+
+    dimension = models.CharField(max_length=20, choices=Dimension.choices)
+    key = models.CharField(max_length=50)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'key'], name='unique_ticket_counter'),
+        ]
+
+    def __str__(self):
+        return f"{self.dimension}={self.key}: {self.count}"
+
+
+class TicketHistory(models.Model):
+    """
+    Model representing one change to a ticket.
+
+    History is append-only: a row is written for every ticket save and never updated. The first row of a ticket holds
+    all of its tracked fields and every later row holds only the fields that changed, so a ticket's state at any
+    point is rebuilt by applying its rows in order (see application.history).
+
+    Attributes:
+        ticket (models.ForeignKey): The ForeignKey to the changed Ticket.
+        timestamp (models.DateTimeField): When the change was saved.
+        actor (models.ForeignKey): The ForeignKey to the EngineerUser who made the change, if known.
+        changes (models.JSONField): The new values of the changed fields, keyed by field attribute name.
+    """
+
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name='history', db_index=False)
+    timestamp = models.DateTimeField(default=timezone.now)
+    actor = models.ForeignKey(EngineerUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    changes = models.JSONField(encoder=DjangoJSONEncoder)
+
+    class Meta:
+        ordering = ('timestamp', 'id')
+        verbose_name_plural = 'ticket history'
+        indexes = [
+            models.Index(fields=['ticket', 'timestamp'], name='ticket_history_timeline'),
+        ]
+
+    def __str__(self):
+        return f"{self.ticket_id} at {self.timestamp}: {', '.join(self.changes)}"
+
+
+class Notification(models.Model):
+    """
+    Model representing a message for an engineer, e.g. that they are now on call.
+
+    Notifications are saved in the same transaction as the event and delivered later by a background task, which
+    sends every pending notification of a recipient as a single email (see application.notifications).
+
+    Attributes:
+        recipient (models.ForeignKey): The ForeignKey to the EngineerUser notified.
+        message (models.CharField): The notification text.
+        created (models.DateTimeField): When the event happened.
+        sent_at (models.DateTimeField): When the notification was emailed, or None while it is pending.
+    """
+
+    recipient = models.ForeignKey(EngineerUser, on_delete=models.CASCADE, related_name='notifications')
+    message = models.CharField(max_length=300)
+    created = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ('created', 'id')
+        indexes = [
+            models.Index(fields=['recipient', 'created'], name='notification_pending',
+                         condition=models.Q(sent_at__isnull=True)),
+        ]
+
+    def __str__(self):
+        return f"{self.recipient_id}: {self.message}"
@@ -0,0 +1,116 @@
+"""
+Engineer notifications.
+
+Events save Notification rows in the request's transaction and queue a delivery task for each recipient once it commits,
+so no email is sent during the request and none for a rolled back change. Delivery tasks are coalesced per recipient:
+every event in the same NOTIFICATION_BATCH_SECONDS window shares one task (through its idempotency key) that runs when
+the window ends and sends all of the recipient's pending notifications as a single email.
+"""
+import math
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.utils import timezone
+
+from application.models import EngineerUser, Notification
+
+
+def notify(recipients, message):
+    """
+    Save a notification for each recipient and schedule its delivery when the current transaction commits, so the
+    worker always finds the rows it is asked to send.
+
+    Parameters:
+        recipients (iterable): The EngineerUsers to notify.
+        message (str): The notification text.
+
+    Returns:
+        list: The saved Notification rows.
+    """
+    notifications = Notification.objects.bulk_create([
+        Notification(recipient=recipient, message=message) for recipient in recipients
+    ])
+    for recipient_id in {notification.recipient_id for notification in notifications}:
+        transaction.on_commit(partial(schedule_delivery, recipient_id))
+    return notifications
+
+
+def notify_on_call_changed(engineer, previous=()):
+    """
+    Tell an engineer they are now on call, and the engineers they replaced who is.
+
+    Parameters:
+        engineer (EngineerUser): The engineer now on call.
+        previous (iterable, optional): The engineers who were on call before.
+    """
+    notify([engineer], "You are now on call.")
+    notify([user for user in previous if user.pk != engineer.pk], f"{engineer} is now on call.")
+
+
+def notify_high_priority_ticket(ticket):
+    """
+    Alert the engineers on call to a new High priority ticket, unless they reported it.
+
+    Parameters:
+        ticket (Ticket): The new ticket.
+    """
+    on_call = EngineerUser.objects.filter(is_on_call=True).exclude(pk=ticket.reporter_id)
+    notify(on_call, f"High priority ticket created: [{ticket.title}].")
+
+
+def schedule_delivery(recipient_id):
+    """
+    Queue the delivery task of a recipient for the end of the current batch window. Events in the same window reuse the
+    queued task. With NOTIFICATION_BATCH_SECONDS = 0 every event is delivered on its own, straight away.
+
+    Parameters:
+        recipient_id (int): The primary key of the recipient.
+    """
+    from application.tasks import deliver_notifications
+
+    window = settings.NOTIFICATION_BATCH_SECONDS
+    if not window:
+        deliver_notifications.enqueue(recipient_id)
+        return
+    now = time.time()
+    window_end = math.floor(now / window) * window + window
+    deliver_notifications.enqueue(recipient_id, idempotency_key=f"notifications:{recipient_id}:{window_end}",
+                                  delay=window_end - now)
+
+
+def send_pending_notifications(recipient_id, connection=None):
+    """
+    Send every pending notification of a recipient as one email and mark them sent.
+
+    The pending rows stay locked until they are marked sent, and rows locked by another worker are skipped, so a
+    notification is never emailed twice when deliveries of the same recipient overlap.
+
+    Parameters:
+        recipient_id (int): The primary key of the recipient.
+        connection (optional): The email backend connection. Defaults to EMAIL_BACKEND.
+
+    Returns:
+        int: The number of notifications sent.
+    """
+    with transaction.atomic():
+        pending = list(Notification.objects.filter(recipient_id=recipient_id, sent_at=None).select_related(
+            'recipient').select_for_update(skip_locked=True, of=('self',)))
+        if not pending:
+            return 0
+        recipient = pending[0].recipient
+        if len(pending) == 1:
+            subject = pending[0].message
+        else:
+            subject = f"{len(pending)} new notifications"
+        body = "\n".join(
+            f"{timezone.localtime(notification.created):%Y-%m-%d %H:%M} {notification.message}"
+            for notification in pending
+        )
+        EmailMessage(f"{settings.EMAIL_SUBJECT_PREFIX}{subject}", body, to=[recipient.email],
+                     connection=connection).send()
+        Notification.objects.filter(pk__in=[notification.pk for notification in pending]).update(
+            sent_at=timezone.now())
+    return len(pending)
@@ -0,0 +1,117 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class TokenBucketLimiter:
+    """
+    Token bucket rate limiter backed by the Django cache.
+
+    Each key may make 'capacity' attempts at once (the burst), then 'refill_per_minute' attempts a minute. The bucket
+    is approximated by a sliding window of counters, since a cache has no atomic read-modify-write of a (tokens,
+    updated) pair: the window is the time the bucket takes to refill, each window has a counter that is only changed
+    with the cache's atomic incr() and decr(), and an attempt is allowed while the current counter plus the share of
+    the previous window's counter still inside the sliding window is at most 'capacity'. Concurrent attempts therefore
+    never take the same token.
+
+    Counters live in the cache, so all workers share them when the cache is shared (e.g. Redis). With a process-local
+    cache, such as the locmem fallback, each worker process counts on its own, so a client can make up to the limit
+    times the number of workers.
+
+    Attributes:
+        scope (str): Prefix used to keep buckets of different limiters apart.
+        capacity (int): The maximum number of tokens in a bucket (the allowed burst).
+        refill_per_minute (float): The number of tokens added back per minute.
+        window (float): The number of seconds a bucket takes to refill completely.
+    """
+
+    def __init__(self, scope, capacity, refill_per_minute, cache_alias='default'):
+        """
+        Constructor method for TokenBucketLimiter.
+
+        Parameters:
+            scope (str): Prefix used to keep buckets of different limiters apart.
+            capacity (int): The maximum number of tokens in a bucket.
+            refill_per_minute (float): The number of tokens added back per minute.
+            cache_alias (str, optional): The cache used to store buckets. Defaults to 'default'.
+        """
+        self.scope = scope
+        self.capacity = capacity
+        self.refill_per_minute = refill_per_minute
+        self.window = capacity * 60 / refill_per_minute
+        self.cache_alias = cache_alias
+
+    def get_cache_key(self, key, window_index):
+        return f"ratelimit:{self.scope}:{key}:{window_index}"
+
+    def allow(self, key, now=None):
+        """
+        Take a token from the bucket for 'key'.
+
+        Parameters:
+            key (str): The bucket to take a token from, e.g. a client IP or username.
+            now (float, optional): The current time in seconds. Defaults to time.time(), which all workers share.
+
+        Returns:
+            bool: True if a token was available, False if the attempt should be refused.
+        """
+        cache = caches[self.cache_alias]
+        now = time.time() if now is None else now
+        position = now / self.window
+        index = int(position)
+        cache_key = self.get_cache_key(key, index)
+
+        # The counter is kept while it is the current or the previous window
+        cache.add(cache_key, 0, int(self.window * 2) + 1)
+        count = cache.incr(cache_key)
+        previous = cache.get(self.get_cache_key(key, index - 1), 0)
+        if count + previous * (1 - (position - index)) <= self.capacity:
+            return True
+        # A refused attempt does not use a token
+        cache.decr(cache_key)
+        return False
+
+    def refund(self, key, now):
+        """
+        Give back a token taken by allow(), e.g. when another limiter refused the same attempt.
+
+        Parameters:
+            key (str): The bucket the token was taken from.
+            now (float): The time passed to allow().
+        """
+        caches[self.cache_alias].decr(self.get_cache_key(key, int(now / self.window)))
+
+    def reset(self, key, now=None):
+        index = int((time.time() if now is None else now) / self.window)
+        caches[self.cache_alias].delete_many([self.get_cache_key(key, index), self.get_cache_key(key, index - 1)])
+
+
+def get_login_limiters():
+    """
+    Build the login rate limiters from the LOGIN_RATE_LIMITS setting.
+
+    Returns:
+        dict: A TokenBucketLimiter for each scope ('ip', 'username') configured in settings.
+    """
+    return {
+        scope: TokenBucketLimiter(f"login:{scope}", config["capacity"], config["refill_per_minute"])
+        for scope, config in settings.LOGIN_RATE_LIMITS.items()
+    }
+
+
+def get_client_ip(request):
+    """
+    Get the client IP address used to rate limit a request.
+
+    The address is read from the LOGIN_RATE_LIMIT_IP_HEADER setting. For headers holding a list of addresses, such
+    as X-Forwarded-For, the last entry is used because it is the one added by the trusted proxy.
+
+    Parameters:
+        request: The HTTP request object.
+
+    Returns:
+        str: The client IP address, or an empty string if unknown.
+    """
+    value = request.META.get(settings.LOGIN_RATE_LIMIT_IP_HEADER, "")
+    return value.split(",")[-1].strip()
@@ -0,0 +1,64 @@
+"""
+Engineer search.
+
+Engineers are searched by their username, first name or last name, ignoring case, on indexes of the lowercased
+columns:
+
+- prefix searches (the autocomplete) match each word of a search term as a range of the lowercased column
+  ('jo' <= lower(first_name) < 'jp'), which the Lower() indexes of EngineerUser serve on every database, and then
+  check it with LIKE, so the range only narrows the rows read;
+- substring searches (the admin site) use lower(column) LIKE '%jo%' on PostgreSQL, served by the pg_trgm trigram
+  indexes of migration 0008. Other databases have no index for those, so they fall back to prefix searches.
+"""
+from django.db import connections
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from application.models import EngineerUser
+
+ENGINEER_SEARCH_FIELDS = ('username', 'first_name', 'last_name')
+
+
+def prefix_range(prefix):
+    """
+    Get the range of strings starting with a prefix.
+
+    Parameters:
+        prefix (str): A non-empty prefix.
+
+    Returns:
+        tuple: The inclusive start and exclusive end of the range.
+    """
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def word_condition(field, word, contains):
+    if contains:
+        return Q(**{f'{field}_lower__contains': word})
+    start, end = prefix_range(word)
+    return Q(**{f'{field}_lower__gte': start, f'{field}_lower__lt': end, f'{field}_lower__startswith': word})
+
+
+def search_engineers(term, queryset=None, contains=False):
+    """
+    Filter engineers to those with a username, first name or last name matching each word of a search term.
+
+    Parameters:
+        term (str): The search term, e.g. 'jo sm'.
+        queryset (QuerySet, optional): The engineers searched. Defaults to all engineers.
+        contains (bool, optional): Whether the words may match anywhere in the names rather than at their start.
+            Only used on PostgreSQL, where the trigram indexes serve it. Defaults to False.
+
+    Returns:
+        QuerySet: The matching engineers.
+    """
+    if queryset is None:
+        queryset = EngineerUser.objects.all()
+    contains = contains and connections[queryset.db].vendor == 'postgresql'
+    queryset = queryset.alias(**{f'{field}_lower': Lower(field) for field in ENGINEER_SEARCH_FIELDS})
+    for word in term.lower().split():
+        condition = Q()
+        for field in ENGINEER_SEARCH_FIELDS:
+            condition |= word_condition(field, word, contains)
+        queryset = queryset.filter(condition)
+    return queryset
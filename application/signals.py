@@ -0,0 +1,64 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from application.counters import remove_from_counters, update_counters
+from application.history import record_history
+from application.models import EngineerUser, Ticket
+from application.notifications import notify_high_priority_ticket
+
+
+@receiver(pre_save, sender=Ticket)
+def load_tracked_values(sender, instance, raw, using, **kwargs):
+    """
+    Read the stored values of a ticket that was not loaded from the database, e.g. one built from a form with a
+    primary key, so that its changes can be found when it is saved.
+    """
+    if raw or instance._state.adding or getattr(instance, '_loaded_values', None) is not None:
+        return
+    stored = (
+        Ticket.all_objects.using(using).filter(pk=instance.pk).values('version', *Ticket.TRACKED_FIELDS).first()
+    )
+    if stored is not None:
+        instance._loaded_version = stored.pop('version')
+    instance._loaded_values = stored
+
+
+@receiver(post_save, sender=Ticket)
+def record_ticket_change(sender, instance, created, raw, using, **kwargs):
+    """
+    Move a saved ticket between counters, record its changes in its history and alert the engineers on call to new
+    High priority tickets. Raw saves (loaddata) are left to reconcile_ticket_counters.
+    """
+    if raw:
+        return
+    old_values = None if created else instance._loaded_values
+    new_values = instance.get_tracked_values()
+    update_counters(old_values, new_values, using=using)
+    record_history(instance, old_values, new_values, using=using)
+    instance.track_loaded_values()
+    if created and instance.priority == Ticket.Priority.HIGH:
+        notify_high_priority_ticket(instance)
+
+
+@receiver(post_delete, sender=Ticket)
+def update_counters_on_delete(sender, instance, using, **kwargs):
+    """
+    Remove a deleted ticket from its counters.
+    """
+    old_values = getattr(instance, '_loaded_values', None) or instance.get_tracked_values()
+    update_counters(old_values, None, using=using)
+
+
+@receiver(pre_delete, sender=EngineerUser)
+def soft_delete_reported_tickets(sender, instance, using, **kwargs):
+    """
+    Soft delete an engineer's tickets with a single UPDATE instead of cascading the delete, so that deleting an
+    engineer with many tickets does not block the request. The rows are removed later by purge_deleted_tickets.
+    The delete then sets their reporter to NULL (on_delete=SET_NULL), another single UPDATE. The bulk updates are not
+    recorded in the ticket history.
+    """
+    tickets = Ticket.objects.using(using).filter(reporter=instance)
+    remove_from_counters(tickets, using=using)
+    tickets.update(deleted_at=timezone.now(), version=F('version') + 1)
@@ -0,0 +1,13 @@
+from application.notifications import send_pending_notifications
+from tasks.queue import task
+
+
+@task
+def deliver_notifications(recipient_id):
+    """
+    Email a recipient's pending notifications.
+
+    Parameters:
+        recipient_id (int): The primary key of the recipient.
+    """
+    send_pending_notifications(recipient_id)
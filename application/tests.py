@@ -16,22 +16,50 @@ References:
     Moppag (2017) [online] python - How can I unit test django messages?, Stack Overflow.
     Available at: https://stackoverflow.com/a/46865530 (Accessed: 21 April 2022).
 """
+import json
 import logging
-
+import os
+import re
+import threading
+from contextlib import contextmanager
+from importlib import import_module
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
 from django.contrib.admin import AdminSite
+from django.contrib.auth import authenticate
 from django.contrib.auth import get_user_model
 from django.contrib.auth.hashers import check_password
 from django.contrib.messages import get_messages
-from django.test import TestCase, RequestFactory
+from django.core import mail
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.core.signals import request_started
+from django.db import connection, reset_queries, transaction
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import TestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from pytz import UTC
 
 from application import views, forms
 from application.admin import TicketAdmin
+from application.counters import compute_counters, get_dashboard_counts, get_reporter_status_counts
+from application.history import rebuild_ticket
+from application.management.commands.profile_startup import aggregate_by_package, parse_importtime
 from application.forms import EngineerUserCreationForm, OnCallChangeForm, TicketCreationForm, TicketChangeForm
-from application.models import EngineerUser, Ticket
+from application.message_storage import CacheMessageStorage
+from application.models import EngineerUser, Notification, Ticket, TicketCounter, TicketEditConflict, TicketHistory
+from application.notifications import notify, send_pending_notifications
+from application.ratelimit import TokenBucketLimiter, get_client_ip
+from application.search import prefix_range, search_engineers
+from application.ticket_rows import get_ticket_rows
 from logger.models import CustomStatusLog
+from tasks.models import Task
 
 # Test values for Register form fields
 FIRST_NAME = "John"
@@ -54,6 +82,20 @@ XSS_INPUT = '<script>alert("XSS attack");</script>'
 SQL_INPUT = "'; DROP TABLE EngineerUser; --"
 
 
+@contextmanager
+def capture_request_queries():
+    """
+    Capture the queries run on the default database, including those of test client requests (every request
+    normally clears the query log when it starts).
+    """
+    request_started.disconnect(reset_queries)
+    try:
+        with CaptureQueriesContext(connection) as context:
+            yield context
+    finally:
+        request_started.connect(reset_queries)
+
+
 class CustomTestCase(TestCase):
     @classmethod
     def setUpTestData(cls):
@@ -72,6 +114,13 @@ class CustomTestCase(TestCase):
                                               last_name="User",
                                               is_on_call=True)
 
+    def setUp(self):
+        # Rate limiter buckets, sessions and messages live in the caches, so start each test with empty caches
+        # Only process local caches are cleared, as shared ones are in use by other test processes
+        for test_cache in caches.all():
+            if isinstance(test_cache, LocMemCache):
+                test_cache.clear()
+
 
 class EngineerUserTestCase(CustomTestCase):
     def test_engineer_user(self):
@@ -275,6 +324,18 @@ class EngineerUserCreationFormTestCase(CustomTestCase):
 
 
 class EngineerUserAdminTestCase(CustomTestCase):
+    def test_search(self):
+        self.client.login(username='admin', password=PASSWORD)
+        changelist_url = reverse('admin:application_engineeruser_changelist')
+
+        response = self.client.get(changelist_url, {'q': 'SMI'})
+        self.assertEqual(list(response.context['cl'].result_list), [EngineerUser.objects.get(username=USERNAME)])
+        response = self.client.get(changelist_url, {'q': EMAIL})
+        self.assertEqual(list(response.context['cl'].result_list), [EngineerUser.objects.get(username=USERNAME)])
+        # Substring searches need the PostgreSQL trigram indexes
+        response = self.client.get(changelist_url, {'q': 'mith'})
+        self.assertEqual(list(response.context['cl'].result_list), [])
+
     def test_save_model(self):
         user = EngineerUser.objects.get(pk=1)
         admin_user = EngineerUser.objects.get(pk=2)
@@ -580,7 +641,8 @@ class TicketChangeFormTestCase(CustomTestCase):
                                        reporter=user)
         form = TicketChangeForm(instance=ticket, data={"priority": PRIORITY,
                                                        "description": "New Description",
-                                                       "status": STATUS})
+                                                       "status": STATUS,
+                                                       "version": ticket.version})
 
         self.assertTrue(form.is_valid())
 
@@ -655,6 +717,48 @@ class TicketAdminTestCase(CustomTestCase):
         form = ticket_admin.get_form(request, obj=ticket)
         self.assertTrue(issubclass(form, TicketChangeForm))
 
+    def test_search(self):
+        user = EngineerUser.objects.get(username=USERNAME)
+        admin_user = EngineerUser.objects.get(username="admin")
+        Ticket.objects.create(title="Printer jam", created=TIME, priority=PRIORITY, description=DESCRIPTION,
+                              status=STATUS, reporter=user)
+        Ticket.objects.create(title="Broken screen", created=TIME, priority=PRIORITY, description=DESCRIPTION,
+                              status=STATUS, reporter=admin_user)
+        Ticket.objects.create(title="Printer toner", created=TIME, priority=PRIORITY, description=DESCRIPTION,
+                              status=STATUS, reporter=admin_user)
+        self.client.login(username="admin", password=PASSWORD)
+
+        # Each word matches the title or the reporter
+        for term, titles in (("jam", ["Printer jam"]), ("john smith", ["Printer jam"]),
+                             ("ADM", ["Printer toner", "Broken screen"]), ("printer admin", ["Printer toner"]),
+                             ("john printer", ["Printer jam"]), ('"printer jam"', ["Printer jam"]),
+                             ("screen john", [])):
+            response = self.client.get("/admin/application/ticket/", {"q": term})
+            self.assertEqual([ticket.title for ticket in response.context["cl"].result_list], titles)
+
+    def test_reporter_filter(self):
+        user = EngineerUser.objects.get(username=USERNAME)
+        admin_user = EngineerUser.objects.get(username="admin")
+        Ticket.objects.create(title="Reported by user", created=TIME, priority=PRIORITY, description=DESCRIPTION,
+                              status=STATUS, reporter=user)
+        Ticket.objects.create(title="Reported by admin", created=TIME, priority=PRIORITY, description=DESCRIPTION,
+                              status=STATUS, reporter=admin_user)
+        self.client.login(username="admin", password=PASSWORD)
+
+        response = self.client.get("/admin/application/ticket/", {"reporter": user.pk, "status__exact": STATUS})
+        self.assertContains(response, "Reported by user")
+        self.assertNotContains(response, "Reported by admin")
+        self.assertContains(response, f'<option value="{user.pk}" selected>John Smith</option>', html=True)
+        self.assertContains(response, f'<input type="hidden" name="status__exact" value="{STATUS}">', html=True)
+        self.assertContains(response, "admin/js/vendor/select2/select2.full.min.js")
+
+        response = self.client.get("/admin/application/ticket/")
+        self.assertContains(response, "Reported by admin")
+        self.assertNotContains(response, "<option value=\"%s\"" % admin_user.pk)
+
+        response = self.client.get("/admin/application/ticket/", {"reporter": "x"})
+        self.assertRedirects(response, "/admin/application/ticket/?e=1", fetch_redirect_response=False)
+
     def test_save_model(self):
         admin_user = EngineerUser.objects.get(pk=2)
         self.client.login(username='admin', password=PASSWORD)
@@ -691,6 +795,111 @@ class OnCallChangeFormTestCase(CustomTestCase):
 
         self.assertTrue(form.is_valid())
 
+    def test_widget_renders_selected_engineer_only(self):
+        EngineerUser.objects.create_user(username="other", email="other@qa.com", password=PASSWORD,
+                                         first_name="Other", last_name="Engineer")
+        form = OnCallChangeForm(data={"engineer": 1})
+
+        html = str(form["engineer"])
+        self.assertIn('data-autocomplete-url="/engineers/autocomplete/"', html)
+        self.assertIn('<option value="1" selected>John Smith</option>', html)
+        self.assertNotIn("Other Engineer", html)
+        self.assertNotIn("Admin User", html)
+
+
+class SearchEngineersTestCase(CustomTestCase):
+    def test_prefix_range(self):
+        self.assertEqual(prefix_range("jo"), ("jo", "jp"))
+        self.assertEqual(prefix_range("z"), ("z", "{"))
+
+    def test_search_engineers(self):
+        user = EngineerUser.objects.get(username=USERNAME)
+
+        self.assertEqual(list(search_engineers("JOHN sm")), [user])
+        self.assertEqual(list(search_engineers("john admin")), [])
+        self.assertEqual(list(search_engineers("mith", contains=True)), [])
+        self.assertEqual(search_engineers("").count(), 2)
+
+    def test_contains_on_postgresql(self):
+        user = EngineerUser.objects.get(username=USERNAME)
+
+        with mock.patch.object(connection, "vendor", "postgresql"):
+            engineers = search_engineers("mith", contains=True)
+        self.assertIn('LIKE %mith%', str(engineers.query))
+        self.assertEqual(list(engineers), [user])
+
+
+class EngineerAutocompleteTestCase(CustomTestCase):
+    def get_results(self, **params):
+        response = self.client.get(reverse("engineer_autocomplete"), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_login_required(self):
+        response = self.client.get(reverse("engineer_autocomplete"))
+        self.assertEqual(response.status_code, 302)
+
+    def test_prefix_search(self):
+        self.client.login(username=USERNAME, password=PASSWORD)
+        user = EngineerUser.objects.get(username=USERNAME)
+
+        for term in ("jo", "SMI", "john sm"):
+            self.assertEqual(self.get_results(term=term),
+                             {"results": [{"id": user.pk, "text": "John Smith"}], "pagination": {"more": False}})
+        self.assertEqual(self.get_results(term="ohn")["results"], [])
+        # 'user' is John Smith's username and Admin User's last name
+        self.assertEqual(self.get_results(term="user")["results"],
+                         [{"id": 2, "text": "Admin User"}, {"id": user.pk, "text": "John Smith"}])
+        self.assertEqual(len(self.get_results()["results"]), 2)
+
+    def test_pagination(self):
+        self.client.login(username=USERNAME, password=PASSWORD)
+        EngineerUser.objects.bulk_create([
+            EngineerUser(username=f"engineer{i}", email=f"engineer{i}@qa.com", first_name="Eng", last_name=f"{i:02}")
+            for i in range(25)
+        ])
+
+        first_page = self.get_results(term="eng")
+        self.assertEqual(len(first_page["results"]), views.AUTOCOMPLETE_PAGE_SIZE)
+        self.assertTrue(first_page["pagination"]["more"])
+        self.assertEqual(first_page["results"][0]["text"], "Eng 00")
+        second_page = self.get_results(term="eng", page=2)
+        self.assertEqual([result["text"] for result in second_page["results"]],
+                         [f"Eng {i:02}" for i in range(20, 25)])
+        self.assertFalse(second_page["pagination"]["more"])
+        self.assertEqual(self.get_results(term="eng", page="x"), first_page)
+
+    def test_page_past_maximum_is_empty(self):
+        self.client.login(username=USERNAME, password=PASSWORD)
+
+        with self.assertNumQueries(2):
+            results = self.get_results(page="99999999999999999999")
+
+        self.assertEqual(results, {"results": [], "pagination": {"more": False}})
+
+    def test_page_read_in_index_order(self):
+        self.client.login(username=USERNAME, password=PASSWORD)
+        with capture_request_queries() as context:
+            self.get_results()
+        query = next(query["sql"] for query in context.captured_queries if "ORDER BY" in query["sql"])
+        self.assertIn('ORDER BY LOWER("application_engineeruser"."first_name") ASC, '
+                      '"application_engineeruser"."id" ASC', query)
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {query}")
+            plan = " ".join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn("engineer_first_name_lower_id", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_set_on_call_page_does_not_list_engineers(self):
+        self.client.login(username=USERNAME, password=PASSWORD)
+        EngineerUser.objects.create_user(username="other", email="other@qa.com", password=PASSWORD,
+                                         first_name="Other", last_name="Engineer")
+
+        response = self.client.get(reverse("set_on_call"))
+        self.assertContains(response, 'class="engineer-autocomplete"')
+        self.assertContains(response, "application/engineer_autocomplete.js")
+        self.assertNotContains(response, "Other Engineer")
+
 
 class ViewsTestCase(CustomTestCase):
     def test_home_view(self):
@@ -889,7 +1098,7 @@ class ViewsTestCase(CustomTestCase):
             "priority": Ticket.Priority.MED,
             "description": "Edited Description",
             "status": Ticket.Status.IP,
-
+            "version": ticket.version,
         })
         self.assertEqual(response.status_code, 302)
         expected_message = "Ticket updated: [Test Title]."
@@ -944,7 +1153,7 @@ class ViewsTestCase(CustomTestCase):
             "priority": Ticket.Priority.MED,
             "description": XSS_INPUT,
             "status": Ticket.Status.IP,
-
+            "version": ticket.version,
         })
         self.assertEqual(response.status_code, 200)
         messages = [m.message for m in get_messages(response.wsgi_request)]
@@ -978,7 +1187,7 @@ class ViewsTestCase(CustomTestCase):
             "priority": Ticket.Priority.MED,
             "description": SQL_INPUT,
             "status": Ticket.Status.IP,
-
+            "version": ticket.version,
         })
         self.assertEqual(response.status_code, 200)
         messages = [m.message for m in get_messages(response.wsgi_request)]
@@ -1030,3 +1239,768 @@ class ViewsTestCase(CustomTestCase):
         })
 
         return response
+
+
+class LoginPipelineTestCase(CustomTestCase):
+    def test_login_authenticates_once(self):
+        with mock.patch("django.contrib.auth.forms.authenticate", wraps=authenticate) as mock_authenticate:
+            response = self.client.post(reverse("login"), data={"username": USERNAME, "password": PASSWORD})
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(mock_authenticate.call_count, 1)
+
+    @override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.ScryptPasswordHasher",
+                                         "django.contrib.auth.hashers.MD5PasswordHasher"])
+    def test_login_rehashes_password_with_preferred_hasher(self):
+        self.assertTrue(EngineerUser.objects.get(username=USERNAME).password.startswith("md5$"))
+
+        response = self.client.post(reverse("login"), data={"username": USERNAME, "password": PASSWORD})
+
+        self.assertEqual(response.status_code, 302)
+        user = EngineerUser.objects.get(username=USERNAME)
+        self.assertTrue(user.password.startswith("scrypt$"))
+        self.assertTrue(check_password(PASSWORD, user.password))
+
+    @override_settings(LOGIN_RATE_LIMITS={"ip": {"capacity": 100, "refill_per_minute": 1},
+                                          "username": {"capacity": 2, "refill_per_minute": 1}})
+    def test_login_rate_limited_per_username(self):
+        for _ in range(2):
+            response = self.client.post(reverse("login"), data={"username": USERNAME, "password": "wrong"})
+            self.assertEqual(response.status_code, 200)
+
+        with mock.patch("django.contrib.auth.forms.authenticate", wraps=authenticate) as mock_authenticate:
+            response = self.client.post(reverse("login"), data={"username": USERNAME, "password": PASSWORD})
+
+        self.assertEqual(response.status_code, 429)
+        mock_authenticate.assert_not_called()
+        messages = [m.message for m in get_messages(response.wsgi_request)]
+        self.assertIn(views.LOGIN_RATE_LIMITED, messages)
+
+        log_entry = CustomStatusLog.objects.get(msg=views.LOGIN_RATE_LIMITED)
+        self.assertEqual(log_entry.level, logging.WARNING)
+        self.assertEqual(log_entry.username, USERNAME)
+
+        # Other usernames are not affected
+        response = self.client.post(reverse("login"), data={"username": "admin", "password": PASSWORD})
+        self.assertEqual(response.status_code, 302)
+
+    @override_settings(LOGIN_RATE_LIMITS={"ip": {"capacity": 1, "refill_per_minute": 1},
+                                          "username": {"capacity": 100, "refill_per_minute": 1}})
+    def test_login_rate_limited_per_ip(self):
+        response = self.client.post(reverse("login"), data={"username": "admin", "password": "wrong"})
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.post(reverse("login"), data={"username": USERNAME, "password": PASSWORD})
+        self.assertEqual(response.status_code, 429)
+
+        response = self.client.post(reverse("login"), data={"username": USERNAME, "password": PASSWORD},
+                                    REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(response.status_code, 302)
+
+    @override_settings(LOGIN_RATE_LIMITS={"ip": {"capacity": 3, "refill_per_minute": 1},
+                                          "username": {"capacity": 1, "refill_per_minute": 1}})
+    def test_login_refused_by_username_takes_no_ip_token(self):
+        response = self.client.post(reverse("login"), data={"username": "admin", "password": "wrong"})
+        self.assertEqual(response.status_code, 200)
+        for _ in range(5):
+            response = self.client.post(reverse("login"), data={"username": "admin", "password": "wrong"})
+            self.assertEqual(response.status_code, 429)
+
+        # The IP bucket still has the tokens the refused attempts did not use
+        response = self.client.post(reverse("login"), data={"username": USERNAME, "password": PASSWORD})
+        self.assertEqual(response.status_code, 302)
+
+    def test_token_bucket_refills(self):
+        limiter = TokenBucketLimiter("test", capacity=2, refill_per_minute=60)
+
+        self.assertTrue(limiter.allow("key", now=0))
+        self.assertTrue(limiter.allow("key", now=0))
+        self.assertFalse(limiter.allow("key", now=0.5))
+        # A quarter into the next 2 second window, 3/4 of the previous window's 2 attempts still count
+        self.assertFalse(limiter.allow("key", now=2.5))
+        self.assertTrue(limiter.allow("key", now=3))
+        self.assertFalse(limiter.allow("key", now=3))
+
+        limiter.reset("key", now=3)
+        self.assertTrue(limiter.allow("key", now=3))
+
+    def test_token_bucket_concurrent_attempts(self):
+        limiter = TokenBucketLimiter("test", capacity=10, refill_per_minute=1)
+        allowed = []
+
+        def attempt():
+            for _ in range(20):
+                allowed.append(limiter.allow("key", now=0))
+
+        threads = [threading.Thread(target=attempt) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(allowed.count(True), 10)
+
+    @override_settings(LOGIN_RATE_LIMIT_IP_HEADER="HTTP_X_FORWARDED_FOR")
+    def test_get_client_ip_from_forwarded_header(self):
+        request = RequestFactory().get("/login/", HTTP_X_FORWARDED_FOR="1.1.1.1, 2.2.2.2")
+
+        self.assertEqual(get_client_ip(request), "2.2.2.2")
+
+
+class SessionTestCase(CustomTestCase):
+    def test_session_engine(self):
+        backend = "cached_db" if "REDIS_URL" in os.environ else "db"
+        self.assertEqual(settings.SESSION_ENGINE, f"django.contrib.sessions.backends.{backend}")
+        self.assertFalse(settings.SESSION_SAVE_EVERY_REQUEST)
+
+    def test_flushed_session_not_served_by_another_worker(self):
+        engine = import_module(settings.SESSION_ENGINE)
+
+        def worker_store(worker, session_key=None):
+            store = engine.SessionStore(session_key)
+            if hasattr(store, "_cache") and isinstance(caches["sessions"], LocMemCache):
+                # A local memory cache is not shared between worker processes
+                store._cache = LocMemCache(f"sessions-worker-{worker}", {})
+            return store
+
+        session = worker_store(1)
+        session["user"] = USERNAME
+        session.save()
+        self.assertEqual(worker_store(2, session.session_key)["user"], USERNAME)
+
+        # Logging out on the first worker
+        session.flush()
+        self.assertNotIn("user", worker_store(2, session.session_key))
+
+    # The cached session stores are only used with the shared Redis cache, which the local memory cache stands in for
+    @override_settings(SESSION_ENGINE="django.contrib.sessions.backends.cached_db")
+    def test_browsing_does_not_touch_session_table(self):
+        self.client.post(reverse("login"), data={"username": USERNAME, "password": PASSWORD})
+        self.client.get(reverse("tickets"))
+
+        with capture_request_queries() as context:
+            response = self.client.get(reverse("tickets"))
+            self.client.get(reverse("user_tickets"))
+
+        self.assertEqual(response.status_code, 200)
+        session_queries = [query["sql"] for query in context.captured_queries if "django_session" in query["sql"]]
+        self.assertEqual(session_queries, [])
+
+        # The session is not modified, so it is not saved and no cookie is sent back
+        self.assertNotIn("sessionid", response.cookies)
+
+    @override_settings(SESSION_ENGINE="django.contrib.sessions.backends.cached_db")
+    def test_session_loaded_from_database_on_cache_miss(self):
+        self.client.post(reverse("login"), data={"username": USERNAME, "password": PASSWORD})
+        caches["sessions"].clear()
+
+        response = self.client.get(reverse("tickets"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.wsgi_request.user.username, USERNAME)
+
+
+class CacheMessageStorageTestCase(CustomTestCase):
+    def test_message_stored_in_cache_until_displayed(self):
+        self.client.post(reverse("login"), data={"username": USERNAME, "password": PASSWORD})
+        self.client.get(reverse("tickets"))
+        session_cookie = self.client.cookies["sessionid"].value
+
+        response = self.client.post(reverse("ticket_form"), data={
+            "title": TITLE,
+            "priority": PRIORITY,
+            "description": DESCRIPTION,
+            "status": STATUS
+        })
+        self.assertEqual(response.status_code, 302)
+
+        # Only the message key is sent to the browser and the session is not saved
+        key = response.cookies[CacheMessageStorage.cookie_name].value
+        self.assertNotIn("sessionid", response.cookies)
+        self.assertEqual(self.client.cookies["sessionid"].value, session_cookie)
+        self.assertIn("Ticket created: [Test Title].", caches["messages"].get(f"messages:{key}"))
+
+        response = self.client.get(reverse("tickets"))
+        self.assertContains(response, "Ticket created: [Test Title].")
+        self.assertEqual(response.cookies[CacheMessageStorage.cookie_name].value, "")
+        self.assertIsNone(caches["messages"].get(f"messages:{key}"))
+
+        response = self.client.get(reverse("tickets"))
+        self.assertNotContains(response, "Ticket created: [Test Title].")
+
+    def test_cookie_deleted_when_cache_entry_expired(self):
+        request = RequestFactory().get("/")
+        request.COOKIES[CacheMessageStorage.cookie_name] = "expired"
+        storage = CacheMessageStorage(request)
+        response = HttpResponse()
+
+        # Checked without being iterated, so the storage is not marked as used
+        self.assertEqual(len(storage), 0)
+        storage.update(response)
+        self.assertEqual(response.cookies[CacheMessageStorage.cookie_name].value, "")
+
+    def test_no_message_no_cookie(self):
+        response = self.client.get(reverse("home"))
+
+        self.assertNotIn(CacheMessageStorage.cookie_name, response.cookies)
+        self.assertNotIn("sessionid", response.cookies)
+
+    def test_messages_batched_in_one_entry(self):
+        request = RequestFactory().get("/")
+        storage = CacheMessageStorage(request)
+        storage.add(logging.INFO, "first")
+        storage.add(logging.ERROR, "second")
+        response = HttpResponse()
+
+        with mock.patch.object(storage.cache, "set", wraps=storage.cache.set) as mock_set:
+            storage.update(response)
+
+        self.assertEqual(mock_set.call_count, 1)
+        request.COOKIES[CacheMessageStorage.cookie_name] = response.cookies[CacheMessageStorage.cookie_name].value
+        self.assertEqual([m.message for m in CacheMessageStorage(request)], ["first", "second"])
+
+
+
+class TicketCounterTestCase(CustomTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = EngineerUser.objects.get(username=USERNAME)
+
+    def create_ticket(self, title=TITLE, priority=PRIORITY, status=STATUS):
+        return Ticket.objects.create(title=title, created=TIME, priority=priority, description=DESCRIPTION,
+                                     status=status, reporter=self.user)
+
+    def assert_counters_match_tickets(self):
+        stored = {(dimension, key): count
+                  for dimension, key, count in TicketCounter.objects.values_list("dimension", "key", "count")
+                  if count}
+        self.assertEqual(stored, compute_counters())
+
+    def test_counters_follow_create_edit_and_delete(self):
+        ticket = self.create_ticket()
+        self.create_ticket(title="Second", priority=Ticket.Priority.HIGH)
+        counts = get_dashboard_counts()
+        self.assertEqual(counts["priority"], {"L": 1, "H": 1})
+        self.assertEqual(counts["status"], {"TD": 2})
+        self.assertEqual(counts["reporter"], {str(self.user.pk): 2})
+
+        ticket.priority = Ticket.Priority.HIGH
+        ticket.status = Ticket.Status.D
+        ticket.save()
+        counts = get_dashboard_counts()
+        self.assertEqual(counts["priority"], {"L": 0, "H": 1})
+        self.assertEqual(counts["status"], {"TD": 1, "D": 1})
+        self.assertEqual(counts["reporter"], {str(self.user.pk): 1})
+
+        Ticket.objects.get(title="Second").delete()
+        ticket.delete()
+        self.assertEqual(get_dashboard_counts()["status"], {"TD": 0, "D": 0})
+        self.assert_counters_match_tickets()
+
+    def test_counters_updated_through_views(self):
+        self.client.post(reverse("login"), data={"username": USERNAME, "password": PASSWORD})
+        self.client.post(reverse("ticket_form"), data={
+            "title": TITLE,
+            "priority": PRIORITY,
+            "description": DESCRIPTION,
+            "status": STATUS
+        })
+        ticket = Ticket.objects.get(title=TITLE)
+        self.client.post(reverse("edit_ticket", kwargs={"pk": ticket.pk}), data={
+            "title": TITLE,
+            "priority": Ticket.Priority.MED,
+            "description": DESCRIPTION,
+            "status": Ticket.Status.IP,
+            "version": ticket.version,
+        })
+
+        self.assertEqual(get_dashboard_counts()["priority"], {"L": 0, "M": 1})
+        self.assert_counters_match_tickets()
+
+    def test_counters_rolled_back_with_ticket(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.create_ticket()
+            raise RuntimeError
+
+        self.assertFalse(TicketCounter.objects.filter(count__gt=0).exists())
+
+    def test_reconcile_fixes_drift(self):
+        self.create_ticket()
+        self.create_ticket(title="Second")
+        # Bulk updates bypass the counters
+        Ticket.objects.update(status=Ticket.Status.IP)
+
+        call_command("reconcile_ticket_counters", stdout=mock.MagicMock())
+        self.assertEqual(get_dashboard_counts()["status"], {"TD": 0, "IP": 2})
+        self.assertEqual(get_reporter_status_counts(self.user.pk), [("To do", 0), ("In progress", 2), ("Done", 0)])
+        self.assert_counters_match_tickets()
+
+    def updated_counters(self, ticket, status):
+        ticket.status = status
+        with CaptureQueriesContext(connection) as context:
+            ticket.save()
+        return [match.groups() for query in context.captured_queries for match in re.finditer(
+            r'UPDATE "application_ticketcounter" .*"dimension" = \'(\w+)\' AND .*"key" = \'([^\']+)\'', query["sql"])]
+
+    def test_counters_locked_in_the_same_order_for_opposite_changes(self):
+        to_do = self.create_ticket()
+        in_progress = self.create_ticket(title="Second", status=Ticket.Status.IP)
+
+        started = self.updated_counters(to_do, Ticket.Status.IP)
+        stopped = self.updated_counters(in_progress, Ticket.Status.TD)
+        self.assertEqual(started, sorted(started))
+        self.assertEqual(stopped, sorted(stopped))
+        self.assertEqual([key for key in started if key[0] == "status"], [("status", "IP"), ("status", "TD")])
+        self.assertEqual([key for key in stopped if key[0] == "status"], [("status", "IP"), ("status", "TD")])
+        self.assert_counters_match_tickets()
+
+    def test_reporter_status_counts(self):
+        admin_user = EngineerUser.objects.get(username="admin")
+        ticket = self.create_ticket()
+        self.create_ticket(title="Second", status=Ticket.Status.IP)
+        self.assertEqual(get_reporter_status_counts(self.user.pk), [("To do", 1), ("In progress", 1), ("Done", 0)])
+        self.assertEqual(get_reporter_status_counts(admin_user.pk), [("To do", 0), ("In progress", 0), ("Done", 0)])
+
+        ticket.status = Ticket.Status.D
+        ticket.reporter = admin_user
+        ticket.save()
+        self.assertEqual(get_reporter_status_counts(self.user.pk), [("To do", 0), ("In progress", 1), ("Done", 0)])
+        self.assertEqual(get_reporter_status_counts(admin_user.pk), [("To do", 0), ("In progress", 0), ("Done", 1)])
+
+        ticket.soft_delete()
+        self.assertEqual(get_reporter_status_counts(admin_user.pk), [("To do", 0), ("In progress", 0), ("Done", 0)])
+        # The dashboard does not read the per-reporter counters
+        self.assertNotIn("reporter_status", get_dashboard_counts())
+        self.assert_counters_match_tickets()
+
+    def test_user_tickets_shows_status_counts(self):
+        self.client.post(reverse("login"), data={"username": USERNAME, "password": PASSWORD})
+        self.create_ticket()
+        self.create_ticket(title="Second")
+        self.create_ticket(title="Third", status=Ticket.Status.IP)
+
+        response = self.client.get(reverse("user_tickets"))
+        self.assertEqual(response.context["status_counts"], [("To do", 2), ("In progress", 1), ("Done", 0)])
+        self.assertContains(response, "In progress: 1")
+        response = self.client.get(reverse("tickets"))
+        self.assertNotIn("status_counts", response.context)
+
+    def test_dashboard_query_count_is_constant(self):
+        self.client.post(reverse("login"), data={"username": USERNAME, "password": PASSWORD})
+        self.create_ticket()
+        with capture_request_queries() as few_tickets:
+            self.client.get(reverse("dashboard"))
+        for index in range(20):
+            self.create_ticket(title=f"Ticket {index}", priority=Ticket.Priority.HIGH)
+
+        with capture_request_queries() as many_tickets:
+            response = self.client.get(reverse("dashboard"))
+        self.assertEqual(len(many_tickets), len(few_tickets))
+        self.assertTemplateUsed(response, "application/dashboard.html")
+        self.assertEqual(response.context["reporter_counts"], [(self.user, 21)])
+        self.assertIn(("High", 20), response.context["priority_counts"])
+
+
+class TicketHistoryTestCase(CustomTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = EngineerUser.objects.get(username=USERNAME)
+        self.client.post(reverse("login"), data={"username": USERNAME, "password": PASSWORD})
+
+    def create_and_edit_ticket(self):
+        self.client.post(reverse("ticket_form"), data={
+            "title": TITLE,
+            "priority": PRIORITY,
+            "description": DESCRIPTION,
+            "status": STATUS
+        })
+        ticket = Ticket.objects.get(title=TITLE)
+        self.client.post(reverse("edit_ticket", kwargs={"pk": ticket.pk}), data={
+            "title": TITLE,
+            "priority": Ticket.Priority.HIGH,
+            "description": DESCRIPTION,
+            "status": STATUS,
+            "version": ticket.version,
+        })
+        return ticket
+
+    def test_history_stores_changed_fields_only(self):
+        ticket = self.create_and_edit_ticket()
+
+        created, edited = TicketHistory.objects.filter(ticket=ticket)
+        self.assertEqual(set(created.changes), set(Ticket.TRACKED_FIELDS))
+        self.assertEqual(edited.changes, {"priority": "H"})
+        self.assertEqual(edited.actor, self.user)
+        self.assertLess(len(json.dumps(edited.changes)), len(json.dumps(created.changes)))
+
+        # Saving without changes does not add a row
+        Ticket.objects.get(pk=ticket.pk).save()
+        self.assertEqual(TicketHistory.objects.filter(ticket=ticket).count(), 2)
+
+    def test_rebuild_past_version(self):
+        ticket = self.create_and_edit_ticket()
+        created, edited = TicketHistory.objects.filter(ticket=ticket)
+
+        original = rebuild_ticket(ticket.pk, entry=created)
+        self.assertEqual(original.priority, Ticket.Priority.LOW)
+        self.assertEqual(original.reporter, self.user)
+        self.assertEqual(original.created, Ticket.objects.get(pk=ticket.pk).created)
+        self.assertEqual(rebuild_ticket(ticket.pk).priority, Ticket.Priority.HIGH)
+        self.assertIsNone(rebuild_ticket(ticket.pk, at=created.timestamp - timezone.timedelta(seconds=1)))
+
+    def test_history_view_paginated(self):
+        ticket = Ticket.objects.get(pk=self.create_and_edit_ticket().pk)
+        for index in range(views.HISTORY_PAGE_SIZE):
+            ticket.description = f"Description {index}"
+            ticket.save()
+
+        response = self.client.get(reverse("ticket_history", kwargs={"pk": ticket.pk}))
+        self.assertTemplateUsed(response, "application/ticket_history.html")
+        self.assertEqual(len(response.context["changes"]), views.HISTORY_PAGE_SIZE)
+        self.assertContains(response, "Description 19")
+
+        response = self.client.get(reverse("ticket_history", kwargs={"pk": ticket.pk}), {"page": 2})
+        self.assertEqual(len(response.context["changes"]), 2)
+        self.assertContains(response, "Ticket priority: High")
+        self.assertContains(response, "Reporter: John Smith")
+
+    def test_history_view_ticket_missing(self):
+        response = self.client.get(reverse("ticket_history", kwargs={"pk": 999}))
+        messages = [m.message for m in get_messages(response.wsgi_request)]
+        self.assertIn(views.TICKET_MISSING, messages)
+
+
+class TicketConcurrencyTestCase(CustomTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ticket = Ticket.objects.create(title=TITLE, created=TIME, priority=PRIORITY, description=DESCRIPTION,
+                                            status=STATUS, reporter=EngineerUser.objects.get(username=USERNAME))
+
+    def edit_data(self, version, priority=Ticket.Priority.HIGH):
+        return {"title": TITLE, "priority": priority, "description": DESCRIPTION, "status": STATUS,
+                "version": version}
+
+    def test_update_writes_changed_fields_with_version_check(self):
+        ticket = Ticket.objects.get(pk=self.ticket.pk)
+        ticket.priority = Ticket.Priority.HIGH
+        with CaptureQueriesContext(connection) as queries:
+            ticket.save()
+
+        update = next(query["sql"] for query in queries if query["sql"].startswith("UPDATE \"application_ticket\""))
+        self.assertIn('"priority"', update)
+        self.assertNotIn('"description"', update)
+        self.assertIn('"version" = 1', update.split("WHERE")[1])
+        self.assertEqual(ticket.version, 2)
+        self.assertEqual(Ticket.objects.get(pk=ticket.pk).version, 2)
+
+        # Saving without changes writes nothing
+        with CaptureQueriesContext(connection) as queries:
+            ticket.save()
+        self.assertFalse(any(query["sql"].startswith("UPDATE") for query in queries))
+
+    def test_stale_save_raises_conflict(self):
+        first = Ticket.objects.get(pk=self.ticket.pk)
+        second = Ticket.objects.get(pk=self.ticket.pk)
+        first.priority = Ticket.Priority.HIGH
+        first.save()
+
+        second.status = Ticket.Status.D
+        with self.assertRaises(TicketEditConflict):
+            second.save()
+        stored = Ticket.objects.get(pk=self.ticket.pk)
+        self.assertEqual((stored.priority, stored.status, stored.version), (Ticket.Priority.HIGH, STATUS, 2))
+        self.assertEqual(TicketHistory.objects.filter(ticket=self.ticket).count(), 2)
+
+    def test_edit_view_rejects_stale_form(self):
+        self.client.post(reverse("login"), data={"username": USERNAME, "password": PASSWORD})
+        response = self.client.get(reverse("edit_ticket", kwargs={"pk": self.ticket.pk}))
+        self.assertEqual(response.context["edit_ticket_form"]["version"].value(), 1)
+
+        other = Ticket.objects.get(pk=self.ticket.pk)
+        other.status = Ticket.Status.IP
+        other.save()
+
+        response = self.client.post(reverse("edit_ticket", kwargs={"pk": self.ticket.pk}), data=self.edit_data(1))
+        self.assertEqual(response.status_code, 409)
+        self.assertIn(views.TICKET_CONFLICT, [m.message for m in get_messages(response.wsgi_request)])
+        self.assertEqual(response.context["edit_ticket_form"]["version"].value(), 2)
+        stored = Ticket.objects.get(pk=self.ticket.pk)
+        self.assertEqual((stored.priority, stored.status), (PRIORITY, Ticket.Status.IP))
+
+        response = self.client.post(reverse("edit_ticket", kwargs={"pk": self.ticket.pk}), data=self.edit_data(2))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Ticket.objects.get(pk=self.ticket.pk).priority, Ticket.Priority.HIGH)
+
+    def test_edit_view_rejects_form_without_version(self):
+        self.client.post(reverse("login"), data={"username": USERNAME, "password": PASSWORD})
+        data = self.edit_data(1)
+        del data["version"]
+
+        response = self.client.post(reverse("edit_ticket", kwargs={"pk": self.ticket.pk}), data=data)
+        self.assertEqual(response.status_code, 409)
+        stored = Ticket.objects.get(pk=self.ticket.pk)
+        self.assertEqual((stored.priority, stored.version), (PRIORITY, 1))
+
+    def test_edit_view_conflict_during_save(self):
+        self.client.post(reverse("login"), data={"username": USERNAME, "password": PASSWORD})
+        with mock.patch.object(TicketChangeForm, "save", side_effect=TicketEditConflict):
+            response = self.client.post(reverse("edit_ticket", kwargs={"pk": self.ticket.pk}),
+                                        data=self.edit_data(1))
+        self.assertEqual(response.status_code, 409)
+
+    def test_admin_rejects_stale_form(self):
+        self.client.force_login(EngineerUser.objects.get(username="admin"))
+        url = reverse("admin:application_ticket_change", args=[self.ticket.pk])
+        data = {**self.edit_data(1), "created_0": "2023-01-01", "created_1": "00:00:00"}
+        # The change form carries the version, without which every save is a conflict
+        self.assertContains(self.client.get(url), '<input type="hidden" name="version" value="1"', html=False)
+
+        other = Ticket.objects.get(pk=self.ticket.pk)
+        other.status = Ticket.Status.IP
+        other.save()
+
+        response = self.client.post(url, data=data)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "This ticket was changed by someone else.")
+        self.assertEqual(Ticket.objects.get(pk=self.ticket.pk).priority, PRIORITY)
+
+        with mock.patch.object(Ticket, "save", side_effect=TicketEditConflict):
+            response = self.client.post(url, data={**data, "version": 2})
+        self.assertRedirects(response, url)
+
+
+class TicketSoftDeleteTestCase(CustomTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = EngineerUser.objects.get(username=USERNAME)
+        self.ticket = Ticket.objects.create(title=TITLE, created=TIME, priority=PRIORITY, description=DESCRIPTION,
+                                            status=STATUS, reporter=self.user)
+
+    def test_delete_view_soft_deletes(self):
+        self.client.post(reverse("login"), data={"username": "admin", "password": PASSWORD})
+        with capture_request_queries() as queries:
+            response = self.client.post(reverse("delete_ticket", args=(self.ticket.id,)))
+
+        # The ticket is loaded once and only updated, not deleted
+        ticket_queries = [query["sql"] for query in queries if '"application_ticket"' in query["sql"]]
+        self.assertEqual(len([sql for sql in ticket_queries if sql.startswith("SELECT")]), 1)
+        self.assertFalse(any(sql.startswith("DELETE") for sql in ticket_queries))
+        self.assertRedirects(response, reverse("tickets"))
+
+        self.assertFalse(Ticket.objects.filter(pk=self.ticket.pk).exists())
+        self.assertIsNotNone(Ticket.all_objects.get(pk=self.ticket.pk).deleted_at)
+        self.assertIn("deleted_at", TicketHistory.objects.filter(ticket=self.ticket).last().changes)
+        self.assertEqual(get_dashboard_counts()["status"], {"TD": 0})
+        self.assertEqual(self.client.get(reverse("edit_ticket", args=(self.ticket.id,))).status_code, 200)
+        self.assertEqual(self.client.get(reverse("delete_ticket", args=(self.ticket.id,))).status_code, 404)
+
+    def test_title_unique_among_live_tickets(self):
+        form = TicketCreationForm(data={"title": TITLE, "priority": PRIORITY, "description": DESCRIPTION,
+                                        "status": STATUS}, user=self.user)
+        self.assertFalse(form.is_valid())
+        self.assertIn("Ticket with this Ticket title already exists.", form.non_field_errors())
+
+        self.ticket.soft_delete()
+        form = TicketCreationForm(data={"title": TITLE, "priority": PRIORITY, "description": DESCRIPTION,
+                                        "status": STATUS}, user=self.user)
+        self.assertTrue(form.is_valid())
+        form.save()
+        self.assertEqual(Ticket.all_objects.filter(title=TITLE).count(), 2)
+
+    def test_purge_deletes_old_tickets_in_chunks(self):
+        old_tickets = [Ticket.objects.create(title=f"Old {index}", created=TIME, priority=PRIORITY,
+                                             description=DESCRIPTION, status=STATUS, reporter=self.user)
+                       for index in range(5)]
+        for ticket in old_tickets:
+            ticket.soft_delete()
+        Ticket.all_objects.filter(pk__in=[ticket.pk for ticket in old_tickets]).update(deleted_at=TIME)
+        recent = Ticket.objects.create(title="Recent", created=TIME, priority=PRIORITY, description=DESCRIPTION,
+                                       status=STATUS, reporter=self.user)
+        recent.soft_delete()
+
+        out = StringIO()
+        call_command("purge_deleted_tickets", "--batch-size", "2", verbosity=2, stdout=out)
+        self.assertEqual(out.getvalue().splitlines(), [
+            "Purged 2 ticket(s)...", "Purged 4 ticket(s)...", "Purged 5 ticket(s)...", "Purged 5 deleted ticket(s).",
+        ])
+
+        self.assertEqual(set(Ticket.all_objects.values_list("title", flat=True)), {TITLE, "Recent"})
+        self.assertFalse(TicketHistory.objects.filter(ticket_id__in=[ticket.pk for ticket in old_tickets]).exists())
+
+    def test_deleting_engineer_soft_deletes_tickets(self):
+        user_pk = self.user.pk
+        with CaptureQueriesContext(connection) as queries:
+            self.user.delete()
+
+        self.assertFalse(any(query["sql"].startswith('DELETE FROM "application_ticket"') for query in queries))
+        self.assertIn('UPDATE "application_ticket" SET "reporter_id" = NULL '
+                      f'WHERE "application_ticket"."reporter_id" IN ({user_pk})', [query["sql"] for query in queries])
+        self.assertFalse(Ticket.objects.exists())
+        ticket = Ticket.all_objects.get(pk=self.ticket.pk)
+        self.assertIsNotNone(ticket.deleted_at)
+        self.assertIsNone(ticket.reporter_id)
+        self.assertEqual(get_dashboard_counts()["reporter"], {str(user_pk): 0})
+        self.assertEqual(compute_counters(), {})
+
+
+class NotificationTestCase(CustomTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = EngineerUser.objects.get(username=USERNAME)
+        self.admin_user = EngineerUser.objects.get(username="admin")
+
+    def test_set_on_call_notifies_new_and_previous_engineer(self):
+        self.client.force_login(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("set_on_call"), data={"engineer": self.user.pk})
+
+        emails = {email.to[0]: email.subject for email in mail.outbox}
+        self.assertEqual(emails, {
+            EMAIL: "[Tickets] You are now on call.",
+            "admin@qa.com": "[Tickets] John Smith is now on call.",
+        })
+        self.assertFalse(Notification.objects.filter(sent_at=None).exists())
+
+    def test_high_priority_ticket_alerts_on_call_engineer(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.create(title=TITLE, created=TIME, priority=PRIORITY, description=DESCRIPTION, status=STATUS,
+                                  reporter=self.user)
+        self.assertEqual(mail.outbox, [])
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            Ticket.objects.create(title="Urgent", created=TIME, priority=Ticket.Priority.HIGH,
+                                  description=DESCRIPTION, status=STATUS, reporter=self.user)
+            # Nothing is queued before the commit
+            self.assertEqual(mail.outbox, [])
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["admin@qa.com"])
+        self.assertEqual(mail.outbox[0].subject, "[Tickets] High priority ticket created: [Urgent].")
+
+    def test_reporter_on_call_not_alerted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.create(title="Urgent", created=TIME, priority=Ticket.Priority.HIGH,
+                                  description=DESCRIPTION, status=STATUS, reporter=self.admin_user)
+        self.assertEqual(mail.outbox, [])
+
+    @override_settings(NOTIFICATION_BATCH_SECONDS=60, TASKS={**settings.TASKS, "BACKEND": "database"})
+    def test_rolled_back_event_not_delivered(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                Ticket.objects.create(title="Urgent", created=TIME, priority=Ticket.Priority.HIGH,
+                                      description=DESCRIPTION, status=STATUS, reporter=self.user)
+                transaction.set_rollback(True)
+        self.assertEqual(callbacks, [])
+        self.assertFalse(Task.objects.exists())
+        self.assertFalse(Notification.objects.exists())
+
+    def test_sent_notifications_not_sent_again(self):
+        notify([self.user], "First.")
+        self.assertEqual(send_pending_notifications(self.user.pk), 1)
+        self.assertEqual(send_pending_notifications(self.user.pk), 0)
+        self.assertEqual(len(mail.outbox), 1)
+
+    @override_settings(NOTIFICATION_BATCH_SECONDS=60, TASKS={**settings.TASKS, "BACKEND": "database"})
+    def test_burst_coalesced_into_one_email(self):
+        for title in ("First", "Second", "Third"):
+            with self.captureOnCommitCallbacks(execute=True):
+                Ticket.objects.create(title=title, created=TIME, priority=Ticket.Priority.HIGH,
+                                      description=DESCRIPTION, status=STATUS, reporter=self.user)
+
+        queued = Task.objects.get()
+        self.assertEqual(queued.args, [self.admin_user.pk])
+        self.assertGreater(queued.run_after, timezone.now())
+        self.assertEqual(mail.outbox, [])
+
+        Task.objects.update(run_after=timezone.now())
+        call_command("run_tasks", "--burst", stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, "[Tickets] 3 new notifications")
+        self.assertEqual([line.split(" ", 2)[2] for line in mail.outbox[0].body.splitlines()], [
+            "High priority ticket created: [First].",
+            "High priority ticket created: [Second].",
+            "High priority ticket created: [Third].",
+        ])
+
+    def test_benchmark_rolls_back(self):
+        out = StringIO()
+        call_command("benchmark_notifications", "--events", "20", "--recipients", "4", stdout=out)
+
+        self.assertIn("One email per event: 20 event(s), 20 email(s)", out.getvalue())
+        self.assertIn("Batched per recipient: 20 event(s), 4 email(s)", out.getvalue())
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(EngineerUser.objects.count(), 2)
+
+
+class TicketRowsTestCase(CustomTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = EngineerUser.objects.get(username=USERNAME)
+        self.ticket = Ticket.objects.create(title=TITLE, created=TIME.replace(hour=9, minute=5, second=7),
+                                            priority=PRIORITY, description=DESCRIPTION, status=STATUS,
+                                            reporter=self.user)
+
+    def test_rows_match_template_filters(self):
+        row, = get_ticket_rows(Ticket.objects.all(), self.user)
+        legacy = Template(
+            "{{ ticket.created | date:'d M Y' }}|{{ ticket.created | time:'H:i:s' }}|{{ ticket.reporter }}|"
+            "{% url 'edit_ticket' pk=ticket.id %}|{% url 'ticket_history' pk=ticket.id %}"
+        ).render(Context({"ticket": self.ticket}))
+
+        self.assertEqual("|".join([row["date"], row["time"], row["reporter"], row["edit_url"], row["history_url"]]),
+                         legacy)
+        self.assertEqual(row["date"], "01 Jan 2023")
+        self.assertIsNone(row["delete_url"])
+
+    def test_delete_link_only_for_superusers(self):
+        admin_user = EngineerUser.objects.get(username="admin")
+        row, = get_ticket_rows(Ticket.objects.all(), admin_user)
+        self.assertEqual(row["delete_url"], reverse("delete_ticket", kwargs={"pk": self.ticket.pk}))
+
+        self.client.force_login(admin_user)
+        self.assertContains(self.client.get(reverse("tickets")), row["delete_url"])
+        self.client.force_login(self.user)
+        self.assertNotContains(self.client.get(reverse("tickets")), row["delete_url"])
+
+    def test_list_queries_do_not_grow_with_rows(self):
+        self.client.force_login(self.user)
+        with capture_request_queries() as one_ticket:
+            self.client.get(reverse("tickets"))
+        one_ticket_count = len(one_ticket.captured_queries)
+
+        for index in range(5):
+            Ticket.objects.create(title=f"{TITLE} {index}", created=TIME, priority=PRIORITY,
+                                  description=DESCRIPTION, status=STATUS, reporter=self.user)
+        with capture_request_queries() as six_tickets:
+            response = self.client.get(reverse("tickets"))
+        self.assertEqual(len(six_tickets.captured_queries), one_ticket_count)
+        self.assertContains(response, "John Smith", count=6)
+
+    def test_benchmark_rolls_back(self):
+        out = StringIO()
+        call_command("benchmark_ticket_rows", "--rows", "20", "--reporters", "2", stdout=out)
+
+        self.assertIn("Precomputed rows: 20 row(s)", out.getvalue())
+        self.assertIn("1 query", out.getvalue())
+        self.assertEqual(Ticket.objects.count(), 1)
+
+
+class StartupProfileTestCase(CustomTestCase):
+    def test_parse_importtime(self):
+        imports = parse_importtime("\n".join([
+            "import time: self [us] | cumulative | imported package",
+            "import time:       120 |        120 |     django.utils.version",
+            "import time:       300 |        420 |   django.utils",
+            "import time:       500 |        920 | django",
+            "import time:        80 |         80 | application.forms",
+        ]))
+
+        self.assertEqual([(item["module"], item["depth"]) for item in imports],
+                         [("django.utils.version", 2), ("django.utils", 1), ("django", 0), ("application.forms", 0)])
+        self.assertEqual(aggregate_by_package(imports), [("django", 920, 3), ("application", 80, 1)])
+
+    def test_profile_startup(self):
+        out = StringIO()
+        call_command("profile_startup", "--profile", "api", "--runs", "1", "--top", "3", stdout=out)
+
+        self.assertIn("Profile 'api': ", out.getvalue())
+        self.assertIn("Slowest packages (self time):", out.getvalue())
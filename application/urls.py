@@ -23,9 +23,12 @@ urlpatterns = [
     path("", views.home_request, name="home"),
     path("tickets/", ticket_list_view, name="tickets"),
     path('tickets/update/<int:pk>/', views.edit_ticket_request, name="edit_ticket"),
+    path('tickets/history/<int:pk>/', views.ticket_history_request, name="ticket_history"),
     path('tickets/delete/<int:pk>/', delete_ticket_list_view, name="delete_ticket"),
     path("user_tickets/", user_ticket_list_view, name="user_tickets"),
+    path("dashboard/", views.dashboard_request, name="dashboard"),
     path("set_on_call/", views.set_on_call_request, name="set_on_call"),
+    path("engineers/autocomplete/", views.engineer_autocomplete_request, name="engineer_autocomplete"),
     path("ticket_form/", views.create_ticket_request, name="ticket_form"),
     path("register/", views.register_request, name="register"),
     path("login/", views.login_request, name="login"),
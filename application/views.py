@@ -29,32 +29,58 @@ References:
 import logging
 
 from django.contrib import messages
-from django.contrib.auth import login, authenticate, get_user, logout
+from django.contrib.auth import login, get_user, logout
 from django.contrib.auth.decorators import login_required
-from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.http import JsonResponse
 from django.shortcuts import render, redirect
 from django.urls import reverse_lazy
 from django.views.generic import ListView, DeleteView
 
-from application.forms import TicketCreationForm, EngineerUserCreationForm, OnCallChangeForm, TicketChangeForm
-from application.models import Ticket, EngineerUser
+from application.counters import get_dashboard_counts, get_reporter_status_counts
+from application.forms import TicketCreationForm, EngineerUserCreationForm, OnCallChangeForm, TicketChangeForm, \
+    LoginForm
+from application.history import describe_changes
+from application.models import Ticket, EngineerUser, TicketCounter, TicketEditConflict
+from application.notifications import notify_on_call_changed
+from application.search import search_engineers
+from application.ticket_rows import get_ticket_rows
+from logger.events import LogEvent, event_extra
+from webapplicationproject.routers import ReplicaReadMixin, read_from_replica
 
 # Static message strings
 REGISTRATION_SUCCESSFUL = "Registration was successful."
 REGISTRATION_UNSUCCESSFUL = "Registration was unsuccessful."
 INVALID_CREDENTIALS = "Invalid username or password."
+LOGIN_RATE_LIMITED = "Too many login attempts. Please try again later."
 INVALID_FORM = "Invalid form."
 LOGGED_IN = "You are now logged in."
 LOGGED_OUT = "You are now logged out."
 TICKET_MISSING = "Ticket does not exist."
+TICKET_CONFLICT = "Ticket was changed by someone else. Review the latest version and try again."
+# Messages formatted with the ticket title or engineer
+TICKET_CREATED = "Ticket created: [%s]."
+TICKET_UPDATED = "Ticket updated: [%s]."
+TICKET_DELETED = "Ticket deleted: [%s]."
+ON_CALL_CHANGED = "On call changed: [%s]."
+
+HISTORY_PAGE_SIZE = 20
+AUTOCOMPLETE_PAGE_SIZE = 20
+# Later pages are returned empty without a query, so huge page numbers cannot overflow the database OFFSET
+AUTOCOMPLETE_MAX_PAGE = 500
 
 logger = logging.getLogger()
 
 
-class TicketListView(LoginRequiredMixin, ListView):
+class TicketListView(LoginRequiredMixin, ReplicaReadMixin, ListView):
     """
-    View for listing tickets.
+    View for listing tickets. The list is read from a replica when one is configured.
+
+    The table is rendered from 'ticket_rows', precomputed display values (see application.ticket_rows); 'ticket_list'
+    is still available as a lazy queryset.
 
     Attributes:
         login_url (str): The URL for login redirection.
@@ -68,13 +94,17 @@ class TicketListView(LoginRequiredMixin, ListView):
 
     def get_context_data(self, **kwargs):
         """
-        Get the context data for the template.
+        Get the context data for the template. The user's page also gets their ticket totals per status, read from
+        the precomputed counters (see application.counters).
 
         Returns:
             dict: The context data for the template.
         """
         context = super(TicketListView, self).get_context_data(**kwargs)
+        context["ticket_rows"] = get_ticket_rows(context["object_list"], self.request.user)
         context["on_call"] = EngineerUser.objects.filter(is_on_call=True)
+        if self.request.path == "/user_tickets/":
+            context["status_counts"] = get_reporter_status_counts(self.request.user.pk)
         return context
 
     def get_queryset(self):
@@ -94,6 +124,9 @@ class TicketDeleteView(PermissionRequiredMixin, DeleteView):
     """
     View for deleting a ticket. Access to this view requires the 'user.is_superuser' permission.
 
+    Tickets are soft deleted, so the request only updates one row; deleted tickets are removed from the database later
+    by 'manage.py purge_deleted_tickets'.
+
     Attributes:
         permission_required (str): The required permission for accessing this view.
         model: The model associated with this view (Ticket).
@@ -104,6 +137,23 @@ class TicketDeleteView(PermissionRequiredMixin, DeleteView):
     model = Ticket
     context_object_name = "delete_ticket_form"
 
+    def form_valid(self, form):
+        """
+        Soft delete the ticket loaded by the view and redirect to the ticket list.
+
+        Returns:
+            HttpResponse: A redirect response to the ticket list.
+        """
+        self.object.changed_by = self.request.user
+        try:
+            self.object.soft_delete()
+        except TicketEditConflict:
+            messages.error(self.request, TICKET_CONFLICT)
+            logger.warning(TICKET_CONFLICT,
+                           extra=event_extra(LogEvent.TICKET_CONFLICT, self.request.user, self.object))
+            return redirect("tickets")
+        return redirect(self.get_success_url())
+
     def get_success_url(self):
         """
         Get the URL to redirect after successful deletion.
@@ -111,10 +161,9 @@ class TicketDeleteView(PermissionRequiredMixin, DeleteView):
         Returns:
             str: The URL to redirect after successful deletion.
         """
-        ticket = self.get_object()
-        message = f"Ticket deleted: [{ticket.title}]."
-        messages.info(self.request, message)
-        logger.info(message, extra={'username': self.request.user.username})
+        messages.info(self.request, TICKET_DELETED % self.object.title)
+        logger.info(TICKET_DELETED, self.object.title,
+                    extra=event_extra(LogEvent.TICKET_DELETED, self.request.user, self.object))
         return reverse_lazy("tickets")
 
 
@@ -152,10 +201,10 @@ def register_request(request):
             user = form.save()
             login(request, user)
             messages.success(request, REGISTRATION_SUCCESSFUL)
-            logger.info(REGISTRATION_SUCCESSFUL, extra={'username': user.username})
+            logger.info(REGISTRATION_SUCCESSFUL, extra=event_extra(LogEvent.USER_REGISTERED, user))
             return redirect("tickets")
         messages.error(request, REGISTRATION_UNSUCCESSFUL)
-        logger.error(REGISTRATION_UNSUCCESSFUL)
+        logger.error(REGISTRATION_UNSUCCESSFUL, extra=event_extra(LogEvent.REGISTRATION_FAILED))
     return render(request=request, template_name="application/register.html", context={"register_form": form})
 
 
@@ -164,6 +213,8 @@ def login_request(request):
     Handle user login.
 
     If the request method is POST, attempt to authenticate the user with the provided form data.
+    The form authenticates the user once and refuses the attempt without hashing the password if the client IP or
+    username has exceeded its login rate limit.
     If the user authentication is successful, log in the user and redirect to the 'tickets' page.
     If the authentication fails, display an error message.
 
@@ -171,21 +222,24 @@ def login_request(request):
         request: The HTTP request object.
 
     Returns:
-        HttpResponse: The rendered login page template or a redirect response.
+        HttpResponse: The rendered login page template (status 429 when rate limited) or a redirect response.
     """
-    form = AuthenticationForm(request, data=request.POST or None)
+    form = LoginForm(request, data=request.POST or None)
     if request.method == "POST":
         if form.is_valid():
-            username = form.cleaned_data.get('username')
-            password = form.cleaned_data.get('password')
-            user = authenticate(username=username, password=password)
-            if user is not None:
-                login(request, user)
-                messages.info(request, LOGGED_IN)
-                logger.info(LOGGED_IN, extra={'username': username})
-                return redirect("tickets")
+            user = form.get_user()
+            login(request, user)
+            messages.info(request, LOGGED_IN)
+            logger.info(LOGGED_IN, extra=event_extra(LogEvent.LOGGED_IN, user))
+            return redirect("tickets")
+        if form.is_rate_limited():
+            messages.error(request, LOGIN_RATE_LIMITED)
+            logger.warning(LOGIN_RATE_LIMITED, extra=event_extra(LogEvent.LOGIN_RATE_LIMITED,
+                                                                 username=form.cleaned_data.get('username', '')))
+            return render(request=request, template_name="application/login.html", context={"login_form": form},
+                          status=429)
         messages.error(request, INVALID_CREDENTIALS)
-        logger.error(INVALID_CREDENTIALS)
+        logger.error(INVALID_CREDENTIALS, extra=event_extra(LogEvent.LOGIN_FAILED))
     return render(request=request, template_name="application/login.html", context={"login_form": form})
 
 
@@ -202,9 +256,10 @@ def logout_request(request):
     Returns:
         HttpResponse: A redirect response to the login page.
     """
+    user = request.user
     logout(request)
     messages.info(request, LOGGED_OUT)
-    logger.info(LOGGED_OUT, extra={'username': request.user.username})
+    logger.info(LOGGED_OUT, extra=event_extra(LogEvent.LOGGED_OUT, user))
     return redirect("login")
 
 
@@ -226,13 +281,13 @@ def create_ticket_request(request):
     form = TicketCreationForm(request.POST or None, user=request.user)
     if request.method == "POST":
         if form.is_valid():
-            form.save()
-            message = f"Ticket created: [{form.cleaned_data['title']}]."
-            messages.info(request, message)
-            logger.info(message, extra={'username': request.user.username})
+            ticket = form.save()
+            messages.info(request, TICKET_CREATED % ticket.title)
+            logger.info(TICKET_CREATED, ticket.title,
+                        extra=event_extra(LogEvent.TICKET_CREATED, request.user, ticket))
             return redirect("tickets")
         messages.error(request, INVALID_FORM)
-        logger.error(INVALID_FORM, extra={'username': request.user.username})
+        logger.error(INVALID_FORM, extra=event_extra(LogEvent.INVALID_FORM, request.user))
     return render(request=request, template_name="application/ticket_form.html", context={"ticket_form": form})
 
 
@@ -245,42 +300,158 @@ def edit_ticket_request(request, pk):
     If the form data is valid and the ticket is successfully updated, display a success message
     and redirect to the 'tickets' page.
     If the ticket ID does not exist, display an error message and return to the ticket list page.
+    If the ticket was changed by someone else since the form was rendered, display an error message and the latest
+    version of the ticket instead of overwriting the other change.
 
     Parameters:
         request: The HTTP request object.
         pk (int): The primary key of the ticket to edit.
 
     Returns:
-        HttpResponse: The rendered ticket edit form page template or a redirect response.
+        HttpResponse: The rendered ticket edit form page template (status 409 on a conflict) or a redirect response.
     """
     try:
         instance = Ticket.objects.get(pk=pk)
     except Ticket.DoesNotExist:
         messages.error(request, TICKET_MISSING)
-        logger.exception(TICKET_MISSING, extra={'username': request.user.username})
+        logger.exception(TICKET_MISSING, extra=event_extra(LogEvent.TICKET_MISSING, request.user, pk))
         return render(request=request, template_name="application/tickets.html")
     form = TicketChangeForm(data=request.POST or None, instance=instance, user=request.user)
     if request.method == "POST":
         if form.is_valid():
-            form.save()
-            message = f"Ticket updated: [{instance.title}]."
-            messages.info(request, message)
-            logger.info(message, extra={'username': request.user.username})
+            try:
+                form.save()
+            except TicketEditConflict:
+                return render_ticket_conflict(request, pk)
+            messages.info(request, TICKET_UPDATED % instance.title)
+            logger.info(TICKET_UPDATED, instance.title,
+                        extra=event_extra(LogEvent.TICKET_UPDATED, request.user, instance))
             return redirect("tickets")
+        if form.has_conflict():
+            return render_ticket_conflict(request, pk)
         messages.error(request, INVALID_FORM)
-        logger.error(INVALID_FORM, extra={'username': request.user.username})
+        logger.error(INVALID_FORM, extra=event_extra(LogEvent.INVALID_FORM, request.user, instance))
     return render(request=request, template_name="application/edit_ticket_form.html",
                   context={"edit_ticket_form": form, "instance": instance})
 
 
+def render_ticket_conflict(request, pk):
+    """
+    Render the ticket edit form with the latest version of a ticket after a conflicting edit.
+
+    Parameters:
+        request: The HTTP request object.
+        pk (int): The primary key of the edited ticket.
+
+    Returns:
+        HttpResponse: The rendered ticket edit form page template with status 409.
+    """
+    messages.error(request, TICKET_CONFLICT)
+    logger.warning(TICKET_CONFLICT, extra=event_extra(LogEvent.TICKET_CONFLICT, request.user, pk))
+    instance = Ticket.objects.get(pk=pk)
+    form = TicketChangeForm(instance=instance, user=request.user)
+    return render(request=request, template_name="application/edit_ticket_form.html",
+                  context={"edit_ticket_form": form, "instance": instance}, status=409)
+
+
+@login_required(login_url="login")
+def ticket_history_request(request, pk):
+    """
+    Render the change timeline of a ticket, newest change first.
+
+    If the provided ticket ID (pk) does not exist, display an error message and return to the ticket list page.
+
+    Parameters:
+        request: The HTTP request object.
+        pk (int): The primary key of the ticket.
+
+    Returns:
+        HttpResponse: The rendered ticket history page template.
+    """
+    try:
+        ticket = Ticket.objects.get(pk=pk)
+    except Ticket.DoesNotExist:
+        messages.error(request, TICKET_MISSING)
+        logger.exception(TICKET_MISSING, extra=event_extra(LogEvent.TICKET_MISSING, request.user, pk))
+        return render(request=request, template_name="application/tickets.html")
+    history = ticket.history.select_related("actor").order_by("-timestamp", "-id")
+    page = Paginator(history, HISTORY_PAGE_SIZE).get_page(request.GET.get("page"))
+    return render(request=request, template_name="application/ticket_history.html",
+                  context={"ticket": ticket, "page_obj": page, "changes": describe_changes(page.object_list)})
+
+
+@login_required(login_url="login")
+def dashboard_request(request):
+    """
+    Render the ticket statistics dashboard.
+
+    The counts are read from the precomputed TicketCounter rows, so the page does not group the ticket table and its
+    cost does not grow with the number of tickets.
+
+    Parameters:
+        request: The HTTP request object.
+
+    Returns:
+        HttpResponse: The rendered dashboard page template.
+    """
+    counts = get_dashboard_counts()
+    reporter_counts = {int(key): count for key, count in counts[TicketCounter.Dimension.REPORTER].items() if count}
+    reporters = EngineerUser.objects.in_bulk(list(reporter_counts))
+    context = {
+        "priority_counts": [(label, counts[TicketCounter.Dimension.PRIORITY].get(value, 0))
+                            for value, label in Ticket.Priority.choices],
+        "status_counts": [(label, counts[TicketCounter.Dimension.STATUS].get(value, 0))
+                          for value, label in Ticket.Status.choices],
+        "reporter_counts": sorted(
+            ((reporters[pk], count) for pk, count in reporter_counts.items() if pk in reporters),
+            key=lambda item: -item[1],
+        ),
+    }
+    return render(request=request, template_name="application/dashboard.html", context=context)
+
+
+@login_required(login_url="login")
+def engineer_autocomplete_request(request):
+    """
+    Return a page of engineers whose username, first name or last name starts with each word of the search term
+    (see application.search), in the JSON format of the select2 library.
+
+    Only one page of engineers is read, and one more row to tell whether there are more pages, so the response does
+    not grow with the number of engineers.
+
+    Parameters:
+        request: The HTTP request object, with the 'term' and 'page' (from 1 to AUTOCOMPLETE_MAX_PAGE) query
+            parameters.
+
+    Returns:
+        JsonResponse: {"results": [{"id": ..., "text": ...}], "pagination": {"more": ...}}.
+    """
+    # The engineer_first_name_lower_id index is in this order, so pages can be read from it instead of sorting matches
+    engineers = search_engineers(request.GET.get("term", "")).order_by(Lower("first_name"), "id")
+    try:
+        page = max(int(request.GET.get("page", 1)), 1)
+    except ValueError:
+        page = 1
+    if page > AUTOCOMPLETE_MAX_PAGE:
+        return JsonResponse({"results": [], "pagination": {"more": False}})
+    start = (page - 1) * AUTOCOMPLETE_PAGE_SIZE
+    with read_from_replica():
+        rows = list(engineers.values_list("id", "first_name", "last_name")[start:start + AUTOCOMPLETE_PAGE_SIZE + 1])
+    return JsonResponse({
+        "results": [{"id": pk, "text": f"{first_name} {last_name}".strip()}
+                    for pk, first_name, last_name in rows[:AUTOCOMPLETE_PAGE_SIZE]],
+        "pagination": {"more": len(rows) > AUTOCOMPLETE_PAGE_SIZE},
+    })
+
+
 @login_required(login_url="login")
 def set_on_call_request(request):
     """
     Handle setting an engineer on call.
 
     If the request method is POST, attempt to set an engineer on call based on the provided form data.
-    If the form data is valid and an engineer is successfully set on call, display a success message
-    and redirect to the 'tickets' page.
+    If the form data is valid and an engineer is successfully set on call, notify the new and previous
+    engineers on call, display a success message and redirect to the 'tickets' page.
     If the form data is invalid or no engineer is selected, keep the user on the 'set_on_call' form page.
 
     Parameters:
@@ -293,12 +464,15 @@ def set_on_call_request(request):
     if request.method == "POST":
         if form.is_valid():
             engineer_id = form.cleaned_data.get("engineer").id
-            EngineerUser.objects.filter(is_on_call=True).update(is_on_call=False)
-            engineer = EngineerUser.objects.get(pk=engineer_id)
-            engineer.is_on_call = True
-            engineer.save(update_fields=["is_on_call"])
-            message = f"On call changed: [{engineer}]."
-            messages.info(request, message)
-            logger.info(message, extra={'username': request.user.username})
+            with transaction.atomic():
+                previous = list(EngineerUser.objects.filter(is_on_call=True).exclude(pk=engineer_id))
+                EngineerUser.objects.filter(is_on_call=True).update(is_on_call=False)
+                engineer = EngineerUser.objects.get(pk=engineer_id)
+                engineer.is_on_call = True
+                engineer.save(update_fields=["is_on_call"])
+                # Queued in the same transaction; the emails are sent by a background task
+                notify_on_call_changed(engineer, previous)
+            messages.info(request, ON_CALL_CHANGED % engineer)
+            logger.info(ON_CALL_CHANGED, engineer, extra=event_extra(LogEvent.ON_CALL_CHANGED, request.user))
             return redirect("tickets")
     return render(request=request, template_name="application/set_on_call.html", context={"set_on_call": form})
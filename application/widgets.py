@@ -0,0 +1,60 @@
+"""
+Form widgets.
+
+EngineerAutocompleteSelect renders an engineer select with only the selected engineer as an option, filled in as the
+user types from the 'engineer_autocomplete' view with the select2 library bundled with the admin site. Pages using it
+stay the same size, and load with the same queries, however many engineers there are.
+"""
+from django import forms
+from django.conf import settings
+from django.urls import reverse_lazy
+
+from application.models import EngineerUser
+
+
+class EngineerAutocompleteSelect(forms.Select):
+    """
+    Select widget for an engineer, searched by username, first name or last name prefix as the user types.
+
+    Its media includes jQuery, select2 and their styles from the admin site's static files, so pages using it must
+    render the form's media.
+
+    Attributes:
+        url (str): The URL of the autocomplete view.
+    """
+
+    url = reverse_lazy('engineer_autocomplete')
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        attrs = context['widget']['attrs']
+        attrs['data-autocomplete-url'] = str(self.url)
+        attrs['data-placeholder'] = attrs.get('data-placeholder', "Search engineers")
+        attrs['class'] = ' '.join(filter(None, (attrs.get('class'), 'engineer-autocomplete')))
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        """
+        Build the options of the selected engineers only, instead of every choice.
+
+        Returns:
+            list: The option groups, as returned by Select.optgroups().
+        """
+        selected = [str(pk) for pk in value if pk not in (None, '') and str(pk).isdigit()]
+        options = [self.create_option(name, '', '', False, 0)] if not self.is_required or not selected else []
+        for index, engineer in enumerate(EngineerUser.objects.filter(pk__in=selected), start=len(options)):
+            options.append(self.create_option(name, engineer.pk, str(engineer), True, index))
+        return [(None, options, 0)]
+
+    @property
+    def media(self):
+        extra = '' if settings.DEBUG else '.min'
+        return forms.Media(
+            js=(
+                f'admin/js/vendor/jquery/jquery{extra}.js',
+                f'admin/js/vendor/select2/select2.full{extra}.js',
+                'admin/js/jquery.init.js',
+                'application/engineer_autocomplete.js',
+            ),
+            css={'screen': (f'admin/css/vendor/select2/select2{extra}.css',)},
+        )
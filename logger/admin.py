@@ -14,28 +14,113 @@ References:
 """
 from __future__ import unicode_literals
 
+import logging
+
+from django.conf import settings
 from django.contrib import admin
 from django.contrib.auth.models import Group
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.template.response import TemplateResponse
+from django.urls import path
 from django_db_logger.admin import StatusLogAdmin
 from django_db_logger.models import StatusLog
 
+from webapplicationproject.routers import ReplicaReadAdminMixin
+from .events import LogEvent
 from .models import CustomStatusLog, CustomLogEntry
+from .paginator import EstimatedCountPaginator
+from .segments import read_recent_records
 
 
 @admin.register(CustomStatusLog)
-class CustomStatusLogAdmin(StatusLogAdmin):
+class CustomStatusLogAdmin(ReplicaReadAdminMixin, StatusLogAdmin):
     """
     Custom admin panel for managing CustomStatusLog objects.
 
     This admin panel extends the base StatusLogAdmin and customizes the display and filtering
     options for CustomStatusLog objects. It disables add, change, and delete permissions for this model.
+    The changelist is read from a replica when one is configured.
+
+    Searches for 'ticket:<id>', 'actor:<id>', 'request:<id>' or 'event:<type>' are exact lookups on the indexed
+    structured columns instead of text searches of the messages.
+
+    The 'Recent segments' page reads the newest log segment files directly (see logger.segments), so records written
+    with LOG_STORAGE=segments can be viewed before they are loaded into the table.
+
+    Attributes:
+        structured_search (dict): The field searched for each search prefix.
+        segment_records_limit (int): The maximum number of records on the recent segments page.
 
     """
 
     list_display_links = ('colored_msg', 'create_datetime_format',)
-    list_display = ('create_datetime_format', 'username', 'colored_msg', 'traceback')
-    list_filter = ('level', 'username')
-    search_fields = ('username', 'colored_msg', 'traceback')
+    list_display = ('create_datetime_format', 'username', 'event', 'ticket_id', 'colored_msg', 'traceback')
+    list_filter = ('level', 'event', 'username')
+    search_fields = ('username', 'msg', 'trace')
+    structured_search = {
+        'ticket': 'ticket_id',
+        'actor': 'actor_id',
+        'request': 'request_id',
+        'event': 'event',
+    }
+    segment_records_limit = 200
+    change_list_template = 'admin/logger/customstatuslog/change_list.html'
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Filter the changelist on a structured column for prefixed search terms, or search the text fields otherwise.
+
+        Returns:
+            tuple: The filtered queryset and whether it may contain duplicates.
+        """
+        prefix, separator, value = search_term.strip().partition(':')
+        field = self.structured_search.get(prefix.lower()) if separator else None
+        if field is None:
+            return super().get_search_results(request, queryset, search_term)
+        try:
+            value = self.model._meta.get_field(field).to_python(value.strip())
+        except ValidationError:
+            return queryset.none(), False
+        return queryset.filter(**{field: value}), False
+
+    def get_urls(self):
+        return [
+            path('segments/', self.admin_site.admin_view(self.segments_view), name='logger_customstatuslog_segments'),
+            *super().get_urls(),
+        ]
+
+    def segments_view(self, request):
+        """
+        Render the newest records in the log segment files, filtered by level, event, username, ticket or message text.
+
+        Returns:
+            TemplateResponse: The rendered recent segments page.
+        """
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        filters = {name: request.GET.get(name, '').strip() for name in ('level', 'event', 'username', 'ticket', 'q')}
+
+        def matches(record):
+            return ((not filters['level'] or str(record['level']) == filters['level'])
+                    and (not filters['event'] or record['event'] == filters['event'])
+                    and (not filters['username'] or record['username'] == filters['username'])
+                    and (not filters['ticket'] or str(record['ticket_id']) == filters['ticket'])
+                    and (not filters['q'] or filters['q'].lower() in record['msg'].lower()))
+
+        records = read_recent_records(settings.LOG_SEGMENT_DIR, limit=self.segment_records_limit, matches=matches)
+        for record in records:
+            record['level_name'] = logging.getLevelName(record['level'])
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': "Recent log segments",
+            'records': records,
+            'filters': filters,
+            'levels': [(level, logging.getLevelName(level))
+                       for level in (logging.INFO, logging.WARNING, logging.ERROR, logging.CRITICAL)],
+            'events': LogEvent.choices,
+        }
+        return TemplateResponse(request, 'admin/logger/customstatuslog/segments.html', context)
 
     def has_add_permission(self, request):
         return False
@@ -48,19 +133,31 @@ class CustomStatusLogAdmin(StatusLogAdmin):
 
 
 @admin.register(CustomLogEntry)
-class LogEntryAdmin(admin.ModelAdmin):
+class LogEntryAdmin(ReplicaReadAdminMixin, admin.ModelAdmin):
     """
     Custom admin panel for managing CustomLogEntry objects.
 
     This admin panel provides additional filtering and search options for CustomLogEntry objects.
     It disables add, change, and delete permissions for this model.
+    The changelist is read from a replica when one is configured.
+
+    The changelist is built to stay fast on a large admin log: the date hierarchy choices are cached (see
+    logger.templatetags.logger_admin) and served by the action_time indexes of migration 0004, the unfiltered entry
+    count is estimated from table statistics on PostgreSQL, and the second count of all entries is skipped.
+
+    Attributes:
+        date_hierarchy_cache_seconds (int): How long the date hierarchy choices are cached.
 
     """
 
     date_hierarchy = 'action_time'
+    date_hierarchy_cache_seconds = 300
     list_display = ('action_time', 'user', 'content_type', 'object_repr', 'action_flag')
     list_filter = ('action_flag', 'user', 'content_type')
     search_fields = ('object_repr', 'change_message')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    change_list_template = 'admin/logger/customlogentry/change_list.html'
 
     def has_add_permission(self, request):
         return False
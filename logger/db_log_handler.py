@@ -10,9 +10,39 @@ import logging
 
 from django_db_logger.db_log_handler import DatabaseLogHandler
 
+from .request_id import get_request_id
+
 db_default_formatter = logging.Formatter()
 
 
+def get_log_fields(record):
+    """
+    Get the CustomStatusLog field values of a log record.
+
+    Parameters:
+        record (LogRecord): The log record.
+
+    Returns:
+        dict: The field values, except 'create_datetime'.
+    """
+    trace = None
+
+    if record.exc_info:
+        trace = db_default_formatter.formatException(record.exc_info)
+
+    return {
+        'logger_name': record.name,
+        'level': record.levelno,
+        'msg': record.getMessage(),
+        'trace': trace,
+        'username': getattr(record, 'username', ''),
+        'event': getattr(record, 'event', ''),
+        'ticket_id': getattr(record, 'ticket_id', None),
+        'actor_id': getattr(record, 'actor_id', None),
+        'request_id': getattr(record, 'request_id', '') or get_request_id(),
+    }
+
+
 class CustomDatabaseLogHandler(DatabaseLogHandler):
     """
     Custom log handler for storing log records in the database.
@@ -21,8 +51,29 @@ class CustomDatabaseLogHandler(DatabaseLogHandler):
     CustomStatusLog model in the database. It overrides the `emit` method to handle log records
     and create corresponding CustomStatusLog objects.
 
+    The 'event', 'ticket_id' and 'actor_id' attributes set by structured log calls (see logger.events) are saved
+    in their own columns, with the ID of the request being handled.
+
+    With 'defer_to' set to a task backend (e.g. 'thread'), records are saved by a background task
+    so that logging does not add a database write to the request. Records of the task queue's own
+    loggers are always saved inline, so a failing write cannot keep queueing more log records.
+
+    Attributes:
+        defer_to (str): The task backend saving the records, or None to save them inline.
+
     """
 
+    def __init__(self, level=logging.NOTSET, defer_to=None):
+        """
+        Constructor method for CustomDatabaseLogHandler.
+
+        Parameters:
+            level (int, optional): The minimum level of the records handled. Defaults to NOTSET.
+            defer_to (str, optional): The task backend saving the records. Defaults to saving them inline.
+        """
+        super().__init__(level)
+        self.defer_to = defer_to
+
     def emit(self, record):
         """
         Emit a log record and save it in the database.
@@ -32,25 +83,12 @@ class CustomDatabaseLogHandler(DatabaseLogHandler):
 
         """
         from .models import CustomStatusLog
-        
-        trace = None
 
-        if record.exc_info:
-            trace = db_default_formatter.formatException(record.exc_info)
+        kwargs = get_log_fields(record)
 
-        msg = record.getMessage()
+        if self.defer_to and record.name.split('.')[0] != 'tasks':
+            from .tasks import write_status_log
 
-        if hasattr(record, 'username'):
-            username = record.username
+            write_status_log.enqueue(backend=self.defer_to, **kwargs)
         else:
-            username = ''
-
-        kwargs = {
-            'logger_name': record.name,
-            'level': record.levelno,
-            'msg': msg,
-            'trace': trace,
-            'username': username
-        }
-
-        CustomStatusLog.objects.create(**kwargs)
+            CustomStatusLog.objects.create(**kwargs)
@@ -0,0 +1,52 @@
+"""
+Structured log events.
+
+Log calls that record user activity pass event_extra() as 'extra', so that CustomDatabaseLogHandler stores the event
+type, ticket and acting user in indexed columns next to the message, e.g.:
+
+    logger.info(TICKET_CREATED, ticket.title, extra=event_extra(LogEvent.TICKET_CREATED, request.user, ticket))
+
+Messages use %-style arguments, so they are only formatted when a handler emits the record.
+"""
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class LogEvent(models.TextChoices):
+    USER_REGISTERED = 'user_registered', _("User registered")
+    REGISTRATION_FAILED = 'registration_failed', _("Registration failed")
+    LOGGED_IN = 'logged_in', _("Logged in")
+    LOGIN_FAILED = 'login_failed', _("Login failed")
+    LOGIN_RATE_LIMITED = 'login_rate_limited', _("Login rate limited")
+    LOGGED_OUT = 'logged_out', _("Logged out")
+    TICKET_CREATED = 'ticket_created', _("Ticket created")
+    TICKET_UPDATED = 'ticket_updated', _("Ticket updated")
+    TICKET_DELETED = 'ticket_deleted', _("Ticket deleted")
+    TICKET_CONFLICT = 'ticket_conflict', _("Ticket edit conflict")
+    TICKET_MISSING = 'ticket_missing', _("Ticket missing")
+    INVALID_FORM = 'invalid_form', _("Invalid form")
+    ON_CALL_CHANGED = 'on_call_changed', _("On call changed")
+    SQL_INJECTION = 'sql_injection', _("SQL injection attempt")
+    CROSS_SITE_SCRIPTING = 'cross_site_scripting', _("Cross-site scripting attempt")
+
+
+def event_extra(event, user=None, ticket=None, username=None):
+    """
+    Get the 'extra' fields of a structured log call.
+
+    Parameters:
+        event (LogEvent): The event type.
+        user (EngineerUser, optional): The user performing the action; anonymous users are not recorded.
+        ticket (Ticket or int, optional): The ticket, or its primary key, the event is about.
+        username (str, optional): The username to record instead of the user's, e.g. for failed logins.
+
+    Returns:
+        dict: The 'event', 'username', 'actor_id' and 'ticket_id' record attributes.
+    """
+    authenticated = user is not None and user.is_authenticated
+    return {
+        'event': event,
+        'username': username if username is not None else (user.username if authenticated else ''),
+        'actor_id': user.pk if authenticated else None,
+        'ticket_id': getattr(ticket, 'pk', ticket),
+    }
@@ -0,0 +1,53 @@
+import logging
+
+from django.utils.module_loading import import_string
+
+
+class LazyLogHandler(logging.Handler):
+    """
+    Log handler that imports and creates the handler it forwards records to when the first record is emitted, so
+    that configuring logging at worker boot does not import the logging backend.
+
+    Attributes:
+        handler_class (str): The dotted path of the handler class.
+        options (dict): The keyword arguments for the handler.
+
+    """
+
+    def __init__(self, handler_class, level=logging.NOTSET, **options):
+        """
+        Constructor method for LazyLogHandler.
+
+        Parameters:
+            handler_class (str): The dotted path of the handler class.
+            level (int, optional): The minimum level of the records handled. Defaults to NOTSET.
+            **options: The keyword arguments for the handler.
+        """
+        super().__init__(level)
+        self.handler_class = handler_class
+        self.options = options
+        self._handler = None
+
+    @property
+    def handler(self):
+        if self._handler is None:
+            handler = import_string(self.handler_class)(level=self.level, **self.options)
+            if self.formatter is not None:
+                handler.setFormatter(self.formatter)
+            self._handler = handler
+        return self._handler
+
+    def emit(self, record):
+        """
+        Forward a log record to the handler, creating it first if needed.
+
+        Parameters:
+            record (LogRecord): The log record.
+
+        """
+        self.handler.emit(record)
+
+    def close(self):
+        if self._handler is not None:
+            self._handler.close()
+        super().close()
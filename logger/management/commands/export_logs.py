@@ -0,0 +1,208 @@
+import csv
+import json
+import logging
+import re
+import time
+from datetime import timedelta, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from logger.models import CustomStatusLog
+from webapplicationproject.routers import read_from_replica
+
+EXPORT_FIELDS = (
+    'id', 'create_datetime', 'level', 'logger_name', 'username', 'event', 'ticket_id', 'actor_id', 'request_id',
+    'msg', 'trace',
+)
+
+RELATIVE_TIME = re.compile(r'^(\d+)([smhd])$')
+RELATIVE_UNITS = {'s': 'seconds', 'm': 'minutes', 'h': 'hours', 'd': 'days'}
+
+
+def parse_time(value):
+    """
+    Parse a --since or --until value.
+
+    Parameters:
+        value (str): An ISO date or datetime (UTC unless it has an offset), or a time ago such as '30m', '2h' or '7d'.
+
+    Returns:
+        datetime: The aware datetime.
+
+    Raises:
+        CommandError: If the value cannot be parsed.
+    """
+    match = RELATIVE_TIME.match(value)
+    if match:
+        return timezone.now() - timedelta(**{RELATIVE_UNITS[match.group(2)]: int(match.group(1))})
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None and parse_date(value) is not None:
+            parsed = parse_datetime(f"{value}T00:00:00")
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise CommandError(f"Invalid time '{value}': use an ISO date or datetime, or e.g. '30m', '2h' or '7d'.")
+    return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed, dt_timezone.utc)
+
+
+def parse_level(value):
+    """
+    Parse a --level value, a level name such as 'WARNING' or a number.
+
+    Raises:
+        CommandError: If the level is unknown.
+    """
+    level = int(value) if value.isdigit() else logging.getLevelName(value.upper())
+    if not isinstance(level, int):
+        raise CommandError(f"Unknown log level '{value}'.")
+    return level
+
+
+def positive_int(value):
+    """
+    Parse a --batch-size or --limit value.
+
+    Raises:
+        CommandError: If the value is not a positive integer.
+    """
+    if not value.isdigit() or int(value) < 1:
+        raise CommandError(f"Invalid number '{value}': use a positive integer.")
+    return int(value)
+
+
+def after_row(queryset, create_datetime, pk):
+    """
+    Filter entries to those after a row in (create_datetime, id) order.
+
+    The row-value comparison '(create_datetime, id) > (%s, %s)' is used instead of the equivalent OR of two
+    conditions, since PostgreSQL and SQLite only read it as one range of the (create_datetime, id) index.
+
+    Parameters:
+        queryset (QuerySet): The CustomStatusLog entries.
+        create_datetime (datetime): The create_datetime of the row.
+        pk (int): The ID of the row.
+
+    Returns:
+        QuerySet: The filtered entries.
+    """
+    connection = connections[queryset.db]
+    created = CustomStatusLog._meta.get_field('create_datetime')
+    parent = created.model._meta
+    quote_name = connection.ops.quote_name
+    table = quote_name(parent.db_table)
+    sql = f'({table}.{quote_name(created.column)}, {table}.{quote_name(parent.pk.column)}) > (%s, %s)'
+    params = (connection.ops.adapt_datetimefield_value(create_datetime), pk)
+    return queryset.filter(RawSQL(sql, params, output_field=BooleanField()))
+
+
+class Command(BaseCommand):
+    """
+    Stream user log entries matching time range, level, username, event, ticket and text filters as JSON lines or CSV.
+
+    Rows are read in pages in (create_datetime, id) order, each page starting after the last row of the previous one
+    (see after_row()), so every page can be read as one range of the 'logger_statuslog_created_id' index however deep
+    the export goes, and each page is read with a server-side cursor on PostgreSQL. Memory use does not grow with the
+    number of rows. Reads go to a replica when one is configured.
+
+    With --follow the command keeps polling for new entries after reaching the end, like 'tail -f'. Entries saved
+    later with an earlier timestamp than the last one exported, e.g. by load_log_segments, are not picked up.
+    """
+
+    help = "Stream user log entries as JSON lines or CSV, filtered by time, level, username, event, ticket or text."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=parse_time, help="ISO date/datetime or a time ago, e.g. '2h' or '7d'.")
+        parser.add_argument('--until', type=parse_time, help="ISO date/datetime or a time ago (exclusive).")
+        parser.add_argument('--level', type=parse_level, help="The minimum level, e.g. WARNING.")
+        parser.add_argument('--username', help="Only entries of this username.")
+        parser.add_argument('--event', help="Only entries of this event type, e.g. login_failed.")
+        parser.add_argument('--ticket', type=int, help="Only entries about this ticket ID.")
+        parser.add_argument('--search', help="Only entries whose message contains this text (not indexed).")
+        parser.add_argument('--format', choices=['jsonl', 'csv'], default='jsonl', help="Defaults to jsonl.")
+        parser.add_argument('--output', help="The file written. Defaults to standard output.")
+        parser.add_argument('--batch-size', type=positive_int, default=1000,
+                            help="The number of rows read per query. Defaults to 1000.")
+        parser.add_argument('--limit', type=positive_int, help="Stop after this many rows.")
+        parser.add_argument('--follow', action='store_true', help="Keep exporting new entries until interrupted.")
+        parser.add_argument('--poll-interval', type=float, default=2,
+                            help="Seconds between checks for new entries with --follow. Defaults to 2.")
+
+    def handle(self, *args, **options):
+        if options['follow'] and options['until']:
+            raise CommandError("--follow cannot be combined with --until.")
+        queryset = self.get_queryset(options)
+        output = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else self.stdout
+        try:
+            write = self.get_writer(output, options['format'])
+            exported = self.export(queryset, write, output, options)
+        except KeyboardInterrupt:
+            exported = None
+        finally:
+            if options['output']:
+                output.close()
+        if exported is not None:
+            self.stderr.write(f"Exported {exported} log entr{'y' if exported == 1 else 'ies'}.")
+
+    def get_queryset(self, options):
+        queryset = CustomStatusLog.objects.all()
+        if options['since']:
+            queryset = queryset.filter(create_datetime__gte=options['since'])
+        if options['until']:
+            queryset = queryset.filter(create_datetime__lt=options['until'])
+        if options['level'] is not None:
+            queryset = queryset.filter(level__gte=options['level'])
+        if options['username'] is not None:
+            queryset = queryset.filter(username=options['username'])
+        if options['event']:
+            queryset = queryset.filter(event=options['event'])
+        if options['ticket'] is not None:
+            queryset = queryset.filter(ticket_id=options['ticket'])
+        if options['search']:
+            queryset = queryset.filter(msg__icontains=options['search'])
+        return queryset.order_by('create_datetime', 'id')
+
+    def get_writer(self, output, output_format):
+        if output_format == 'csv':
+            writer = csv.writer(output)
+            writer.writerow(EXPORT_FIELDS)
+            return lambda row: writer.writerow(
+                [value.isoformat() if field == 'create_datetime' else value for field, value in zip(EXPORT_FIELDS, row)]
+            )
+        return lambda row: output.write(json.dumps(dict(zip(EXPORT_FIELDS, row)), cls=DjangoJSONEncoder) + '\n')
+
+    def export(self, queryset, write, output, options):
+        """
+        Write the matching entries page by page.
+
+        Returns:
+            int: The number of entries written.
+        """
+        exported = 0
+        last = None
+        while True:
+            size = options['batch_size']
+            if options['limit'] is not None:
+                size = min(size, options['limit'] - exported)
+            with read_from_replica():
+                page = queryset if last is None else after_row(queryset, *last)
+                rows = page.values_list(*EXPORT_FIELDS)[:size].iterator(chunk_size=size)
+                count = 0
+                for row in rows:
+                    write(row)
+                    last = (row[1], row[0])
+                    count += 1
+            exported += count
+            output.flush()
+            if options['limit'] is not None and exported >= options['limit']:
+                return exported
+            if count < size:
+                if not options['follow']:
+                    return exported
+                time.sleep(options['poll_interval'])
@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from logger.segments import list_segments, load_segment, recover_segments
+
+
+class Command(BaseCommand):
+    """
+    Bulk load closed log segments written by SegmentLogHandler into CustomStatusLog.
+
+    Rows are inserted with COPY on PostgreSQL and executemany() elsewhere. Each segment is claimed (see
+    logger.segments), loaded in one transaction and then deleted (or moved to 'loaded/' with --keep), oldest first.
+    Segments still being written are left for a later run, as are segments the compressor claimed first. A segment
+    whose load fails is released and retried next time. Segments of processes that died are recovered first.
+
+    Run one loader at a time per segment directory, on the host that writes it. Not needed when the writing processes
+    load their own segments (see SegmentLogHandler.load_to).
+    """
+
+    help = "Bulk load closed JSON lines log segments into the user log table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--directory', default=settings.LOG_SEGMENT_DIR,
+                            help="The segment directory. Defaults to LOG_SEGMENT_DIR.")
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help="The number of records inserted per statement. Defaults to 5000.")
+        parser.add_argument('--keep', action='store_true',
+                            help="Move loaded segments to a 'loaded' subdirectory instead of deleting them.")
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help="The database to load into.")
+
+    def handle(self, *args, **options):
+        for path in recover_segments(options['directory']):
+            if options['verbosity'] > 1:
+                self.stdout.write(f"{path.name}: recovered")
+        total = segments = 0
+        for path in list_segments(options['directory']):
+            loaded = load_segment(path, batch_size=options['batch_size'], keep=options['keep'],
+                                  using=options['database'])
+            if loaded is None:
+                continue
+            total += loaded
+            segments += 1
+            if options['verbosity'] > 1:
+                self.stdout.write(f"{path.name}: {loaded} record(s)")
+        self.stdout.write(self.style.SUCCESS(f"Loaded {total} record(s) from {segments} segment(s)."))
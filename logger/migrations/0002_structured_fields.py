@@ -0,0 +1,33 @@
+# Generated by Django 4.2.6 on 2026-10-19 02:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logger', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customstatuslog',
+            name='actor_id',
+            field=models.BigIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='customstatuslog',
+            name='event',
+            field=models.CharField(blank=True, choices=[('user_registered', 'User registered'), ('registration_failed', 'Registration failed'), ('logged_in', 'Logged in'), ('login_failed', 'Login failed'), ('login_rate_limited', 'Login rate limited'), ('logged_out', 'Logged out'), ('ticket_created', 'Ticket created'), ('ticket_updated', 'Ticket updated'), ('ticket_deleted', 'Ticket deleted'), ('ticket_conflict', 'Ticket edit conflict'), ('ticket_missing', 'Ticket missing'), ('invalid_form', 'Invalid form'), ('on_call_changed', 'On call changed'), ('sql_injection', 'SQL injection attempt'), ('cross_site_scripting', 'Cross-site scripting attempt')], db_index=True, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='customstatuslog',
+            name='request_id',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='customstatuslog',
+            name='ticket_id',
+            field=models.BigIntegerField(blank=True, db_index=True, null=True),
+        ),
+    ]
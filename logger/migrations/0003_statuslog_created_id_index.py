@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Index the StatusLog parent table on (create_datetime, id), the order export_logs pages through user log entries.
+
+    StatusLog belongs to django_db_logger, so the index is created here with SQL rather than in its model's Meta.
+    """
+
+    dependencies = [
+        ('logger', '0002_structured_fields'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS logger_statuslog_created_id '
+            'ON django_db_logger_statuslog (create_datetime, id);',
+            'DROP INDEX IF EXISTS logger_statuslog_created_id;',
+        ),
+    ]
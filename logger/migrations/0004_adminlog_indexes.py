@@ -0,0 +1,32 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Index the admin log on action_time, alone and after each filtered foreign key, for the date hierarchy and filters
+    of the admin log entries changelist.
+
+    The table belongs to django.contrib.admin, so the indexes are created here with SQL rather than in its model's
+    Meta.
+    """
+
+    dependencies = [
+        ('logger', '0003_statuslog_created_id_index'),
+        ('admin', '0003_logentry_add_action_flag_choices'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS logger_adminlog_action_time ON django_admin_log (action_time);',
+            'DROP INDEX IF EXISTS logger_adminlog_action_time;',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS logger_adminlog_user_time ON django_admin_log (user_id, action_time);',
+            'DROP INDEX IF EXISTS logger_adminlog_user_time;',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS logger_adminlog_content_type_time '
+            'ON django_admin_log (content_type_id, action_time);',
+            'DROP INDEX IF EXISTS logger_adminlog_content_type_time;',
+        ),
+    ]
@@ -17,6 +17,8 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django_db_logger.models import StatusLog
 
+from .events import LogEvent
+
 
 class CustomStatusLog(StatusLog):
     """
@@ -24,9 +26,16 @@ class CustomStatusLog(StatusLog):
 
     This model extends the base StatusLog model to add an additional 'username' field.
     It represents log entries related to user activity and provides options for custom ordering.
+    Structured log calls (see logger.events) also store the event type, ticket, acting user and request in indexed
+    columns, so log queries filter on them instead of searching the message text.
 
     Attributes:
         username (str): The username associated with the log entry.
+        event (str): The LogEvent type, or '' for unstructured records.
+        ticket_id (int): The primary key of the ticket the entry is about, if any. Not a foreign key, so entries
+            outlive purged tickets.
+        actor_id (int): The primary key of the user who performed the action, if any.
+        request_id (str): The ID of the request that logged the entry (see logger.request_id), if any.
 
     Meta:
         app_label (str): The label of the application this model belongs to.
@@ -37,6 +46,10 @@ class CustomStatusLog(StatusLog):
     """
 
     username = models.CharField(max_length=150)
+    event = models.CharField(max_length=32, choices=LogEvent.choices, blank=True, db_index=True)
+    ticket_id = models.BigIntegerField(null=True, blank=True, db_index=True)
+    actor_id = models.BigIntegerField(null=True, blank=True, db_index=True)
+    request_id = models.CharField(max_length=64, blank=True, db_index=True)
 
     class Meta:
         app_label = 'logger'
@@ -0,0 +1,45 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimate_count(queryset):
+    """
+    Estimate the number of rows of an unfiltered queryset from PostgreSQL's table statistics.
+
+    Parameters:
+        queryset (QuerySet): The queryset.
+
+    Returns:
+        int: The planner's estimate of the table's rows, or None if the queryset is filtered, the database is not
+            PostgreSQL or the table has not been analysed yet.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql' or queryset.query.where:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                       [connection.ops.quote_name(queryset.model._meta.db_table)])
+        row = cursor.fetchone()
+    return row[0] if row and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator counting an unfiltered queryset from table statistics instead of with COUNT(*).
+
+    The estimate is only used from 'estimate_threshold' rows, where an exact count of the whole table is slow and an
+    approximate page count is good enough. Filtered querysets are always counted exactly.
+
+    Attributes:
+        estimate_threshold (int): The estimated number of rows from which the estimate is used.
+    """
+
+    estimate_threshold = 10000
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list) if hasattr(self.object_list, 'query') else None
+        if estimate is not None and estimate >= self.estimate_threshold:
+            return estimate
+        return super().count
@@ -0,0 +1,55 @@
+"""
+Request IDs.
+
+RequestIDMiddleware gives every request an ID, taken from the X-Request-ID header set by the Heroku router (or another
+proxy) when it is present and valid, so log records can be matched with the router's logs. The ID is available to
+log handlers through get_request_id() while the request is handled, and is returned in the X-Request-ID response
+header.
+"""
+import re
+import uuid
+from contextvars import ContextVar
+
+from django.conf import settings
+
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+_request_id = ContextVar('request_id', default='')
+
+
+def get_request_id():
+    """
+    Get the ID of the request being handled.
+
+    Returns:
+        str: The request ID, or '' outside of a request.
+    """
+    return _request_id.get()
+
+
+class RequestIDMiddleware:
+    """
+    Middleware setting the request ID used by log records for the duration of each request.
+
+    Attributes:
+        response_header (str): The response header returning the request ID.
+    """
+
+    response_header = 'X-Request-ID'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.request_id = self.get_incoming_id(request) or uuid.uuid4().hex
+        token = _request_id.set(request.request_id)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_id.reset(token)
+        response[self.response_header] = request.request_id
+        return response
+
+    def get_incoming_id(self, request):
+        request_id = request.META.get(settings.REQUEST_ID_HEADER, '')
+        return request_id if REQUEST_ID_PATTERN.match(request_id) else None
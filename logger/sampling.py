@@ -0,0 +1,172 @@
+"""
+Log sampling.
+
+Every user log record is a database write, so a flood of requests that each log (failed logins, forms full of
+injection attempts) would multiply the write load. LogSamplingFilter lets each kind of record through at a bounded rate
+and replaces the rest with periodic summary records.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucket:
+    """
+    In-process token bucket holding up to 'capacity' tokens and refilling at 'refill_per_minute'.
+    """
+
+    __slots__ = ('capacity', 'refill_per_minute', 'tokens', 'updated')
+
+    def __init__(self, capacity, refill_per_minute, now):
+        self.capacity = capacity
+        self.refill_per_minute = refill_per_minute
+        self.tokens = capacity
+        self.updated = now
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_minute / 60)
+        self.updated = now
+
+    def take(self):
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class SuppressedRecords:
+    """
+    Count of the records of one message template and level suppressed since the last summary.
+    """
+
+    __slots__ = ('count', 'usernames', 'logger_name', 'event', 'since')
+
+    def __init__(self, record, now):
+        self.count = 0
+        self.usernames = set()
+        self.logger_name = record.name
+        self.event = getattr(record, 'event', '')
+        self.since = now
+
+
+class LogSamplingFilter(logging.Filter):
+    """
+    Logging filter rate limiting records per message template, username and level.
+
+    Records are grouped by their unformatted message ('Ticket created: [%s].' rather than each title), username and
+    level. Each group has a token bucket of 'capacity' records refilling at 'refill_per_minute', and all usernames of a
+    template and level share a second bucket ('template_capacity', 'template_refill_per_minute'), so varying the
+    username does not get around the limit. Once a bucket is empty only every 'sample_every'th record passes; the rest
+    are counted and, every 'summary_interval' seconds, reported by one summary record per template and level, e.g.
+    "Suppressed 4,312 similar events in the last 60s: Invalid username or password."
+
+    Limits are per process. At most 'max_keys' buckets of each kind are kept; the least recently used are dropped
+    first. Summaries are logged by the first record filtered after the interval ends.
+
+    Attributes:
+        summary_message (str): The message of summary records.
+    """
+
+    summary_message = "Suppressed %s similar events in the last %ss: %s"
+
+    def __init__(self, capacity=20, refill_per_minute=10, template_capacity=200, template_refill_per_minute=100,
+                 sample_every=100, summary_interval=60, max_keys=10000, clock=time.monotonic):
+        """
+        Constructor method for LogSamplingFilter.
+
+        Parameters:
+            capacity (int, optional): Burst of records per template, username and level. Defaults to 20.
+            refill_per_minute (float, optional): Sustained records per minute for each of them. Defaults to 10.
+            template_capacity (int, optional): Burst of records per template and level. Defaults to 200.
+            template_refill_per_minute (float, optional): Sustained records per minute for each. Defaults to 100.
+            sample_every (int, optional): Pass one in this many records over the limits; 0 passes none. Defaults
+                to 100.
+            summary_interval (float, optional): Seconds between summaries of the suppressed records. Defaults to 60.
+            max_keys (int, optional): The maximum number of buckets of each kind kept. Defaults to 10000.
+            clock (callable, optional): Returns the current time in seconds. Defaults to time.monotonic.
+        """
+        super().__init__()
+        self.capacity = capacity
+        self.refill_per_minute = refill_per_minute
+        self.template_capacity = template_capacity
+        self.template_refill_per_minute = template_refill_per_minute
+        self.sample_every = sample_every
+        self.summary_interval = summary_interval
+        self.max_keys = max_keys
+        self.clock = clock
+        self.buckets = OrderedDict()
+        self.template_buckets = OrderedDict()
+        self.suppressed = {}
+        self.lock = threading.Lock()
+        self.next_summary = clock() + summary_interval
+
+    def filter(self, record):
+        """
+        Decide whether a record is logged.
+
+        Parameters:
+            record (LogRecord): The log record.
+
+        Returns:
+            bool: True if the record should be logged.
+        """
+        if getattr(record, 'suppressed', None) is not None:
+            return True
+        now = self.clock()
+        template = (str(record.msg), record.levelno)
+        key = (*template, getattr(record, 'username', ''))
+
+        with self.lock:
+            summaries = self.collect_summaries(now) if now >= self.next_summary else []
+            allowed = self.take(key, template, now)
+            if not allowed:
+                suppressed = self.suppressed.get(template)
+                if suppressed is None:
+                    suppressed = self.suppressed[template] = SuppressedRecords(record, now)
+                suppressed.count += 1
+                if len(suppressed.usernames) < 100:
+                    suppressed.usernames.add(key[2])
+                allowed = bool(self.sample_every) and suppressed.count % self.sample_every == 0
+
+        for summary in summaries:
+            logging.getLogger(summary.name).handle(summary)
+        return allowed
+
+    def take(self, key, template, now):
+        bucket = self.get_bucket(self.buckets, key, self.capacity, self.refill_per_minute, now)
+        template_bucket = self.get_bucket(self.template_buckets, template, self.template_capacity,
+                                          self.template_refill_per_minute, now)
+        if bucket.tokens >= 1 and template_bucket.tokens >= 1:
+            return bucket.take() and template_bucket.take()
+        return False
+
+    def get_bucket(self, buckets, key, capacity, refill_per_minute, now):
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = TokenBucket(capacity, refill_per_minute, now)
+            if len(buckets) > self.max_keys:
+                buckets.popitem(last=False)
+        else:
+            buckets.move_to_end(key)
+            bucket.refill(now)
+        return bucket
+
+    def collect_summaries(self, now):
+        """
+        Build a summary record for each template and level with suppressed records, and reset the counts.
+
+        Returns:
+            list: The summary records.
+        """
+        summaries = []
+        for (msg, level), suppressed in self.suppressed.items():
+            summary = logging.LogRecord(suppressed.logger_name, level, __file__, 0, self.summary_message,
+                                        (f"{suppressed.count:,}", round(now - suppressed.since), msg), None)
+            summary.suppressed = suppressed.count
+            summary.event = suppressed.event
+            summary.username = next(iter(suppressed.usernames)) if len(suppressed.usernames) == 1 else ''
+            summaries.append(summary)
+        self.suppressed = {}
+        self.next_summary = now + self.summary_interval
+        return summaries
@@ -0,0 +1,149 @@
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .db_log_handler import get_log_fields
+from .segments import CLOSED_SUFFIX, OPEN_SUFFIX, compress_segment
+
+
+class SegmentLogHandler(logging.Handler):
+    """
+    Log handler appending records to rotating JSON lines segment files (see logger.segments), as an alternative to
+    CustomDatabaseLogHandler that does not write to the database while handling requests.
+
+    Each record is written to the operating system as it is emitted, and the segment is fsynced every
+    'fsync_records' records or 'fsync_interval' seconds, so a crash of the machine loses at most one batch. A segment
+    is closed when it reaches 'max_bytes' or is 'max_seconds' old, and then compressed in a background thread. Each
+    process writes its own segment, so workers never interleave lines. The segment of a worker that is killed before
+    closing it is closed by the next load_log_segments run (see logger.segments.recover_segments).
+
+    With 'load_to' set to a task backend (e.g. 'thread'), each closed segment is loaded into the database by the
+    process that wrote it instead of being compressed, so the directory need not outlive the process or be shared
+    with a separate loader. The last segment is loaded when the handler is closed.
+
+    Attributes:
+        directory (Path): The segment directory.
+        max_bytes (int): The size at which a segment is closed.
+        max_seconds (float): The age at which a segment is closed.
+        fsync_records (int): The number of records written between fsyncs.
+        fsync_interval (float): The maximum number of seconds between fsyncs.
+        compress (bool): Whether closed segments are compressed.
+        load_to (str): The task backend loading closed segments, or None to leave them to load_log_segments.
+
+    """
+
+    def __init__(self, directory, level=logging.NOTSET, max_bytes=8 * 1024 * 1024, max_seconds=300,
+                 fsync_records=100, fsync_interval=1.0, compress=True, load_to=None):
+        """
+        Constructor method for SegmentLogHandler.
+
+        Parameters:
+            directory (str): The segment directory, created if needed.
+            level (int, optional): The minimum level of the records handled. Defaults to NOTSET.
+            max_bytes (int, optional): The size at which a segment is closed. Defaults to 8 MB.
+            max_seconds (float, optional): The age at which a segment is closed. Defaults to 300.
+            fsync_records (int, optional): The number of records written between fsyncs. Defaults to 100.
+            fsync_interval (float, optional): The maximum number of seconds between fsyncs. Defaults to 1.
+            compress (bool, optional): Whether closed segments are compressed. Defaults to True.
+            load_to (str, optional): The task backend loading closed segments. Defaults to leaving them to
+                load_log_segments.
+        """
+        super().__init__(level)
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.fsync_records = fsync_records
+        self.fsync_interval = fsync_interval
+        self.compress = compress
+        self.load_to = load_to
+        self.stream = None
+        self.path = None
+        self.pid = None
+        self.compressors = []
+
+    def emit(self, record):
+        """
+        Append a log record to the current segment.
+
+        Parameters:
+            record (LogRecord): The log record.
+
+        """
+        try:
+            fields = get_log_fields(record)
+            fields['create_datetime'] = datetime.fromtimestamp(record.created, timezone.utc)
+            line = (json.dumps(fields, cls=DjangoJSONEncoder) + '\n').encode()
+            if self.stream is None or self.pid != os.getpid():
+                self.open_segment()
+            elif self.size + len(line) > self.max_bytes or time.monotonic() - self.opened >= self.max_seconds:
+                self.close_segment()
+                self.open_segment()
+            self.stream.write(line)
+            self.stream.flush()
+            self.size += len(line)
+            self.unsynced += 1
+            if self.unsynced >= self.fsync_records or time.monotonic() - self.synced >= self.fsync_interval:
+                self.sync()
+        except Exception:
+            self.handleError(record)
+
+    def open_segment(self):
+        # A stream inherited from the parent process is left for the parent to close
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.pid = os.getpid()
+        started = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+        self.path = self.directory / f'log-{started}-{self.pid}{OPEN_SUFFIX}'
+        self.stream = open(self.path, 'ab')
+        self.size = 0
+        self.unsynced = 0
+        self.opened = self.synced = time.monotonic()
+
+    def sync(self):
+        os.fsync(self.stream.fileno())
+        self.unsynced = 0
+        self.synced = time.monotonic()
+
+    def close_segment(self, load_inline=False):
+        """
+        Fsync and close the current segment, mark it closed and start loading or compressing it.
+
+        Parameters:
+            load_inline (bool, optional): Load the segment before returning instead of with 'load_to'. Defaults to
+                False.
+        """
+        if self.unsynced:
+            self.sync()
+        self.stream.close()
+        self.stream = None
+        closed = self.path.with_name(self.path.name[:-len(OPEN_SUFFIX)] + CLOSED_SUFFIX)
+        os.replace(self.path, closed)
+        if self.load_to:
+            from .tasks import load_log_segments
+
+            if load_inline:
+                load_log_segments(str(self.directory))
+            else:
+                load_log_segments.enqueue(str(self.directory), backend=self.load_to)
+        elif self.compress:
+            compressor = threading.Thread(target=compress_segment, args=(closed,), name='log-segment-compressor')
+            compressor.start()
+            self.compressors = [thread for thread in self.compressors if thread.is_alive()] + [compressor]
+
+    def close(self):
+        self.acquire()
+        try:
+            if self.stream is not None and self.pid == os.getpid():
+                # A background load would be lost when the process exits
+                self.close_segment(load_inline=True)
+            for compressor in self.compressors:
+                compressor.join()
+            self.compressors = []
+        finally:
+            self.release()
+            super().close()
@@ -0,0 +1,358 @@
+"""
+Log segment files.
+
+SegmentLogHandler appends log records as JSON lines to segment files instead of inserting a CustomStatusLog row per
+record. Each process writes its own segment:
+
+- 'log-<started>-<pid>.jsonl.part' is being written;
+- 'log-<started>-<pid>.jsonl' is closed and waiting to be compressed;
+- 'log-<started>-<pid>.jsonl.compressing' is being compressed;
+- 'log-<started>-<pid>.jsonl.gz' is closed and compressed.
+
+Closed segments are bulk loaded into CustomStatusLog by load_segment(), from 'manage.py load_log_segments' or from the
+writing process itself (see SegmentLogHandler.load_to), which renames each segment to '<name>.loading' while it loads
+it. Segment names sort in the order they were started.
+
+The compressor and the loader both claim a closed segment by renaming it before they read it, so only one of them ever
+gets it. Segments left open, compressing or loading by a process that died are recovered by recover_segments().
+"""
+import gzip
+import io
+import json
+import os
+import shutil
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+OPEN_SUFFIX = '.jsonl.part'
+CLOSED_SUFFIX = '.jsonl'
+COMPRESSED_SUFFIX = '.jsonl.gz'
+COMPRESSING_SUFFIX = '.jsonl.compressing'
+LOADING_SUFFIX = '.loading'
+
+
+def list_segments(directory, include_open=False):
+    """
+    List the segment files in a directory, oldest first.
+
+    Parameters:
+        directory (str): The segment directory.
+        include_open (bool, optional): Whether to also list segments that are still being written or compressed.
+            Defaults to False.
+
+    Returns:
+        list: The segment paths.
+    """
+    directory = Path(directory)
+    if not directory.is_dir():
+        return []
+    segments = []
+    for path in directory.iterdir():
+        name = path.name
+        if name.endswith((COMPRESSED_SUFFIX, CLOSED_SUFFIX)):
+            segments.append(path)
+        elif include_open and name.endswith((OPEN_SUFFIX, COMPRESSING_SUFFIX)):
+            segments.append(path)
+    return sorted(segments, key=lambda path: path.name)
+
+
+def compress_segment(path):
+    """
+    Compress a closed segment with gzip and remove the uncompressed file.
+
+    The segment is first claimed by renaming it to '.jsonl.compressing', so it cannot be loaded at the same time, and
+    the compressed file is written under a temporary name and renamed when complete, so a partly written file is never
+    mistaken for a segment.
+
+    Parameters:
+        path (Path): The closed segment.
+
+    Returns:
+        Path: The compressed segment, or None if the segment was claimed by the loader first.
+    """
+    path = Path(path)
+    base = path.name[:-len(CLOSED_SUFFIX)]
+    claimed = path.with_name(base + COMPRESSING_SUFFIX)
+    try:
+        os.rename(path, claimed)
+    except FileNotFoundError:
+        return None
+    compressed = path.with_name(base + COMPRESSED_SUFFIX)
+    temporary = path.with_name(base + COMPRESSED_SUFFIX + '.tmp')
+    with open(claimed, 'rb') as source, gzip.open(temporary, 'wb') as target:
+        shutil.copyfileobj(source, target)
+    os.replace(temporary, compressed)
+    claimed.unlink()
+    return compressed
+
+
+def claim_segment(path):
+    """
+    Claim a closed segment for loading by renaming it to '<name>.loading'.
+
+    Returns:
+        Path: The claimed segment, or None if it was claimed by the compressor, or another loader, first.
+    """
+    path = Path(path)
+    claimed = path.with_name(path.name + LOADING_SUFFIX)
+    try:
+        os.rename(path, claimed)
+    except FileNotFoundError:
+        return None
+    return claimed
+
+
+def get_segment_pid(name, suffix):
+    """
+    Get the ID of the process that wrote a segment from its name, 'log-<started>-<pid><suffix>'.
+    """
+    try:
+        return int(name[:-len(suffix)].rsplit('-', 1)[1])
+    except (IndexError, ValueError):
+        return None
+
+
+def is_process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, but belongs to another user
+        return True
+    return True
+
+
+def recover_segments(directory, release_loading=True):
+    """
+    Recover the segments left behind by processes that died, e.g. gunicorn workers killed after a timeout.
+
+    - Open segments of processes that no longer exist are closed, so their records are loaded.
+    - Segments being compressed by processes that no longer exist are closed again, or removed if their compressed
+      file is complete, along with partly written compressed files.
+    - Segments left loading by an earlier load_log_segments run are released, so they are loaded again. Only release
+      them from the loader, with no other loader running.
+
+    Processes are looked up by the ID in the segment name, so it only recovers the segments written on this host.
+    Segments recovered by another process at the same time are skipped.
+
+    Parameters:
+        directory (str): The segment directory.
+        release_loading (bool, optional): Whether segments left loading are released. Defaults to True.
+
+    Returns:
+        list: The recovered segment paths.
+    """
+    directory = Path(directory)
+    if not directory.is_dir():
+        return []
+    recovered = []
+    for path in sorted(directory.iterdir()):
+        name = path.name
+        if name.endswith(LOADING_SUFFIX):
+            if release_loading:
+                released = path.with_name(name[:-len(LOADING_SUFFIX)])
+                os.replace(path, released)
+                recovered.append(released)
+            continue
+        for suffix in (OPEN_SUFFIX, COMPRESSING_SUFFIX, COMPRESSED_SUFFIX + '.tmp'):
+            if name.endswith(suffix):
+                break
+        else:
+            continue
+        pid = get_segment_pid(name, suffix)
+        if pid is None or is_process_alive(pid):
+            continue
+        base = name[:-len(suffix)]
+        if suffix == COMPRESSED_SUFFIX + '.tmp':
+            path.unlink(missing_ok=True)
+        elif suffix == COMPRESSING_SUFFIX and path.with_name(base + COMPRESSED_SUFFIX).exists():
+            path.unlink(missing_ok=True)
+        else:
+            closed = path.with_name(base + CLOSED_SUFFIX)
+            try:
+                os.rename(path, closed)
+            except FileNotFoundError:
+                continue
+            recovered.append(closed)
+    return recovered
+
+
+def load_segment(path, batch_size=5000, keep=False, using=DEFAULT_DB_ALIAS):
+    """
+    Claim a closed segment, load its records in one transaction and then delete it.
+
+    A segment whose load fails is released, so it is loaded again later.
+
+    Parameters:
+        path (Path): The closed segment.
+        batch_size (int, optional): The number of records inserted per statement. Defaults to 5000.
+        keep (bool, optional): Move the segment to a 'loaded' subdirectory instead of deleting it. Defaults to False.
+        using (str, optional): The database alias. Defaults to 'default'.
+
+    Returns:
+        int: The number of records loaded, or None if the segment was claimed by the compressor, or another loader,
+        first.
+    """
+    path = Path(path)
+    claimed = claim_segment(path)
+    if claimed is None:
+        return None
+    try:
+        records = read_segment(claimed)
+        with transaction.atomic(using=using):
+            loaded = 0
+            while batch := list(islice(records, batch_size)):
+                loaded += load_records(batch, using=using)
+    except BaseException:
+        os.replace(claimed, path)
+        raise
+    if keep:
+        (path.parent / 'loaded').mkdir(exist_ok=True)
+        claimed.rename(path.parent / 'loaded' / path.name)
+    else:
+        claimed.unlink()
+    return loaded
+
+
+def read_segment(path):
+    """
+    Read the log records in a segment.
+
+    Lines that are not valid JSON are skipped, such as the last line of an open segment while it is being written.
+
+    Parameters:
+        path (Path): The segment.
+
+    Yields:
+        dict: The CustomStatusLog field values of each record, with 'create_datetime' as a datetime.
+    """
+    opener = gzip.open if str(path).removesuffix(LOADING_SUFFIX).endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as segment:
+        for line in segment:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            record['create_datetime'] = datetime.fromisoformat(record['create_datetime'])
+            yield record
+
+
+def read_recent_records(directory, limit=200, segments=5, matches=None):
+    """
+    Read the newest log records from the newest segments, including those still being written.
+
+    Parameters:
+        directory (str): The segment directory.
+        limit (int, optional): The maximum number of records. Defaults to 200.
+        segments (int, optional): The number of newest segments read. Defaults to 5.
+        matches (callable, optional): Returns whether a record is included. Defaults to all records.
+
+    Returns:
+        list: The records, newest first.
+    """
+    records = []
+    for path in list_segments(directory, include_open=True)[-segments:]:
+        try:
+            records.extend(record for record in read_segment(path) if matches is None or matches(record))
+        except FileNotFoundError:
+            # Compressed or loaded since it was listed
+            continue
+    records.sort(key=lambda record: record['create_datetime'], reverse=True)
+    return records[:limit]
+
+
+def get_row_values(model, record, connection, overrides):
+    """
+    Get the database values of a model's own columns for a record.
+
+    Returns:
+        list: The values, in the order of model._meta.local_concrete_fields.
+    """
+    return [
+        field.get_db_prep_save(overrides.get(field.attname, record.get(field.attname)), connection)
+        for field in model._meta.local_concrete_fields
+    ]
+
+
+def reserve_ids(model, count, connection):
+    """
+    Reserve primary keys for rows inserted with explicit IDs.
+
+    On PostgreSQL the IDs are taken from the table's sequence, so concurrent inserts get other IDs. Elsewhere they
+    follow the current maximum, which is only safe while no other process inserts into the table.
+
+    Returns:
+        list: The IDs.
+    """
+    table = model._meta.db_table
+    pk_column = model._meta.pk.column
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)',
+                           [connection.ops.quote_name(table), pk_column, count])
+            return [row[0] for row in cursor.fetchall()]
+        cursor.execute(f'SELECT COALESCE(MAX({connection.ops.quote_name(pk_column)}), 0) '
+                       f'FROM {connection.ops.quote_name(table)}')
+        start = cursor.fetchone()[0] + 1
+    return list(range(start, start + count))
+
+
+def copy_value(value):
+    """
+    Format a value for PostgreSQL's COPY text format.
+    """
+    if value is None:
+        return '\\N'
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def insert_rows(model, rows, connection):
+    """
+    Insert rows into a model's own table: with COPY on PostgreSQL and executemany() elsewhere.
+    """
+    table = connection.ops.quote_name(model._meta.db_table)
+    columns = [connection.ops.quote_name(field.column) for field in model._meta.local_concrete_fields]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            data = io.StringIO(''.join('\t'.join(copy_value(value) for value in row) + '\n' for row in rows))
+            cursor.cursor.copy_expert(f'COPY {table} ({", ".join(columns)}) FROM STDIN', data)
+        else:
+            placeholders = ', '.join(['%s'] * len(columns))
+            cursor.executemany(f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({placeholders})', rows)
+
+
+def load_records(records, using='default'):
+    """
+    Insert log records into CustomStatusLog and its StatusLog parent table.
+
+    CustomStatusLog uses multi-table inheritance, which bulk_create() does not support, so the parent IDs are
+    reserved first and both tables are written with explicit IDs. Run it in a transaction.
+
+    Parameters:
+        records (list): The records, as returned by read_segment().
+        using (str, optional): The database alias. Defaults to 'default'.
+
+    Returns:
+        int: The number of records inserted.
+    """
+    from django_db_logger.models import StatusLog
+
+    from .models import CustomStatusLog
+
+    if not records:
+        return 0
+    connection = connections[using]
+    parent_link = CustomStatusLog._meta.parents[StatusLog]
+    ids = reserve_ids(StatusLog, len(records), connection)
+    insert_rows(StatusLog, [get_row_values(StatusLog, record, connection, {'id': pk})
+                            for pk, record in zip(ids, records)], connection)
+    insert_rows(CustomStatusLog, [get_row_values(CustomStatusLog, record, connection, {parent_link.attname: pk})
+                                  for pk, record in zip(ids, records)], connection)
+    return len(records)
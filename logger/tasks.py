@@ -0,0 +1,31 @@
+from tasks.queue import task
+
+
+@task
+def write_status_log(**kwargs):
+    """
+    Save a log record deferred by CustomDatabaseLogHandler.
+
+    Parameters:
+        **kwargs: The CustomStatusLog field values.
+    """
+    from .models import CustomStatusLog
+
+    CustomStatusLog.objects.create(**kwargs)
+
+
+@task
+def load_log_segments(directory):
+    """
+    Load the closed log segments in a directory, enqueued by SegmentLogHandler when it closes a segment.
+
+    Open segments of processes that died are closed first, but segments being loaded are left to their loader.
+
+    Parameters:
+        directory (str): The segment directory.
+    """
+    from .segments import list_segments, load_segment, recover_segments
+
+    recover_segments(directory, release_loading=False)
+    for path in list_segments(directory):
+        load_segment(path)
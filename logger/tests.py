@@ -1,15 +1,40 @@
+import csv
+import json
 import logging
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
 from django.contrib import admin
 from django.contrib.admin import AdminSite
 from django.contrib.auth.models import Group
 from django.test import TestCase, RequestFactory
-from django.contrib.admin.models import LogEntry
+from django.contrib.admin.models import ADDITION, LogEntry
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.http import HttpResponse
 from django_db_logger.models import StatusLog
 
+from application.models import EngineerUser, Ticket
 from logger.admin import LogEntryAdmin, CustomStatusLogAdmin
 from logger.db_log_handler import CustomDatabaseLogHandler
+from logger.events import LogEvent, event_extra
+from logger.lazy_log_handler import LazyLogHandler
 from logger.models import CustomStatusLog, CustomLogEntry
+from logger.paginator import EstimatedCountPaginator, estimate_count
+from logger.request_id import RequestIDMiddleware, get_request_id
+from logger.sampling import LogSamplingFilter
+from logger.segment_log_handler import SegmentLogHandler
+from logger.segments import claim_segment, compress_segment, list_segments, read_segment
 
 
 class CustomStatusLogTestCase(TestCase):
@@ -55,6 +80,69 @@ class CustomDatabaseLogHandlerTestCase(TestCase):
         self.assertEqual(log_entry.msg, 'Test log message')
         self.assertIsNone(log_entry.trace)
         self.assertEqual(log_entry.username, 'testuser')
+        self.assertEqual(log_entry.event, '')
+        self.assertIsNone(log_entry.ticket_id)
+
+    def test_emit_structured_fields(self):
+        handler = CustomDatabaseLogHandler()
+        logger = logging.getLogger('custom_logger.structured')
+        logger.addHandler(handler)
+        logger.propagate = False
+        self.addCleanup(logger.removeHandler, handler)
+        user = EngineerUser.objects.create(username='testuser')
+
+        with mock.patch('logger.db_log_handler.get_request_id', return_value='request-1'):
+            logger.info('Ticket updated: [%s].', 'Title', extra=event_extra(LogEvent.TICKET_UPDATED, user, 42))
+
+        log_entry = CustomStatusLog.objects.get()
+        self.assertEqual(log_entry.msg, 'Ticket updated: [Title].')
+        self.assertEqual(log_entry.event, LogEvent.TICKET_UPDATED)
+        self.assertEqual(log_entry.ticket_id, 42)
+        self.assertEqual(log_entry.actor_id, user.pk)
+        self.assertEqual(log_entry.username, 'testuser')
+        self.assertEqual(log_entry.request_id, 'request-1')
+
+    def test_deferred_structured_fields(self):
+        handler = CustomDatabaseLogHandler(defer_to='immediate')
+        logger = logging.getLogger('custom_logger.deferred')
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+
+        logger.warning('Conflict', extra=event_extra(LogEvent.TICKET_CONFLICT, ticket=5))
+
+        log_entry = CustomStatusLog.objects.filter(event=LogEvent.TICKET_CONFLICT).first()
+        self.assertEqual(log_entry.ticket_id, 5)
+
+
+class RequestIDMiddlewareTestCase(TestCase):
+    def test_request_id(self):
+        seen = []
+        middleware = RequestIDMiddleware(lambda request: seen.append(get_request_id()) or HttpResponse())
+
+        response = middleware(RequestFactory().get('/'))
+        self.assertRegex(seen[0], r'^[0-9a-f]{32}$')
+        self.assertEqual(response['X-Request-ID'], seen[0])
+        self.assertEqual(get_request_id(), '')
+
+        # The router's ID is kept; invalid ones are replaced
+        response = middleware(RequestFactory().get('/', HTTP_X_REQUEST_ID='router-id-1'))
+        self.assertEqual(response['X-Request-ID'], 'router-id-1')
+        response = middleware(RequestFactory().get('/', HTTP_X_REQUEST_ID='bad id\n'))
+        self.assertNotEqual(response['X-Request-ID'], 'bad id\n')
+
+    def test_view_logs_request_id(self):
+        user = EngineerUser.objects.create_user(username='testuser', password='password')
+        self.client.force_login(user)
+
+        response = self.client.post('/ticket_form/', {'title': 'Title', 'priority': Ticket.Priority.LOW,
+                                                      'status': Ticket.Status.TD, 'description': 'Description'},
+                                    HTTP_X_REQUEST_ID='request-2')
+
+        self.assertEqual(response.status_code, 302)
+        log_entry = CustomStatusLog.objects.get(event=LogEvent.TICKET_CREATED)
+        self.assertEqual(log_entry.request_id, 'request-2')
+        self.assertEqual(log_entry.actor_id, user.pk)
+        self.assertEqual(log_entry.ticket_id, Ticket.objects.get().pk)
 
 
 class CustomStatusLogAdminTestCase(TestCase):
@@ -67,13 +155,31 @@ class CustomStatusLogAdminTestCase(TestCase):
         self.assertEqual(self.admin.list_display_links, ('colored_msg', 'create_datetime_format'))
 
     def test_list_display(self):
-        self.assertEqual(self.admin.list_display, ('create_datetime_format', 'username', 'colored_msg', 'traceback'))
+        self.assertEqual(self.admin.list_display,
+                         ('create_datetime_format', 'username', 'event', 'ticket_id', 'colored_msg', 'traceback'))
 
     def test_list_filter(self):
-        self.assertEqual(self.admin.list_filter, ('level', 'username'))
+        self.assertEqual(self.admin.list_filter, ('level', 'event', 'username'))
 
     def test_search_fields(self):
-        self.assertEqual(self.admin.search_fields, ('username', 'colored_msg', 'traceback'))
+        self.assertEqual(self.admin.search_fields, ('username', 'msg', 'trace'))
+
+    def test_structured_search(self):
+        CustomStatusLog.objects.create(logger_name='root', level=logging.INFO, msg='Ticket created: [Title].',
+                                       event=LogEvent.TICKET_CREATED, ticket_id=7, actor_id=3, request_id='abc')
+        CustomStatusLog.objects.create(logger_name='root', level=logging.INFO, msg='Ticket created: [ticket:7].')
+        request = self.factory.get('/admin/logger/customstatuslog/')
+        queryset = CustomStatusLog.objects.all()
+
+        for term in ('ticket:7', 'actor: 3', 'request:abc', 'event:ticket_created'):
+            results, may_have_duplicates = self.admin.get_search_results(request, queryset, term)
+            self.assertEqual([entry.ticket_id for entry in results], [7])
+            self.assertFalse(may_have_duplicates)
+            self.assertNotIn('LIKE', str(results.query))
+        results, _ = self.admin.get_search_results(request, queryset, 'ticket:seven')
+        self.assertFalse(results.exists())
+        results, _ = self.admin.get_search_results(request, queryset, 'Title')
+        self.assertEqual(results.count(), 1)
 
     def test_has_add_permission(self):
         request = self.factory.get('/admin/logger/customstatuslog/add/')
@@ -118,8 +224,393 @@ class LogEntryAdminTestCase(TestCase):
         request = self.factory.get('/admin/logger/customlogentry/1/delete/')
         self.assertFalse(self.admin.has_delete_permission(request))
 
+    def test_changelist_caches_date_hierarchy(self):
+        admin_user = EngineerUser.objects.create_superuser(username='admin', password='password')
+        content_type = ContentType.objects.get_for_model(Ticket)
+        for year in (2024, 2025):
+            LogEntry.objects.create(user=admin_user, content_type=content_type, object_repr=f'Ticket {year}',
+                                    action_flag=ADDITION, action_time=datetime(year, 6, 1, tzinfo=dt_timezone.utc))
+        self.client.force_login(admin_user)
+        cache.clear()
+
+        response = self.client.get('/admin/logger/customlogentry/')
+        self.assertContains(response, '?action_time__year=2025')
+        self.assertEqual(response.context['cl'].full_result_count, None)
+
+        LogEntry.objects.create(user=admin_user, content_type=content_type, object_repr='Ticket 2026',
+                                action_flag=ADDITION, action_time=datetime(2026, 6, 1, tzinfo=dt_timezone.utc))
+        response = self.client.get('/admin/logger/customlogentry/')
+        self.assertContains(response, 'Ticket 2026')
+        self.assertNotContains(response, '?action_time__year=2026')
+        # Each filter has its own cache entry
+        response = self.client.get('/admin/logger/customlogentry/', {'action_time__year': '2026'})
+        self.assertContains(response, '?action_time__month=6&amp;action_time__year=2026')
+        cache.clear()
+        response = self.client.get('/admin/logger/customlogentry/')
+        self.assertContains(response, '?action_time__year=2026')
+
+    def test_estimated_count_paginator(self):
+        queryset = CustomLogEntry.objects.all()
+        self.assertIsNone(estimate_count(queryset))
+        with mock.patch('logger.paginator.estimate_count', return_value=250000):
+            self.assertEqual(EstimatedCountPaginator(queryset, 100).count, 250000)
+            self.assertEqual(EstimatedCountPaginator(queryset, 100).num_pages, 2500)
+        with mock.patch('logger.paginator.estimate_count', return_value=500):
+            self.assertEqual(EstimatedCountPaginator(queryset, 100).count, 0)
+
 
 class AdminSiteTestCase(TestCase):
     def test_unregister(self):
         self.assertNotIn(StatusLog, admin.site._registry)
         self.assertNotIn(Group, admin.site._registry)
+
+
+class LazyLogHandlerTestCase(TestCase):
+    def test_handler_created_on_first_record(self):
+        handler = LazyLogHandler('logger.db_log_handler.CustomDatabaseLogHandler', level=logging.INFO)
+        self.assertIsNone(handler._handler)
+
+        handler.handle(logging.LogRecord('custom_logger', logging.INFO, __file__, 1, 'Lazy message', (), None))
+
+        self.assertIsInstance(handler._handler, CustomDatabaseLogHandler)
+        self.assertEqual(handler._handler.level, logging.INFO)
+        self.assertTrue(CustomStatusLog.objects.filter(msg='Lazy message').exists())
+
+
+class SegmentLogHandlerTestCase(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.logger = logging.getLogger('custom_logger.segments')
+        self.logger.propagate = False
+
+    def add_handler(self, **options):
+        handler = SegmentLogHandler(self.directory, **options)
+        self.logger.addHandler(handler)
+        self.addCleanup(self.logger.removeHandler, handler)
+        return handler
+
+    def test_records_appended_to_segment(self):
+        handler = self.add_handler(fsync_records=2, fsync_interval=60)
+
+        with mock.patch('logger.segment_log_handler.os.fsync') as fsync:
+            for i in range(5):
+                self.logger.info('Ticket updated: [%s].', i, extra=event_extra(LogEvent.TICKET_UPDATED, ticket=i))
+        # Synced in batches of two records
+        self.assertEqual(fsync.call_count, 2)
+
+        [segment] = list_segments(self.directory, include_open=True)
+        self.assertTrue(segment.name.endswith('.jsonl.part'))
+        self.assertEqual(list_segments(self.directory), [])
+        records = list(read_segment(segment))
+        self.assertEqual([record['msg'] for record in records], [f'Ticket updated: [{i}].' for i in range(5)])
+        self.assertEqual(records[0]['event'], LogEvent.TICKET_UPDATED)
+        self.assertEqual(records[4]['ticket_id'], 4)
+        self.assertIsNotNone(records[0]['create_datetime'].tzinfo)
+
+        handler.close()
+        [segment] = list_segments(self.directory)
+        self.assertTrue(segment.name.endswith('.jsonl.gz'))
+        self.assertEqual(len(list(read_segment(segment))), 5)
+        self.assertFalse(CustomStatusLog.objects.exists())
+
+    def test_rotation(self):
+        handler = self.add_handler(max_bytes=1000)
+
+        for i in range(20):
+            self.logger.warning('Record %s', i)
+        handler.close()
+
+        segments = list_segments(self.directory)
+        self.assertGreater(len(segments), 1)
+        self.assertTrue(all(segment.name.endswith('.jsonl.gz') for segment in segments))
+        messages = [record['msg'] for segment in segments for record in read_segment(segment)]
+        self.assertEqual(messages, [f'Record {i}' for i in range(20)])
+
+    def test_load_log_segments(self):
+        handler = self.add_handler(compress=False)
+        user = EngineerUser.objects.create(username='testuser')
+        self.logger.info('Ticket created: [Title].', extra=event_extra(LogEvent.TICKET_CREATED, user, 9))
+        try:
+            raise ValueError('Broken')
+        except ValueError:
+            self.logger.exception('Line\twith\\special\ncharacters')
+        handler.close()
+        CustomStatusLog.objects.create(logger_name='root', level=logging.INFO, msg='Existing')
+
+        out = StringIO()
+        call_command('load_log_segments', '--directory', str(self.directory), '--batch-size', '1', stdout=out)
+
+        self.assertIn('Loaded 2 record(s) from 1 segment(s).', out.getvalue())
+        self.assertEqual(list_segments(self.directory), [])
+        created = CustomStatusLog.objects.get(event=LogEvent.TICKET_CREATED)
+        self.assertEqual((created.msg, created.ticket_id, created.actor_id, created.username),
+                         ('Ticket created: [Title].', 9, user.pk, 'testuser'))
+        error = CustomStatusLog.objects.get(level=logging.ERROR)
+        self.assertEqual(error.msg, 'Line\twith\\special\ncharacters')
+        self.assertIn('ValueError: Broken', error.trace)
+        self.assertEqual(CustomStatusLog.objects.count(), 3)
+        # New rows get IDs after the loaded ones
+        self.assertEqual(CustomStatusLog.objects.create(logger_name='root', level=logging.INFO, msg='After').pk,
+                         created.pk + 2)
+
+    def test_load_log_segments_keep(self):
+        handler = self.add_handler()
+        self.logger.info('Kept')
+        handler.close()
+
+        call_command('load_log_segments', '--directory', str(self.directory), '--keep', stdout=StringIO())
+
+        self.assertTrue(CustomStatusLog.objects.filter(msg='Kept').exists())
+        self.assertEqual(len(list((self.directory / 'loaded').iterdir())), 1)
+
+    def test_segments_loaded_by_writing_process(self):
+        handler = self.add_handler(max_bytes=1000, load_to='immediate')
+
+        for i in range(20):
+            self.logger.warning('Record %s', i)
+        # Closed segments are loaded as they are closed, leaving only the open one
+        self.assertEqual(list_segments(self.directory), [])
+        self.assertGreater(CustomStatusLog.objects.count(), 0)
+        handler.close()
+
+        self.assertEqual(list(self.directory.iterdir()), [])
+        self.assertEqual(list(CustomStatusLog.objects.order_by('id').values_list('msg', flat=True)),
+                         [f'Record {i}' for i in range(20)])
+
+    def test_writing_process_loads_segments_of_dead_workers(self):
+        process = subprocess.Popen([sys.executable, '-c', 'pass'])
+        process.wait()
+        dead = self.directory / f'log-20260101T000000000000-{process.pid}.jsonl.part'
+        loading = self.directory / f'log-20260101T000000000001-{os.getpid()}.jsonl.loading'
+        handler = self.add_handler(load_to='immediate')
+        self.logger.info('Written before the worker died')
+        handler.stream.close()
+        handler.stream = None
+        handler.path.rename(dead)
+        self.logger.removeHandler(handler)
+        loading.touch()
+
+        handler = self.add_handler(load_to='immediate')
+        self.logger.info('Written by the next worker')
+        handler.close()
+
+        self.assertEqual(set(CustomStatusLog.objects.values_list('msg', flat=True)),
+                         {'Written before the worker died', 'Written by the next worker'})
+        # A segment being loaded by another process is left to it
+        self.assertEqual(list(self.directory.iterdir()), [loading])
+
+    def load_segments(self):
+        out = StringIO()
+        call_command('load_log_segments', '--directory', str(self.directory), stdout=out)
+        return out.getvalue()
+
+    def test_loader_and_compressor_claim_segments_once(self):
+        handler = self.add_handler(compress=False)
+        self.logger.info('Raced')
+        handler.close()
+        self.logger.removeHandler(handler)
+        closed = list_segments(self.directory)[0]
+
+        # The compressor claims the segment after the loader listed it: the loader skips it and loads the compressed
+        # segment on its next run
+        with mock.patch('logger.management.commands.load_log_segments.list_segments', return_value=[closed]):
+            compress_segment(closed)
+            self.assertIn('Loaded 0 record(s) from 0 segment(s).', self.load_segments())
+        self.assertIn('Loaded 1 record(s) from 1 segment(s).', self.load_segments())
+
+        # The loader claims a segment first: the compressor leaves it alone
+        handler = self.add_handler(compress=False)
+        self.logger.info('Raced again')
+        handler.close()
+        closed = list_segments(self.directory)[0]
+        claim_segment(closed)
+        self.assertIsNone(compress_segment(closed))
+        self.assertIn('Loaded 1 record(s) from 1 segment(s).', self.load_segments())
+
+        self.assertEqual(CustomStatusLog.objects.filter(msg__startswith='Raced').count(), 2)
+        self.assertEqual(list(self.directory.iterdir()), [])
+
+    def test_failed_load_releases_segment(self):
+        handler = self.add_handler(compress=False)
+        self.logger.info('Retried')
+        handler.close()
+
+        with mock.patch('logger.segments.load_records', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.load_segments()
+        self.assertEqual(len(list_segments(self.directory)), 1)
+        self.assertIn('Loaded 1 record(s) from 1 segment(s).', self.load_segments())
+
+    def test_segments_of_dead_processes_recovered(self):
+        process = subprocess.Popen([sys.executable, '-c', 'pass'])
+        process.wait()
+        handler = self.add_handler()
+        self.logger.info('Written before the worker died')
+        # The worker dies without closing its segment
+        handler.stream.close()
+        handler.stream = None
+        handler.path.rename(self.directory / f'log-20260101T000000000000-{process.pid}.jsonl.part')
+        (self.directory / f'log-20260101T000000000000-{os.getpid()}.jsonl.part').touch()
+
+        self.assertIn('Loaded 1 record(s) from 1 segment(s).', self.load_segments())
+        self.assertTrue(CustomStatusLog.objects.filter(msg='Written before the worker died').exists())
+        # The segment of a live process is left open
+        self.assertEqual([path.name for path in self.directory.iterdir()],
+                         [f'log-20260101T000000000000-{os.getpid()}.jsonl.part'])
+
+    def test_admin_segments_view(self):
+        handler = self.add_handler()
+        self.logger.info('Jane logged in', extra=event_extra(LogEvent.LOGGED_IN, username='jane'))
+        self.logger.warning('John sent an invalid form', extra=event_extra(LogEvent.INVALID_FORM, username='john'))
+        admin_user = EngineerUser.objects.create_superuser(username='admin', password='password')
+        self.client.force_login(admin_user)
+
+        with self.settings(LOG_SEGMENT_DIR=str(self.directory)):
+            response = self.client.get('/admin/logger/customstatuslog/segments/')
+            self.assertContains(response, 'Jane logged in')
+            self.assertContains(response, 'John sent an invalid form')
+            response = self.client.get('/admin/logger/customstatuslog/segments/', {'username': 'jane'})
+            self.assertContains(response, 'Jane logged in')
+            self.assertNotContains(response, 'John sent an invalid form')
+            response = self.client.get('/admin/logger/customstatuslog/')
+            self.assertContains(response, '/admin/logger/customstatuslog/segments/')
+        handler.close()
+
+
+class LogSamplingFilterTestCase(TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.sampling = LogSamplingFilter(capacity=3, refill_per_minute=60, template_capacity=5,
+                                          template_refill_per_minute=60, sample_every=10, summary_interval=60,
+                                          clock=lambda: self.now)
+        self.logger = logging.getLogger('custom_logger.sampling')
+        self.logger.propagate = False
+        self.handler = CustomDatabaseLogHandler()
+        self.handler.addFilter(self.sampling)
+        self.logger.addHandler(self.handler)
+        self.addCleanup(self.logger.removeHandler, self.handler)
+
+    def log_failed_logins(self, count, username=''):
+        for _ in range(count):
+            self.logger.error('Invalid username or password.', extra=event_extra(LogEvent.LOGIN_FAILED,
+                                                                                username=username))
+
+    def test_rate_limited_per_username(self):
+        self.log_failed_logins(50, username='jane')
+        self.logger.error('Invalid form.', extra={'username': 'jane'})
+        self.logger.warning('Invalid username or password.', extra={'username': 'jane'})
+
+        # 3 within the burst, then every 10th of the 47 suppressed records
+        self.assertEqual(CustomStatusLog.objects.filter(event=LogEvent.LOGIN_FAILED).count(), 3 + 4)
+        # Other templates and levels have their own buckets
+        self.assertEqual(CustomStatusLog.objects.filter(msg='Invalid form.').count(), 1)
+        self.assertEqual(CustomStatusLog.objects.filter(level=logging.WARNING).count(), 1)
+
+        # Tokens refill with time
+        self.now = 2
+        self.log_failed_logins(3, username='jane')
+        self.assertEqual(CustomStatusLog.objects.filter(event=LogEvent.LOGIN_FAILED).count(), 7 + 2)
+
+    def test_template_limit_across_usernames(self):
+        for i in range(20):
+            self.log_failed_logins(1, username=f'user{i}')
+
+        self.assertEqual(CustomStatusLog.objects.filter(event=LogEvent.LOGIN_FAILED).count(), 5 + 1)
+
+    def test_summary_record(self):
+        self.log_failed_logins(4315)
+        self.assertEqual(CustomStatusLog.objects.filter(msg__startswith='Suppressed').count(), 0)
+
+        self.now = 61
+        self.logger.info('Ticket created: [%s].', 'Title')
+
+        summary = CustomStatusLog.objects.get(msg__startswith='Suppressed')
+        self.assertEqual(summary.msg,
+                         'Suppressed 4,312 similar events in the last 61s: Invalid username or password.')
+        self.assertEqual(summary.level, logging.ERROR)
+        self.assertEqual(summary.event, LogEvent.LOGIN_FAILED)
+        self.assertEqual(self.sampling.suppressed, {})
+
+
+class ExportLogsTestCase(TestCase):
+    def setUp(self):
+        self.start = datetime(2026, 1, 1, 12, 0, tzinfo=dt_timezone.utc)
+        self.add_log('First', minutes=0, username='jane')
+        # Same timestamp as the next entry, so pages must break ties on ID
+        self.add_log('Second', minutes=1, username='john', level=logging.WARNING)
+        self.add_log('Third', minutes=1, username='jane', level=logging.ERROR)
+        self.add_log('Fourth', minutes=2, username='jane', event=LogEvent.LOGIN_FAILED)
+
+    def add_log(self, msg, minutes, username='', level=logging.INFO, event=''):
+        log = CustomStatusLog.objects.create(logger_name='root', level=level, msg=msg, username=username, event=event)
+        CustomStatusLog.objects.filter(pk=log.pk).update(create_datetime=self.start + timedelta(minutes=minutes))
+        return log
+
+    def export(self, *args):
+        stdout = StringIO()
+        call_command('export_logs', *args, stdout=stdout, stderr=StringIO())
+        return stdout.getvalue()
+
+    def export_messages(self, *args):
+        return [json.loads(line)['msg'] for line in self.export(*args).splitlines()]
+
+    def test_export_jsonl_in_pages(self):
+        self.assertEqual(self.export_messages('--batch-size', '1'), ['First', 'Second', 'Third', 'Fourth'])
+        record = json.loads(self.export().splitlines()[0])
+        self.assertEqual((record['create_datetime'], record['username'], record['level']),
+                         ('2026-01-01T12:00:00Z', 'jane', logging.INFO))
+
+    def test_page_continues_after_last_row(self):
+        with CaptureQueriesContext(connection) as context:
+            self.export('--batch-size', '2')
+
+        self.assertIn('("django_db_logger_statuslog"."create_datetime", "django_db_logger_statuslog"."id") > (',
+                      context.captured_queries[1]['sql'])
+
+    def test_invalid_batch_size_and_limit(self):
+        for option, value in [('--batch-size', '0'), ('--batch-size', '-5'), ('--limit', '0'), ('--limit', 'x')]:
+            with self.subTest(option=option, value=value), self.assertRaisesMessage(CommandError, 'positive integer'):
+                self.export(option, value)
+
+    def test_export_filters(self):
+        self.assertEqual(self.export_messages('--username', 'jane', '--batch-size', '2'), ['First', 'Third', 'Fourth'])
+        self.assertEqual(self.export_messages('--level', 'WARNING'), ['Second', 'Third'])
+        self.assertEqual(self.export_messages('--since', '2026-01-01T12:01:00', '--until', '2026-01-01T12:02:00'),
+                         ['Second', 'Third'])
+        self.assertEqual(self.export_messages('--event', 'login_failed'), ['Fourth'])
+        self.assertEqual(self.export_messages('--search', 'IR'), ['First', 'Third'])
+        self.assertEqual(self.export_messages('--limit', '3', '--batch-size', '2'), ['First', 'Second', 'Third'])
+        self.assertEqual(self.export_messages('--since', '1h'), [])
+
+    def test_export_csv(self):
+        rows = list(csv.reader(StringIO(self.export('--format', 'csv', '--level', 'ERROR'))))
+        self.assertEqual(rows[0][:3], ['id', 'create_datetime', 'level'])
+        self.assertEqual(rows[1][1], '2026-01-01T12:01:00+00:00')
+        self.assertEqual(rows[1][rows[0].index('msg')], 'Third')
+        self.assertEqual(len(rows), 2)
+
+    def test_invalid_options(self):
+        with self.assertRaises(CommandError):
+            self.export('--level', 'LOUD')
+        with self.assertRaises(CommandError):
+            self.export('--since', 'yesterday')
+        with self.assertRaises(CommandError):
+            self.export('--follow', '--until', '1h')
+
+    def test_follow(self):
+        polls = []
+
+        def sleep(seconds):
+            polls.append(seconds)
+            if len(polls) == 1:
+                self.add_log('Fifth', minutes=3)
+            else:
+                raise KeyboardInterrupt
+
+        with mock.patch('logger.management.commands.export_logs.time.sleep', sleep):
+            messages = self.export_messages('--follow', '--poll-interval', '5')
+
+        self.assertEqual(messages, ['First', 'Second', 'Third', 'Fourth', 'Fifth'])
+        self.assertEqual(polls, [5, 5])
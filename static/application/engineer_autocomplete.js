@@ -0,0 +1,29 @@
+// Turns selects with the 'engineer-autocomplete' class into select2 widgets searching the engineer autocomplete view
+'use strict';
+{
+    const $ = django.jQuery;
+
+    $(function() {
+        $('select.engineer-autocomplete').each(function() {
+            const $select = $(this);
+            $select.select2({
+                ajax: {
+                    url: $select.data('autocomplete-url'),
+                    dataType: 'json',
+                    delay: 250,
+                    data: function(params) {
+                        return {term: params.term, page: params.page};
+                    }
+                },
+                allowClear: !$select.prop('required'),
+                placeholder: $select.data('placeholder'),
+                width: $select.data('width') || '20em'
+            });
+            if ($select.data('submit-on-change')) {
+                $select.on('change', function() {
+                    this.form.submit();
+                });
+            }
+        });
+    });
+}
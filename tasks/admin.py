@@ -0,0 +1,32 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    """
+    Admin panel for inspecting background tasks queued in the database.
+
+    Tasks are read-only; failed tasks can be queued again with the 'retry' action.
+
+    """
+
+    list_display = ('name', 'status', 'attempts', 'max_attempts', 'run_after', 'finished_at')
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'idempotency_key')
+    actions = ['retry']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.action(description="Retry selected failed tasks", permissions=['delete'])
+    def retry(self, request, queryset):
+        retried = queryset.filter(status=Task.Status.FAILED).update(
+            status=Task.Status.PENDING, attempts=0, run_after=timezone.now(), finished_at=None,
+        )
+        self.message_user(request, f"Queued {retried} task(s) again.")
@@ -0,0 +1,67 @@
+import os
+import signal
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from tasks.queue import claim_tasks, purge_finished_tasks, run_task
+
+
+class Command(BaseCommand):
+    """
+    Run background tasks queued with the 'database' task backend.
+
+    Any number of workers can run at once; each task is claimed by exactly one of them. On SIGTERM or SIGINT the worker
+    finishes the tasks it has claimed and exits. Run it as a long-lived process, e.g. the Procfile 'worker' process.
+    """
+
+    help = "Run background tasks queued in the database until stopped, or until none are due with --burst."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--burst', action='store_true', help="Exit once no tasks are due.")
+        parser.add_argument('--batch-size', type=int, default=10,
+                            help="The number of tasks claimed at a time. Defaults to 10.")
+        parser.add_argument('--poll-interval', type=float, default=1,
+                            help="Seconds to wait before checking again when no tasks are due. Defaults to 1.")
+        parser.add_argument('--purge-interval', type=float, default=3600,
+                            help="Seconds between deleting old finished tasks. Defaults to 3600.")
+
+    def handle(self, *args, **options):
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = False
+        handlers = {signum: signal.signal(signum, self.stop) for signum in (signal.SIGTERM, signal.SIGINT)}
+        try:
+            succeeded, failed = self.work(worker_id, options)
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+        self.stdout.write(self.style.SUCCESS(f"Ran {succeeded + failed} task(s), {failed} failed."))
+
+    def work(self, worker_id, options):
+        succeeded = failed = 0
+        next_purge = 0
+        while not self.stopping:
+            if time.monotonic() >= next_purge:
+                purge_finished_tasks()
+                next_purge = time.monotonic() + options['purge_interval']
+
+            claimed = claim_tasks(worker_id, limit=options['batch_size'])
+            for claimed_task in claimed:
+                if run_task(claimed_task):
+                    succeeded += 1
+                else:
+                    failed += 1
+                if options['verbosity'] >= 2:
+                    self.stdout.write(f"Ran {claimed_task.name} (attempt {claimed_task.attempts}).")
+            close_old_connections()
+
+            if not claimed:
+                if options['burst']:
+                    break
+                time.sleep(options['poll_interval'])
+        return succeeded, failed
+
+    def stop(self, signum, frame):
+        self.stopping = True
@@ -0,0 +1,57 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class Task(models.Model):
+    """
+    Model representing a deferred call of a registered task function, queued by the 'database' task backend.
+
+    Workers started with 'manage.py run_tasks' claim due tasks, run them and retry failed ones with exponential
+    backoff until 'max_attempts' is reached (see tasks.queue).
+
+    Attributes:
+        name (models.CharField): The registered name of the task function.
+        args (models.JSONField): The positional arguments of the call.
+        kwargs (models.JSONField): The keyword arguments of the call.
+        status (models.CharField): The state of the task (see Task.Status).
+        attempts (models.PositiveIntegerField): The number of times a worker has started the task.
+        max_attempts (models.PositiveIntegerField): The number of attempts after which the task is marked failed.
+        run_after (models.DateTimeField): The task is not run before this time.
+        idempotency_key (models.CharField): Optional unique key; enqueuing a task with a key already used is a no-op.
+        locked_by (models.CharField): The worker running the task.
+        locked_at (models.DateTimeField): When the worker claimed the task.
+        last_error (models.TextField): The traceback of the last failed attempt.
+        created (models.DateTimeField): When the task was queued.
+        finished_at (models.DateTimeField): When the task succeeded or finally failed.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', _('Pending')
+        RUNNING = 'running', _('Running')
+        SUCCEEDED = 'succeeded', _('Succeeded')
+        FAILED = 'failed', _('Failed')
+
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    kwargs = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    idempotency_key = models.CharField(max_length=200, unique=True, null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ('run_after', 'id')
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='task_due'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
@@ -0,0 +1,376 @@
+"""
+Lightweight background task queue.
+
+Functions decorated with @task can be deferred with enqueue() (or the function's own enqueue()) and are run later by
+one of the task backends, selected with TASKS['BACKEND'] or per call:
+
+- 'database' stores tasks in the Task table, in the same transaction as the caller's writes. Workers started with
+  'manage.py run_tasks' claim and run them, retrying failures with exponential backoff. Tasks survive restarts.
+- 'thread' runs tasks in a daemon thread of the current process, also with retries. Nothing is persisted, so it suits
+  best-effort work such as writing log records.
+- 'immediate' runs tasks synchronously when they are enqueued, e.g. in tests and local development without a worker.
+
+Task arguments must be JSON serializable. Passing an idempotency key makes enqueuing the same work twice a no-op.
+"""
+import functools
+import logging
+import queue
+import threading
+import traceback
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from tasks.models import Task
+
+logger = logging.getLogger(__name__)
+
+TASK_DEFAULTS = {
+    'BACKEND': 'database',
+    'MAX_ATTEMPTS': 5,
+    'RETRY_BACKOFF': 5,
+    'RETRY_BACKOFF_MAX': 3600,
+    'LOCK_TIMEOUT': 600,
+    'KEEP_FINISHED_DAYS': 7,
+}
+
+_registry = {}
+
+
+class UnknownTask(LookupError):
+    """
+    Raised when a task name is not registered with @task.
+    """
+
+
+def get_task_settings():
+    """
+    Get the TASKS settings merged with the defaults.
+
+    Returns:
+        dict: The task queue settings.
+    """
+    return {**TASK_DEFAULTS, **getattr(settings, 'TASKS', {})}
+
+
+def task(func=None, *, name=None, max_attempts=None):
+    """
+    Register a function as a task so it can be deferred, e.g. notify.enqueue(ticket_id).
+
+    Parameters:
+        func (callable): The task function.
+        name (str, optional): The registered name. Defaults to the function's dotted path.
+        max_attempts (int, optional): Attempts before the task is marked failed. Defaults to TASKS['MAX_ATTEMPTS'].
+
+    Returns:
+        callable: The function, with 'task_name' and 'enqueue' attributes added.
+    """
+    def decorator(func):
+        func.task_name = name or f"{func.__module__}.{func.__qualname__}"
+        func.task_max_attempts = max_attempts
+        func.enqueue = functools.partial(enqueue, func.task_name)
+        _registry[func.task_name] = func
+        return func
+
+    return decorator(func) if func is not None else decorator
+
+
+def get_task(name):
+    """
+    Get a registered task function.
+
+    Parameters:
+        name (str): The registered name.
+
+    Returns:
+        callable: The task function.
+
+    Raises:
+        UnknownTask: If no task is registered under the name.
+    """
+    try:
+        return _registry[name]
+    except KeyError:
+        raise UnknownTask(f"No task is registered as '{name}'.") from None
+
+
+def get_retry_delay(attempts):
+    """
+    Get the exponential backoff before retrying a task.
+
+    Parameters:
+        attempts (int): The number of failed attempts so far.
+
+    Returns:
+        float: The number of seconds to wait.
+    """
+    options = get_task_settings()
+    return min(options['RETRY_BACKOFF'] * 2 ** (attempts - 1), options['RETRY_BACKOFF_MAX'])
+
+
+def enqueue(name, *args, idempotency_key=None, delay=0, backend=None, **kwargs):
+    """
+    Defer a call of a registered task.
+
+    Parameters:
+        name (str): The registered name of the task.
+        *args: The positional arguments of the call.
+        idempotency_key (str, optional): Ignore the call if a task was already queued with this key.
+        delay (float, optional): Seconds to wait before running the task. Defaults to 0.
+        backend (str, optional): The backend to use. Defaults to TASKS['BACKEND'].
+        **kwargs: The keyword arguments of the call.
+
+    Returns:
+        Task: The queued (or previously queued) Task row for the 'database' backend, otherwise None.
+    """
+    func = get_task(name)
+    max_attempts = func.task_max_attempts or get_task_settings()['MAX_ATTEMPTS']
+    return get_backend(backend).enqueue(name, args, kwargs, idempotency_key=idempotency_key, delay=delay,
+                                        max_attempts=max_attempts)
+
+
+class DatabaseBackend:
+    """
+    Task backend storing tasks in the Task table for 'manage.py run_tasks' workers.
+    """
+
+    def enqueue(self, name, args, kwargs, idempotency_key=None, delay=0, max_attempts=5):
+        values = {
+            'name': name,
+            'args': list(args),
+            'kwargs': kwargs,
+            'max_attempts': max_attempts,
+            'run_after': timezone.now() + timedelta(seconds=delay),
+        }
+        if idempotency_key is None:
+            return Task.objects.create(**values)
+        queued_task, _ = Task.objects.get_or_create(idempotency_key=idempotency_key, defaults=values)
+        return queued_task
+
+
+class LocalBackend:
+    """
+    Base class for backends running tasks in the current process. Idempotency keys are remembered in memory for the
+    most recent 'key_limit' tasks.
+    """
+
+    key_limit = 10000
+
+    def __init__(self):
+        self._keys = OrderedDict()
+        self._keys_lock = threading.Lock()
+
+    def is_duplicate(self, idempotency_key):
+        if idempotency_key is None:
+            return False
+        with self._keys_lock:
+            if idempotency_key in self._keys:
+                return True
+            self._keys[idempotency_key] = True
+            if len(self._keys) > self.key_limit:
+                self._keys.popitem(last=False)
+        return False
+
+
+class ImmediateBackend(LocalBackend):
+    """
+    Task backend running tasks synchronously when they are enqueued. Errors propagate to the caller.
+    """
+
+    def enqueue(self, name, args, kwargs, idempotency_key=None, delay=0, max_attempts=5):
+        if not self.is_duplicate(idempotency_key):
+            get_task(name)(*args, **kwargs)
+
+
+class ThreadBackend(LocalBackend):
+    """
+    Task backend running tasks one at a time in a daemon thread, retrying failures with exponential backoff.
+
+    Queued tasks are lost if the process exits first; call join() to wait for them.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._queue = queue.Queue()
+        self._thread = None
+        self._unfinished = 0
+        self._condition = threading.Condition()
+
+    def enqueue(self, name, args, kwargs, idempotency_key=None, delay=0, max_attempts=5):
+        if self.is_duplicate(idempotency_key):
+            return
+        with self._condition:
+            self._unfinished += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._work, name='task-queue', daemon=True)
+                self._thread.start()
+        self._schedule((name, args, kwargs, 1, max_attempts), delay)
+
+    def join(self, timeout=None):
+        """
+        Wait until every queued task, including delayed tasks and pending retries, has finished.
+
+        Parameters:
+            timeout (float, optional): The maximum number of seconds to wait. Defaults to no limit.
+
+        Returns:
+            bool: True if every task finished.
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._unfinished, timeout)
+
+    def _schedule(self, job, delay):
+        if delay <= 0:
+            self._queue.put(job)
+            return
+        timer = threading.Timer(delay, self._queue.put, (job,))
+        timer.daemon = True
+        timer.start()
+
+    def _work(self):
+        while True:
+            name, args, kwargs, attempt, max_attempts = self._queue.get()
+            try:
+                get_task(name)(*args, **kwargs)
+            except Exception:
+                if attempt < max_attempts:
+                    self._schedule((name, args, kwargs, attempt + 1, max_attempts), get_retry_delay(attempt))
+                    continue
+                logger.exception("Task %s failed after %d attempts.", name, attempt)
+            finally:
+                close_old_connections()
+            with self._condition:
+                self._unfinished -= 1
+                self._condition.notify_all()
+
+
+BACKENDS = {
+    'database': DatabaseBackend,
+    'thread': ThreadBackend,
+    'immediate': ImmediateBackend,
+}
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(name=None):
+    """
+    Get a task backend, creating it on first use.
+
+    Parameters:
+        name (str, optional): 'database', 'thread' or 'immediate'. Defaults to TASKS['BACKEND'].
+
+    Returns:
+        The backend instance, shared by the whole process.
+    """
+    name = name or get_task_settings()['BACKEND']
+    with _backends_lock:
+        if name not in _backends:
+            if name not in BACKENDS:
+                raise ImproperlyConfigured(f"Unknown task backend '{name}'; use one of {', '.join(BACKENDS)}.")
+            _backends[name] = BACKENDS[name]()
+        return _backends[name]
+
+
+def claim_tasks(worker_id, limit=10):
+    """
+    Claim due tasks for a worker, including running tasks whose worker has not finished within TASKS['LOCK_TIMEOUT'].
+
+    Each task is claimed with a conditional UPDATE, so concurrent workers never claim the same task. A stale running
+    task that has used all its attempts (e.g. it keeps crashing its worker) is marked failed instead of claimed.
+
+    Parameters:
+        worker_id (str): Identifies the worker.
+        limit (int, optional): The maximum number of tasks to claim. Defaults to 10.
+
+    Returns:
+        list: The claimed Task rows, oldest first.
+    """
+    now = timezone.now()
+    lock_timeout = get_task_settings()['LOCK_TIMEOUT']
+    stale = now - timedelta(seconds=lock_timeout)
+    exhausted = Task.objects.filter(status=Task.Status.RUNNING, locked_at__lt=stale, attempts__gte=F('max_attempts'))
+    for pk, name, attempts, locked_at in exhausted.values_list('pk', 'name', 'attempts', 'locked_at')[:limit]:
+        if exhausted.filter(pk=pk, locked_at=locked_at).update(
+            status=Task.Status.FAILED, finished_at=now, locked_by='', locked_at=None,
+            last_error=f"The worker did not finish attempt {attempts} within {lock_timeout} seconds.",
+        ):
+            logger.error("Task %s failed after %d attempts.", name, attempts)
+    candidates = (
+        Task.objects
+        .filter(
+            Q(status=Task.Status.PENDING, run_after__lte=now)
+            | Q(status=Task.Status.RUNNING, locked_at__lt=stale, attempts__lt=F('max_attempts'))
+        )
+        .values_list('pk', 'status', 'locked_at')[:limit]
+    )
+    claimed = [
+        pk for pk, status, locked_at in candidates
+        if Task.objects.filter(pk=pk, status=status, locked_at=locked_at).update(
+            status=Task.Status.RUNNING, locked_by=worker_id, locked_at=now, attempts=F('attempts') + 1,
+        )
+    ]
+    return list(Task.objects.filter(pk__in=claimed))
+
+
+def run_task(claimed_task):
+    """
+    Run a claimed task in a transaction, then mark it succeeded, or schedule a retry or mark it failed.
+
+    Parameters:
+        claimed_task (Task): A task returned by claim_tasks().
+
+    Returns:
+        bool: True if the task succeeded.
+    """
+    try:
+        func = get_task(claimed_task.name)
+        with transaction.atomic():
+            func(*claimed_task.args, **claimed_task.kwargs)
+    except Exception:
+        now = timezone.now()
+        failed = claimed_task.attempts >= claimed_task.max_attempts
+        if failed:
+            logger.error("Task %s failed after %d attempts.", claimed_task.name, claimed_task.attempts)
+        Task.objects.filter(pk=claimed_task.pk, locked_by=claimed_task.locked_by).update(
+            status=Task.Status.FAILED if failed else Task.Status.PENDING,
+            run_after=now if failed else now + timedelta(seconds=get_retry_delay(claimed_task.attempts)),
+            finished_at=now if failed else None,
+            last_error=traceback.format_exc(),
+            locked_by='',
+            locked_at=None,
+        )
+        return False
+    Task.objects.filter(pk=claimed_task.pk, locked_by=claimed_task.locked_by).update(
+        status=Task.Status.SUCCEEDED, finished_at=timezone.now(), last_error='', locked_by='', locked_at=None,
+    )
+    return True
+
+
+def purge_finished_tasks():
+    """
+    Delete tasks that finished more than TASKS['KEEP_FINISHED_DAYS'] ago. Until then their idempotency keys still
+    prevent duplicates.
+
+    Returns:
+        int: The number of deleted tasks.
+    """
+    cutoff = timezone.now() - timedelta(days=get_task_settings()['KEEP_FINISHED_DAYS'])
+    deleted, _ = Task.objects.filter(
+        status__in=[Task.Status.SUCCEEDED, Task.Status.FAILED], finished_at__lt=cutoff,
+    ).delete()
+    return deleted
+
+
+def wait_for_local_tasks():
+    """
+    Wait for the tasks queued with the 'thread' backend of this process, if it was used.
+    """
+    backend = _backends.get('thread')
+    if backend is not None:
+        backend.join()
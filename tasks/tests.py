@@ -0,0 +1,189 @@
+import logging
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from logger.db_log_handler import CustomDatabaseLogHandler
+from logger.models import CustomStatusLog
+from tasks import queue
+from tasks.models import Task
+
+calls = []
+
+
+@queue.task(name='tests.record_call')
+def record_call(value, suffix=''):
+    calls.append(f"{value}{suffix}")
+
+
+@queue.task(name='tests.always_fail', max_attempts=2)
+def always_fail():
+    raise ValueError("Task failed")
+
+
+@override_settings(TASKS={'BACKEND': 'database', 'RETRY_BACKOFF': 5, 'RETRY_BACKOFF_MAX': 60})
+class DatabaseTaskQueueTestCase(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def run_worker(self):
+        out = StringIO()
+        call_command('run_tasks', '--burst', stdout=out)
+        return out.getvalue()
+
+    def test_enqueue_and_run(self):
+        queued = record_call.enqueue('a', suffix='!')
+
+        self.assertEqual(queued.status, Task.Status.PENDING)
+        self.assertEqual(queued.args, ['a'])
+        self.assertEqual(queued.kwargs, {'suffix': '!'})
+        self.assertEqual(calls, [])
+
+        self.assertIn("Ran 1 task(s), 0 failed.", self.run_worker())
+        self.assertEqual(calls, ['a!'])
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.Status.SUCCEEDED)
+        self.assertEqual(queued.attempts, 1)
+        self.assertIsNotNone(queued.finished_at)
+
+    def test_delayed_task_not_run_early(self):
+        record_call.enqueue('a', delay=60)
+
+        self.assertIn("Ran 0 task(s)", self.run_worker())
+        self.assertEqual(calls, [])
+
+    def test_idempotency_key(self):
+        first = record_call.enqueue('a', idempotency_key='ticket-1')
+        second = record_call.enqueue('b', idempotency_key='ticket-1')
+
+        self.assertEqual(first.pk, second.pk)
+        self.run_worker()
+        self.assertEqual(calls, ['a'])
+
+    def test_retry_with_backoff(self):
+        queued = always_fail.enqueue()
+
+        self.assertIn("Ran 1 task(s), 1 failed.", self.run_worker())
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.Status.PENDING)
+        self.assertEqual(queued.attempts, 1)
+        self.assertIn("ValueError: Task failed", queued.last_error)
+        self.assertAlmostEqual((queued.run_after - timezone.now()).total_seconds(), 5, delta=2)
+
+        Task.objects.filter(pk=queued.pk).update(run_after=timezone.now())
+        self.run_worker()
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.Status.FAILED)
+        self.assertEqual(queued.attempts, 2)
+        self.assertIsNotNone(queued.finished_at)
+
+    def test_retry_delay_doubles_up_to_maximum(self):
+        self.assertEqual([queue.get_retry_delay(attempts) for attempts in range(1, 6)], [5, 10, 20, 40, 60])
+
+    def test_claim_is_exclusive(self):
+        record_call.enqueue('a')
+
+        self.assertEqual(len(queue.claim_tasks('worker-1')), 1)
+        self.assertEqual(queue.claim_tasks('worker-2'), [])
+
+    def test_stale_running_task_reclaimed(self):
+        queued = record_call.enqueue('a')
+        queue.claim_tasks('worker-1')
+        Task.objects.filter(pk=queued.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+
+        claimed = queue.claim_tasks('worker-2')
+
+        self.assertEqual([claimed_task.locked_by for claimed_task in claimed], ['worker-2'])
+        self.assertEqual(claimed[0].attempts, 2)
+
+    def test_stale_task_without_attempts_left_failed(self):
+        queued = always_fail.enqueue()
+        Task.objects.filter(pk=queued.pk).update(
+            status=Task.Status.RUNNING, attempts=2, locked_by='worker-1', locked_at=timezone.now() - timedelta(hours=1),
+        )
+
+        with self.assertLogs('tasks.queue', logging.ERROR):
+            self.assertEqual(queue.claim_tasks('worker-2'), [])
+
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.Status.FAILED)
+        self.assertEqual(queued.attempts, 2)
+        self.assertEqual(queued.locked_by, '')
+        self.assertIn("did not finish attempt 2", queued.last_error)
+        self.assertIsNotNone(queued.finished_at)
+
+    def test_purge_finished_tasks(self):
+        old = timezone.now() - timedelta(days=30)
+        Task.objects.create(name='tests.record_call', status=Task.Status.SUCCEEDED, finished_at=old)
+        Task.objects.create(name='tests.record_call', status=Task.Status.SUCCEEDED, finished_at=timezone.now())
+        Task.objects.create(name='tests.record_call', status=Task.Status.PENDING)
+
+        self.assertEqual(queue.purge_finished_tasks(), 1)
+        self.assertEqual(Task.objects.count(), 2)
+
+    def test_unknown_task(self):
+        with self.assertRaises(queue.UnknownTask):
+            queue.enqueue('tests.missing')
+
+
+class LocalTaskQueueTestCase(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_immediate_backend(self):
+        record_call.enqueue('a', backend='immediate', idempotency_key='immediate-1')
+        record_call.enqueue('b', backend='immediate', idempotency_key='immediate-1')
+
+        self.assertEqual(calls, ['a'])
+        self.assertFalse(Task.objects.exists())
+
+    def test_thread_backend(self):
+        record_call.enqueue('a', backend='thread')
+        record_call.enqueue('b', backend='thread', delay=0.05)
+
+        self.assertTrue(queue.get_backend('thread').join(timeout=5))
+        self.assertEqual(calls, ['a', 'b'])
+
+    def test_thread_backend_retries(self):
+        with mock.patch('tasks.queue.get_retry_delay', return_value=0), \
+                mock.patch.object(queue.logger, 'exception') as log_exception:
+            always_fail.enqueue(backend='thread')
+            self.assertTrue(queue.get_backend('thread').join(timeout=5))
+
+        log_exception.assert_called_once_with("Task %s failed after %d attempts.", 'tests.always_fail', 2)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ImproperlyConfigured):
+            record_call.enqueue('a', backend='broker')
+
+
+class DeferredLogHandlerTestCase(TestCase):
+    def test_emit_deferred(self):
+        handler = CustomDatabaseLogHandler(defer_to='database')
+        record = logging.LogRecord('application.views', logging.INFO, __file__, 1, 'Ticket %s saved', (1,), None)
+        record.username = 'user'
+
+        handler.emit(record)
+
+        self.assertFalse(CustomStatusLog.objects.exists())
+        queued = Task.objects.get()
+        self.assertEqual(queued.name, 'logger.tasks.write_status_log')
+        self.assertEqual(queued.kwargs['msg'], 'Ticket 1 saved')
+
+        call_command('run_tasks', '--burst', stdout=StringIO())
+        log = CustomStatusLog.objects.get()
+        self.assertEqual((log.msg, log.username), ('Ticket 1 saved', 'user'))
+
+    def test_task_queue_records_saved_inline(self):
+        handler = CustomDatabaseLogHandler(defer_to='database')
+        record = logging.LogRecord('tasks.queue', logging.ERROR, __file__, 1, 'Task failed', (), None)
+
+        handler.emit(record)
+
+        self.assertTrue(CustomStatusLog.objects.exists())
+        self.assertFalse(Task.objects.exists())
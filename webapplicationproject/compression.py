@@ -0,0 +1,286 @@
+"""
+Response compression.
+
+CompressionMiddleware compresses responses with the best encoding the client accepts out of brotli, zstd (when the
+zstandard package is installed) and gzip. Streaming responses are compressed chunk by chunk, each chunk flushed so
+rows reach the client as they are produced. Responses smaller than COMPRESSION['MIN_LENGTH'], responses that already
+have a Content-Encoding and file responses (static files, which WhiteNoise serves precompressed) are left alone. Only
+the content types in COMPRESSION['CONTENT_TYPES'] are compressed, each with its own level per encoding.
+
+Pages carry secrets (the CSRF token, the session user's tickets) next to text an attacker can get reflected, so the
+compressed length could leak them one guess at a time (BREACH). Like Django's GZipMiddleware, every compressed response
+is padded with a random number of bytes below COMPRESSION['MAX_RANDOM_BYTES'], which the decoders skip: a file name in
+the gzip header, a metadata meta-block at the end of the brotli stream and a skippable frame before the zstd frame.
+The padding does not make such guesses impossible, only many times more costly.
+"""
+import re
+import secrets
+import struct
+import zlib
+
+from django.conf import settings
+from django.http import FileResponse
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSION_DEFAULTS = {
+    'MIN_LENGTH': 200,
+    # Each compressed response is padded with 0 to MAX_RANDOM_BYTES - 1 random bytes, or none when 0
+    'MAX_RANDOM_BYTES': 100,
+    # Preferred first when the client accepts several encodings equally
+    'ENCODINGS': ('br', 'zstd', 'gzip'),
+    'CONTENT_TYPES': {
+        'text/html': {'br': 5, 'zstd': 3, 'gzip': 6},
+    },
+}
+
+ACCEPT_ENCODING_ITEM = re.compile(r'^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$')
+
+
+def get_compression_settings():
+    """
+    Get the COMPRESSION settings merged with the defaults.
+
+    Returns:
+        dict: The compression settings.
+    """
+    return {**COMPRESSION_DEFAULTS, **getattr(settings, 'COMPRESSION', {})}
+
+
+GZIP_FNAME = 0x08
+# The ISLAST and ISLASTEMPTY bits ending a brotli stream
+BROTLI_LAST_EMPTY_META_BLOCK = b'\x03'
+ZSTD_SKIPPABLE_FRAME_MAGIC = 0x184D2A50
+
+
+class GzipCompressor:
+    def __init__(self, level, padding=0):
+        # Raw deflate data (negative wbits): the header, with its padding file name, and the trailer are written here
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        self.header = gzip_header(padding)
+        self.crc = 0
+        self.size = 0
+
+    def compress(self, data):
+        self.crc = zlib.crc32(data, self.crc)
+        self.size += len(data)
+        return self.take_header() + self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        trailer = struct.pack('<II', self.crc & 0xffffffff, self.size & 0xffffffff)
+        return self.take_header() + self.compressor.flush() + trailer
+
+    def take_header(self):
+        header, self.header = self.header, b''
+        return header
+
+
+class BrotliCompressor:
+    def __init__(self, level, padding=0):
+        self.compressor = brotli.Compressor(quality=level)
+        self.padding = padding
+
+    def compress(self, data):
+        return self.compressor.process(data) + self.compressor.flush()
+
+    def finish(self):
+        # A flush leaves the stream on a byte boundary (writing the stream header if nothing was written yet), where
+        # the padding can go before the last, empty meta-block
+        return self.compressor.flush() + brotli_padding(self.padding) + BROTLI_LAST_EMPTY_META_BLOCK
+
+
+class ZstdCompressor:
+    def __init__(self, level, padding=0):
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        self.header = struct.pack('<II', ZSTD_SKIPPABLE_FRAME_MAGIC, padding) + bytes(padding) if padding else b''
+
+    def compress(self, data):
+        return self.take_header() + self.compressor.compress(data) + self.compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self.take_header() + self.compressor.flush()
+
+    def take_header(self):
+        header, self.header = self.header, b''
+        return header
+
+
+def gzip_header(padding):
+    """
+    Get a gzip member header whose file name is padding bytes long.
+
+    Parameters:
+        padding (int): The length of the file name, or 0 for none.
+
+    Returns:
+        bytes: The header: magic, deflate method, flags, no mtime, no extra flags, unknown OS and the file name.
+    """
+    if not padding:
+        return b'\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff'
+    return b'\x1f\x8b\x08' + bytes([GZIP_FNAME]) + b'\x00\x00\x00\x00\x00\xff' + b'a' * padding + b'\x00'
+
+
+def brotli_padding(padding):
+    """
+    Get a brotli metadata meta-block of padding bytes, which decoders skip (RFC 7932, section 9.2).
+
+    Parameters:
+        padding (int): The length of the metadata, or 0 for none.
+
+    Returns:
+        bytes: The meta-block, to be written on a byte boundary.
+    """
+    if not padding:
+        return b''
+    skip_bytes = (max(padding - 1, 1).bit_length() + 7) // 8
+    # (value, bit count) pairs, written from the least significant bit: ISLAST 0, MNIBBLES 0 (coded as 3), the
+    # reserved bit, MSKIPBYTES and MSKIPLEN - 1, then zero bits up to the byte boundary
+    fields = [(0, 1), (3, 2), (0, 1), (skip_bytes, 2), (padding - 1, skip_bytes * 8)]
+    bits = bit_count = 0
+    for value, count in fields:
+        bits |= value << bit_count
+        bit_count += count
+    return bits.to_bytes((bit_count + 7) // 8, 'little') + bytes(padding)
+
+
+def get_compressors():
+    """
+    Get the compressor class of each encoding whose library is installed.
+
+    Returns:
+        dict: Compressor classes by encoding name.
+    """
+    compressors = {'gzip': GzipCompressor}
+    if brotli:
+        compressors['br'] = BrotliCompressor
+    if zstandard:
+        compressors['zstd'] = ZstdCompressor
+    return compressors
+
+
+def parse_accept_encoding(header):
+    """
+    Parse an Accept-Encoding header.
+
+    Parameters:
+        header (str): The header, e.g. 'gzip, br;q=0.9, *;q=0'.
+
+    Returns:
+        dict: The quality value of each listed encoding, including '*'.
+    """
+    qualities = {}
+    for item in header.split(','):
+        match = ACCEPT_ENCODING_ITEM.match(item)
+        if match:
+            encoding, quality = match.groups()
+            try:
+                qualities[encoding.lower()] = float(quality) if quality is not None else 1.0
+            except ValueError:
+                continue
+    return qualities
+
+
+def negotiate_encoding(header, encodings):
+    """
+    Choose the encoding for a response.
+
+    Parameters:
+        header (str): The request's Accept-Encoding header.
+        encodings (iterable): The encodings that can be used, in order of preference.
+
+    Returns:
+        str: The accepted encoding with the highest quality value (the first of equals in the server's order of
+            preference), or None if the client accepts none of them.
+    """
+    qualities = parse_accept_encoding(header)
+    best, best_quality = None, 0
+    for encoding in encodings:
+        quality = qualities.get(encoding, qualities.get('*', 0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress_stream(chunks, compressor):
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def compress_async_stream(chunks, compressor):
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware:
+    """
+    Middleware compressing responses with brotli, zstd or gzip, as negotiated with the client's Accept-Encoding.
+
+    It should come before any middleware that reads or changes the response content.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.settings = get_compression_settings()
+        compressors = get_compressors()
+        self.compressors = {encoding: compressors[encoding]
+                            for encoding in self.settings['ENCODINGS'] if encoding in compressors}
+
+    def __call__(self, request):
+        return self.process_response(request, self.get_response(request))
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or isinstance(response, FileResponse):
+            return response
+        if not response.streaming and len(response.content) < self.settings['MIN_LENGTH']:
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        levels = self.settings['CONTENT_TYPES'].get(content_type)
+        if levels is None:
+            return response
+
+        # The response depends on Accept-Encoding even when this client gets it uncompressed
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''),
+                                      [encoding for encoding in self.compressors if encoding in levels])
+        if encoding is None:
+            return response
+        max_random_bytes = self.settings['MAX_RANDOM_BYTES']
+        padding = secrets.randbelow(max_random_bytes) if max_random_bytes else 0
+        compressor = self.compressors[encoding](levels[encoding], padding)
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = compress_async_stream(response.streaming_content, compressor)
+            else:
+                response.streaming_content = compress_stream(response.streaming_content, compressor)
+            # The compressed length is not known until the stream ends
+            del response['Content-Length']
+        else:
+            compressed = compressor.compress(response.content) + compressor.finish()
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # The compressed body differs byte for byte, so a strong ETag no longer matches it
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,11 @@
+from django.db.backends.sqlite3 import base
+
+from webapplicationproject.db.pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    """
+    SQLite backend that takes connections from a per-process connection pool.
+
+    Used to run the pooled deployment profile locally without PostgreSQL.
+    """
@@ -0,0 +1,315 @@
+"""
+Connection pool shared by the pooled database backends.
+
+Each worker process keeps one pool per database alias. Django "closes" the connection at the end of every request
+(CONN_MAX_AGE = 0), which returns it to the pool instead of closing it, so bursts of requests reuse open connections
+instead of reconnecting to the database each time.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from django.core.exceptions import ImproperlyConfigured
+
+POOL_DEFAULTS = {
+    'MIN_SIZE': 1,
+    'MAX_SIZE': 10,
+    'TIMEOUT': 30.0,
+    'MAX_IDLE': 600.0,
+    'HEALTH_CHECK_INTERVAL': 10.0,
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(Exception):
+    """
+    Raised when no connection becomes available within the pool timeout.
+    """
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of DB-API connections.
+
+    Connections are opened on demand up to 'max_size'. Idle connections are reused most recently used first and are
+    health checked before being handed out if they have been idle for longer than 'health_check_interval'. Idle
+    connections beyond 'min_size' are closed after 'max_idle' seconds.
+
+    Attributes:
+        min_size (int): The number of connections kept open when idle.
+        max_size (int): The maximum number of connections open at once.
+        timeout (float): The maximum number of seconds to wait for a connection.
+        max_idle (float): The number of seconds after which surplus idle connections are closed.
+        health_check_interval (float): Idle connections older than this are checked before reuse.
+    """
+
+    def __init__(self, connect, check, reset, min_size=1, max_size=10, timeout=30.0, max_idle=600.0,
+                 health_check_interval=10.0):
+        """
+        Constructor method for ConnectionPool.
+
+        Parameters:
+            connect (callable): Opens a new connection.
+            check (callable): Returns True if a connection is still usable.
+            reset (callable): Returns a connection to a clean state before it is reused, e.g. rolls back.
+            min_size (int, optional): The number of connections kept open when idle. Defaults to 1.
+            max_size (int, optional): The maximum number of connections open at once. Defaults to 10.
+            timeout (float, optional): The maximum number of seconds to wait for a connection. Defaults to 30.
+            max_idle (float, optional): Seconds after which surplus idle connections are closed. Defaults to 600.
+            health_check_interval (float, optional): Idle time after which a connection is checked. Defaults to 10.
+        """
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ImproperlyConfigured("Database pool sizes must satisfy 0 <= MIN_SIZE <= MAX_SIZE and MAX_SIZE >= 1.")
+        self.connect = connect
+        self.check = check
+        self.reset = reset
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.health_check_interval = health_check_interval
+
+        self._condition = threading.Condition()
+        self._idle = deque()
+        self._size = 0
+        self._stats = {
+            'connections_opened': 0,
+            'connections_closed': 0,
+            'checkouts': 0,
+            'waits': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+            'timeouts': 0,
+            'health_check_failures': 0,
+        }
+
+    def getconn(self):
+        """
+        Take a connection from the pool, opening one if none is idle and the pool is not full.
+
+        Returns:
+            The DB-API connection.
+
+        Raises:
+            PoolTimeout: If no connection became available within the timeout.
+        """
+        start = time.monotonic()
+        waited = False
+        while True:
+            with self._condition:
+                while not self._idle and self._size >= self.max_size:
+                    remaining = self.timeout - (time.monotonic() - start)
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeout(
+                            f"No database connection available after {self.timeout} seconds "
+                            f"(pool size {self.max_size})."
+                        )
+                    waited = True
+                    self._condition.wait(remaining)
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                else:
+                    conn, last_used = None, None
+                    self._size += 1
+
+            if conn is None:
+                try:
+                    conn = self.connect()
+                except Exception:
+                    self._forget()
+                    raise
+                with self._condition:
+                    self._stats['connections_opened'] += 1
+            elif time.monotonic() - last_used >= self.health_check_interval and not self.check(conn):
+                with self._condition:
+                    self._stats['health_check_failures'] += 1
+                self._close(conn)
+                continue
+
+            self._record_checkout(time.monotonic() - start, waited)
+            return conn
+
+    def putconn(self, conn):
+        """
+        Return a connection to the pool, closing it if it cannot be reset.
+
+        Parameters:
+            conn: The DB-API connection taken from getconn().
+        """
+        try:
+            self.reset(conn)
+        except Exception:
+            self._close(conn)
+            return
+
+        now = time.monotonic()
+        expired = []
+        with self._condition:
+            self._idle.append((conn, now))
+            # Close surplus connections that have not been used for a while (oldest are on the left)
+            while len(self._idle) > self.min_size and now - self._idle[0][1] >= self.max_idle:
+                expired.append(self._idle.popleft()[0])
+            self._condition.notify()
+        for expired_conn in expired:
+            self._close(expired_conn)
+
+    def fill(self):
+        """
+        Open connections until the pool holds at least 'min_size' of them.
+        """
+        while True:
+            with self._condition:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                conn = self.connect()
+            except Exception:
+                self._forget()
+                raise
+            with self._condition:
+                self._stats['connections_opened'] += 1
+                self._idle.append((conn, time.monotonic()))
+                self._condition.notify()
+
+    def close_all(self):
+        """
+        Close every idle connection. Connections currently checked out are closed when they are returned.
+        """
+        with self._condition:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+        for conn in idle:
+            self._close(conn)
+
+    def stats(self):
+        """
+        Get the pool metrics.
+
+        Returns:
+            dict: Counters since the pool was created plus the current 'size', 'idle' and 'in_use' connections.
+                'waits' counts checkouts that had to wait for a connection; 'wait_time_total' and 'wait_time_max'
+                are in seconds and include connection time for newly opened connections.
+        """
+        with self._condition:
+            return {
+                **self._stats,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+            }
+
+    def _record_checkout(self, wait_time, waited):
+        with self._condition:
+            self._stats['checkouts'] += 1
+            self._stats['wait_time_total'] += wait_time
+            self._stats['wait_time_max'] = max(self._stats['wait_time_max'], wait_time)
+            if waited:
+                self._stats['waits'] += 1
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._condition:
+            self._stats['connections_closed'] += 1
+        self._forget()
+
+    def _forget(self):
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+
+def get_pool(wrapper):
+    """
+    Get the pool for a database connection wrapper, creating it on first use.
+
+    Pools are per process, so workers forked after a pool was created open their own connections.
+
+    Parameters:
+        wrapper (BaseDatabaseWrapper): The Django connection wrapper.
+
+    Returns:
+        ConnectionPool: The pool for the wrapper's alias.
+    """
+    key = (wrapper.alias, os.getpid())
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            options = {**POOL_DEFAULTS, **wrapper.settings_dict.get('POOL', {})}
+            conn_params = wrapper.get_connection_params()
+            pool = ConnectionPool(
+                connect=lambda: wrapper.get_new_pooled_connection(conn_params),
+                check=wrapper.is_pooled_connection_usable,
+                reset=lambda conn: conn.rollback(),
+                min_size=options['MIN_SIZE'],
+                max_size=options['MAX_SIZE'],
+                timeout=options['TIMEOUT'],
+                max_idle=options['MAX_IDLE'],
+                health_check_interval=options['HEALTH_CHECK_INTERVAL'],
+            )
+            _pools[key] = pool
+    return pool
+
+
+def get_pool_stats():
+    """
+    Get the metrics of every pool in the current process.
+
+    Returns:
+        dict: Pool metrics by database alias.
+    """
+    pid = os.getpid()
+    with _pools_lock:
+        pools = {alias: pool for (alias, pool_pid), pool in _pools.items() if pool_pid == pid}
+    return {alias: pool.stats() for alias, pool in pools.items()}
+
+
+def close_pools():
+    """
+    Close the idle connections of every pool in the current process.
+    """
+    pid = os.getpid()
+    with _pools_lock:
+        pools = [pool for (_, pool_pid), pool in _pools.items() if pool_pid == pid]
+    for pool in pools:
+        pool.close_all()
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    Mixin for a Django DatabaseWrapper that takes connections from a ConnectionPool.
+
+    Opening a connection takes one from the pool and closing it returns it, so CONN_MAX_AGE should be 0 to hand the
+    connection back at the end of each request.
+    """
+
+    def get_new_connection(self, conn_params):
+        pool = get_pool(self)
+        pool.fill()
+        return pool.getconn()
+
+    def get_new_pooled_connection(self, conn_params):
+        return super().get_new_connection(conn_params)
+
+    def is_pooled_connection_usable(self, conn):
+        try:
+            cursor = conn.cursor()
+            try:
+                cursor.execute('SELECT 1')
+            finally:
+                cursor.close()
+        except self.Database.Error:
+            return False
+        return True
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                get_pool(self).putconn(self.connection)
@@ -0,0 +1,167 @@
+"""
+Database routing for read replicas.
+
+Writes always go to the 'default' (primary) database. Reads go to one of the DATABASE_REPLICAS only inside
+read_from_replica(), which read-only views and admin changelists opt in to with ReplicaReadMixin and
+ReplicaReadAdminMixin, so anything else keeps reading from the primary.
+
+ReplicaStickinessMiddleware gives users read-your-writes consistency: once a request writes to the primary, the user's
+reads stay on the primary for REPLICA_STICKY_SECONDS, long enough for the replicas to catch up.
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_use_replica = ContextVar('use_replica', default=False)
+_routing_state = ContextVar('routing_state', default=None)
+
+
+class RoutingState:
+    """
+    Replica routing state of the current request or read_from_replica() block.
+
+    Attributes:
+        pinned (bool): True if reads must go to the primary, e.g. because the user wrote recently.
+        wrote (bool): True once something has been written to the primary.
+    """
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+    @property
+    def use_primary(self):
+        return self.pinned or self.wrote
+
+
+def is_pinned_to_primary():
+    """
+    Check whether reads are pinned to the primary in the current context.
+
+    Returns:
+        bool: True if the current request or block was pinned or has written to the primary.
+    """
+    state = _routing_state.get()
+    return state is not None and state.use_primary
+
+
+@contextmanager
+def read_from_replica():
+    """
+    Send the reads made inside the block to a replica, unless they are pinned to the primary.
+
+    Outside a request the block tracks its own writes, so reads after a write in the same block see it.
+    """
+    state_token = _routing_state.set(RoutingState()) if _routing_state.get() is None else None
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+        if state_token is not None:
+            _routing_state.reset(state_token)
+
+
+def _render(response):
+    # Template responses are rendered after the view returns; render them here so their queries use the replica
+    if callable(getattr(response, 'render', None)) and not response.is_rendered:
+        response.render()
+    return response
+
+
+class ReplicaRouter:
+    """
+    Database router sending writes to the primary and opted-in reads to a random replica.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and settings.DATABASE_REPLICAS and not is_pinned_to_primary():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return None
+
+    def db_for_write(self, model, **hints):
+        state = _routing_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive their schema from the primary
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Middleware pinning a user's reads to the primary for a short window after they write.
+
+    The window is stored in a cookie holding the time it ends, so it follows the user across workers.
+
+    Attributes:
+        cookie_name (str): The name of the cookie holding the end of the window.
+    """
+
+    cookie_name = "primary_pin"
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = RoutingState(pinned=self.is_pinned(request))
+        token = _routing_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing_state.reset(token)
+        if state.wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                self.cookie_name,
+                str(int(time.time()) + settings.REPLICA_STICKY_SECONDS),
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                secure=settings.SESSION_COOKIE_SECURE or None,
+                httponly=True,
+                samesite=settings.SESSION_COOKIE_SAMESITE,
+            )
+        return response
+
+    def is_pinned(self, request):
+        try:
+            return int(request.COOKIES[self.cookie_name]) > time.time()
+        except (KeyError, ValueError):
+            return False
+
+
+class ReplicaReadMixin:
+    """
+    View mixin serving GET and HEAD requests from a replica. Place it after any access mixins so that the user is
+    loaded from the primary.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return super().dispatch(request, *args, **kwargs)
+        with read_from_replica():
+            return _render(super().dispatch(request, *args, **kwargs))
+
+
+class ReplicaReadAdminMixin:
+    """
+    ModelAdmin mixin serving changelist pages from a replica.
+    """
+
+    def changelist_view(self, request, extra_context=None):
+        if request.method not in ("GET", "HEAD"):
+            return super().changelist_view(request, extra_context)
+        with read_from_replica():
+            return _render(super().changelist_view(request, extra_context))
@@ -6,10 +6,12 @@ References:
     Available at: https://docs.djangoproject.com/en/4.2/topics/logging/ (Accessed: 27 June 2023).
 """
 import os
+import sys
+import tempfile
 from pathlib import Path
 
-import dj_database_url
 from django.conf.global_settings import DATABASES
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 
@@ -29,10 +31,17 @@ ALLOWED_HOSTS = [
     '127.0.0.1'
 ]
 
+# Worker profile (see 'Deployment profiles' in README.md)
+# WORKER_PROFILE=api starts workers for API/JSON traffic and background tasks without the admin site: admin modules
+# are not imported at boot and /admin/ is not routed. Database logging is set up on the first log record and written
+# in the background.
+WORKER_PROFILE = os.environ.get('WORKER_PROFILE', 'full')
+ADMIN_ENABLED = WORKER_PROFILE != 'api'
+
 # Application definition
 
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    'django.contrib.admin' if ADMIN_ENABLED else 'django.contrib.admin.apps.SimpleAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -40,6 +49,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'application.apps.ApplicationConfig',
     'logger.apps.LoggerConfig',
+    'tasks.apps.TasksConfig',
     'whitenoise.runserver_nostatic',
     'crispy_forms',
     'crispy_bootstrap4',
@@ -47,7 +57,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'logger.request_id.RequestIDMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'webapplicationproject.compression.CompressionMiddleware',
+    'webapplicationproject.routers.ReplicaStickinessMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -57,14 +70,23 @@ MIDDLEWARE = [
     'whitenoise.middleware.WhiteNoiseMiddleware',
 ]
 
+# Log records are tagged with the request ID from this header (set by the Heroku router), or with a new one
+REQUEST_ID_HEADER = 'HTTP_X_REQUEST_ID'
+
 ROOT_URLCONF = 'webapplicationproject.urls'
 
+# Templates
+# Compiled templates are kept in memory by the cached loader (unless DEBUG is on, so template edits show up). With
+# TEMPLATE_WARMUP each worker compiles the templates whose names start with TEMPLATE_WARMUP_PREFIXES when it boots (see
+# webapplicationproject.wsgi), so the first requests a worker serves do not pay for parsing them.
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [BASE_DIR / 'templates']
-        ,
-        'APP_DIRS': True,
+        'DIRS': [BASE_DIR / 'templates'],
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -72,16 +94,24 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            'loaders': TEMPLATE_LOADERS if DEBUG else [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)],
         },
     },
 ]
+# API workers (WORKER_PROFILE=api) do not warm the page templates unless TEMPLATE_WARMUP=true
+TEMPLATE_WARMUP = os.environ.get('TEMPLATE_WARMUP', 'true' if ADMIN_ENABLED else 'false').lower() == 'true'
+# The app's pages and the crispy forms templates they render
+TEMPLATE_WARMUP_PREFIXES = ('application/', 'bootstrap4/')
 
 WSGI_APPLICATION = 'webapplicationproject.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
+# dj_database_url is only imported when a database URL is set
 if 'DATABASE_URL' in os.environ:
-    db_from_env = dj_database_url.config(conn_max_age=600)
+    import dj_database_url
+
+    db_from_env = dj_database_url.config(conn_max_age=600, conn_health_checks=True)
     DATABASES['default'] = db_from_env
 else:
     # Configure your default database settings here
@@ -90,10 +120,117 @@ else:
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
     }
 
+# Read replicas (see 'Deployment profiles' in README.md)
+# DATABASE_REPLICA_URLS is a comma separated list of database URLs added as 'replica_1', 'replica_2', ... Read-only
+# views opt in to reading from a replica; writes always go to 'default'. After a write, the user's reads are pinned to
+# 'default' for REPLICA_STICKY_SECONDS so they see their own changes despite replication lag.
+DATABASE_REPLICAS = []
+for index, replica_url in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_URLS', '').split(',')), start=1):
+    import dj_database_url
+
+    alias = f'replica_{index}'
+    DATABASES[alias] = dj_database_url.parse(replica_url.strip(), conn_max_age=600, conn_health_checks=True)
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ['webapplicationproject.routers.ReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+
+# Connection pooling (see 'Deployment profiles' in README.md)
+# DATABASE_POOL=true swaps in a backend that keeps a pool of open connections per worker process. Connections are
+# returned to the pool at the end of each request, so CONN_MAX_AGE is set to 0.
+POOLED_ENGINES = {
+    'django.db.backends.postgresql': 'webapplicationproject.db.backends.postgresql',
+    'django.db.backends.sqlite3': 'webapplicationproject.db.backends.sqlite3',
+}
+if os.environ.get('DATABASE_POOL', '').lower() == 'true':
+    for alias in ['default', *DATABASE_REPLICAS]:
+        DATABASES[alias].update({
+            'ENGINE': POOLED_ENGINES[DATABASES[alias]['ENGINE']],
+            'CONN_MAX_AGE': 0,
+            'POOL': {
+                'MIN_SIZE': int(os.environ.get('DATABASE_POOL_MIN_SIZE', 1)),
+                'MAX_SIZE': int(os.environ.get('DATABASE_POOL_MAX_SIZE', 10)),
+                'TIMEOUT': float(os.environ.get('DATABASE_POOL_TIMEOUT', 30)),
+                'MAX_IDLE': float(os.environ.get('DATABASE_POOL_MAX_IDLE', 600)),
+                'HEALTH_CHECK_INTERVAL': float(os.environ.get('DATABASE_POOL_HEALTH_CHECK_INTERVAL', 10)),
+            },
+        })
+
+# Cache
+# REDIS_URL enables a Redis cache shared by all workers (needs redis-py). Without it each worker process uses its own
+# local memory cache. Sessions get their own alias so that other cache traffic cannot evict them.
+if 'REDIS_URL' in os.environ:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        },
+        'sessions': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+            'KEY_PREFIX': 'sessions',
+        },
+        'messages': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+            'KEY_PREFIX': 'messages',
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'default',
+        },
+        'sessions': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'sessions',
+        },
+        # Messages are written by one request and read by the next, which may be served by another worker,
+        # so they need a cache shared by all workers on the host
+        'messages': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(tempfile.gettempdir(), 'webapplicationproject_messages'),
+        },
+    }
+
+# Sessions
+# SESSION_BACKEND selects where sessions are stored:
+#   'cached_db' (default with REDIS_URL) - read from the cache, written through to the database so they survive cache
+#       restarts
+#   'cache' - cache only, fastest but sessions are lost when the cache is cleared
+#   'signed_cookies' - stored client side, no server storage at all
+#   'db' (default without REDIS_URL) - database only
+# The cache backed stores need the shared Redis cache: with per-process local memory caches a session flushed at logout
+# would still be served from the caches of the other workers, and 'cache' sessions would only exist in one worker.
+# Sessions are only saved when they are modified, so browsing pages does not write to the session store.
+SESSION_BACKENDS = {
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+    'db': 'django.contrib.sessions.backends.db',
+}
+SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'cached_db' if 'REDIS_URL' in os.environ else 'db')
+if SESSION_BACKEND in ('cached_db', 'cache') and 'REDIS_URL' not in os.environ:
+    raise ImproperlyConfigured(f"SESSION_BACKEND '{SESSION_BACKEND}' needs the shared cache set by REDIS_URL.")
+SESSION_ENGINE = SESSION_BACKENDS[SESSION_BACKEND]
+SESSION_CACHE_ALIAS = 'sessions'
+
+# Messages
+# Flash messages are kept in the 'messages' cache for a short time; only a random key is stored in a cookie.
+MESSAGE_STORAGE = 'application.message_storage.CacheMessageStorage'
+MESSAGE_CACHE_ALIAS = 'messages'
+MESSAGE_CACHE_TIMEOUT = 60
+
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
 
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# collectstatic builds the CSS bundles in STATIC_BUNDLES, then hashes every file and writes gzip (and, with the Brotli
+# package installed, brotli) copies. WhiteNoise serves hashed names with a far-future immutable Cache-Control header.
+STATICFILES_STORAGE = 'webapplicationproject.storage.BundledStaticFilesStorage'
+STATIC_BUNDLES = {
+    'application/bundle.css': ['application/site.css'],
+}
 CRISPY_ALLOWED_TEMPLATE_PACKS = 'bootstrap4'
 CRISPY_TEMPLATE_PACK = 'bootstrap4'
 
@@ -117,6 +254,112 @@ AUTH_PASSWORD_VALIDATORS = [
 
 AUTH_USER_MODEL = 'application.EngineerUser'
 
+# Password hashing
+# PASSWORD_HASHER selects the hasher for new passwords: 'pbkdf2' (default), 'scrypt' or 'argon2' (needs argon2-cffi).
+# The other hashers stay listed so existing passwords still verify; they are rehashed with the selected one on the
+# user's next successful login.
+PASSWORD_HASHER_CHOICES = {
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+}
+PREFERRED_PASSWORD_HASHER = PASSWORD_HASHER_CHOICES[os.environ.get('PASSWORD_HASHER', 'pbkdf2')]
+PASSWORD_HASHERS = [PREFERRED_PASSWORD_HASHER] + [
+    hasher for hasher in PASSWORD_HASHER_CHOICES.values() if hasher != PREFERRED_PASSWORD_HASHER
+]
+
+# Login rate limiting
+# Token buckets per client IP and per username: 'capacity' attempts in a burst, refilled at 'refill_per_minute'.
+LOGIN_RATE_LIMITS = {
+    'ip': {'capacity': 30, 'refill_per_minute': 15},
+    'username': {'capacity': 10, 'refill_per_minute': 2},
+}
+# Behind the Heroku router (DYNO is set) REMOTE_ADDR is the router's address, shared by every client; the router appends
+# the client address to X-Forwarded-For instead.
+LOGIN_RATE_LIMIT_IP_HEADER = os.environ.get(
+    'LOGIN_RATE_LIMIT_IP_HEADER', 'HTTP_X_FORWARDED_FOR' if 'DYNO' in os.environ else 'REMOTE_ADDR'
+)
+
+# Background tasks
+# 'database' queues tasks for 'manage.py run_tasks' workers, 'thread' runs them in a thread of the web process and
+# 'immediate' runs them as soon as they are queued. Failed tasks are retried after RETRY_BACKOFF seconds, doubling up
+# to RETRY_BACKOFF_MAX, until MAX_ATTEMPTS.
+TASKS = {
+    'BACKEND': os.environ.get('TASK_BACKEND', 'database'),
+    'MAX_ATTEMPTS': 5,
+    'RETRY_BACKOFF': 5,
+    'RETRY_BACKOFF_MAX': 3600,
+    'LOCK_TIMEOUT': 600,
+    'KEEP_FINISHED_DAYS': 7,
+}
+
+# Response compression
+# Pages and exports of these content types are compressed with the client's preferred encoding in ENCODINGS (zstd
+# needs the zstandard package), at the level given per encoding. Responses under MIN_LENGTH bytes are sent as they are,
+# as are static files, which WhiteNoise serves precompressed. Streamed exports use lower levels so that compressing
+# each chunk keeps up with the database. Each compressed response is padded with up to MAX_RANDOM_BYTES - 1 random
+# bytes, which decoders skip, to mitigate BREACH (guessing the CSRF token or page data from the compressed length).
+COMPRESSION = {
+    'MIN_LENGTH': 200,
+    'MAX_RANDOM_BYTES': 100,
+    'ENCODINGS': ('br', 'zstd', 'gzip'),
+    'CONTENT_TYPES': {
+        'text/html': {'br': 5, 'zstd': 3, 'gzip': 6},
+        'application/json': {'br': 5, 'zstd': 3, 'gzip': 6},
+        'text/plain': {'br': 5, 'zstd': 3, 'gzip': 6},
+        'text/csv': {'br': 4, 'zstd': 3, 'gzip': 5},
+        'application/x-ndjson': {'br': 4, 'zstd': 3, 'gzip': 5},
+    },
+}
+
+# Email and notifications
+# Notification emails are printed by the worker unless EMAIL_BACKEND is set, e.g. to the file backend
+# ('django.core.mail.backends.filebased.EmailBackend', written to EMAIL_FILE_PATH) or an SMTP backend.
+# Each engineer gets at most one email per NOTIFICATION_BATCH_SECONDS, listing every notification from that window.
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_FILE_PATH = os.environ.get('EMAIL_FILE_PATH', os.path.join(BASE_DIR, 'sent_emails'))
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'tickets@localhost')
+EMAIL_SUBJECT_PREFIX = '[Tickets] '
+NOTIFICATION_BATCH_SECONDS = int(os.environ.get('NOTIFICATION_BATCH_SECONDS', 60))
+
+# Log sampling
+# User log records are rate limited per message template, username and level, and per template and level (see
+# logger.sampling), so a flood of failed logins or injection attempts cannot multiply database writes. Records over
+# the limits are counted and reported in a summary record every 'summary_interval' seconds.
+LOG_SAMPLING = {
+    'capacity': 20,
+    'refill_per_minute': 10,
+    'template_capacity': 200,
+    'template_refill_per_minute': 100,
+    'sample_every': 100,
+    'summary_interval': 60,
+}
+
+# Testing
+# 'manage.py test' restores the schema from a snapshot and uses a fast password hasher.
+# sys.argv is checked so that --parallel workers started with 'spawn' get the same profile.
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+TEST_RUNNER = 'webapplicationproject.test_runner.SnapshotTestRunner'
+TEST_SNAPSHOT_DIR = os.path.join(BASE_DIR, '.test_snapshots')
+
+if TESTING:
+    PASSWORD_HASHERS = [
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ]
+    TASKS['BACKEND'] = 'immediate'
+    NOTIFICATION_BATCH_SECONDS = 0
+    # Tests log the same messages many times, so they are not sampled
+    LOG_SAMPLING = None
+    # Pages are rendered without running collectstatic first
+    STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+    # The file based messages cache is shared by every process on the host, including --parallel test workers
+    # that clear their caches between tests, so each test process gets its own
+    if 'REDIS_URL' not in os.environ:
+        CACHES['messages'] = {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'messages',
+        }
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -131,7 +374,9 @@ LOGGING = {
     'handlers': {
         'all_log': {
             'level': 'INFO',
-            'class': 'logger.db_log_handler.CustomDatabaseLogHandler'
+            'class': 'logger.db_log_handler.CustomDatabaseLogHandler',
+            # e.g. LOG_TASK_BACKEND=thread saves log records in the background instead of during the request
+            'defer_to': os.environ.get('LOG_TASK_BACKEND') or None,
         },
     },
     'root': {
@@ -139,6 +384,33 @@ LOGGING = {
         'level': 'INFO',
     }
 }
+if not ADMIN_ENABLED:
+    LOGGING['handlers']['all_log'] = {
+        'level': 'INFO',
+        'class': 'logger.lazy_log_handler.LazyLogHandler',
+        'handler_class': 'logger.db_log_handler.CustomDatabaseLogHandler',
+        'defer_to': os.environ.get('LOG_TASK_BACKEND', 'thread') or None,
+    }
+if LOG_SAMPLING:
+    LOGGING['filters'] = {'sampling': {'()': 'logger.sampling.LogSamplingFilter', **LOG_SAMPLING}}
+# With LOG_STORAGE=segments user log records are appended to JSON lines files in LOG_SEGMENT_DIR instead of being
+# inserted one by one. Each process loads its closed segments into the user log table in bulk on a background thread,
+# since Heroku dyno filesystems are neither shared nor kept across restarts. With a persistent directory shared by all
+# writers, LOG_SEGMENT_LOAD_BACKEND= (empty) leaves them to 'manage.py load_log_segments' on that host instead.
+LOG_STORAGE = os.environ.get('LOG_STORAGE', 'database')
+LOG_SEGMENT_DIR = os.environ.get('LOG_SEGMENT_DIR', os.path.join(BASE_DIR, 'log_segments'))
+if LOG_STORAGE == 'segments':
+    LOGGING['handlers']['all_log'] = {
+        'level': 'INFO',
+        'class': 'logger.segment_log_handler.SegmentLogHandler',
+        'directory': LOG_SEGMENT_DIR,
+        'max_bytes': int(os.environ.get('LOG_SEGMENT_MAX_BYTES', 8 * 1024 * 1024)),
+        'max_seconds': int(os.environ.get('LOG_SEGMENT_MAX_SECONDS', 300)),
+        'load_to': os.environ.get('LOG_SEGMENT_LOAD_BACKEND', 'thread') or None,
+    }
+if LOG_SAMPLING:
+    LOGGING['handlers']['all_log']['filters'] = ['sampling']
+
 # Internationalization
 # https://docs.djangoproject.com/en/3.2/topics/i18n/
 
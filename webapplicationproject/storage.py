@@ -0,0 +1,79 @@
+"""
+Static file bundles.
+
+BundledStaticFilesStorage builds the bundles in STATIC_BUNDLES when collectstatic runs: each bundle is the minified
+concatenation of its source files, written to STATIC_ROOT and then hashed and compressed with everything else by
+WhiteNoise. Pages link the bundle, so they make one request for its CSS, and the hashed name lets WhiteNoise serve it
+with a far-future immutable Cache-Control header.
+"""
+import re
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+# Comments, and quoted strings, which are kept as they are
+CSS_COMMENT_OR_STRING = re.compile(r'/\*.*?\*/|("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')', re.S)
+CSS_STRING = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')')
+CSS_SPACE_AROUND = re.compile(r'\s*([{};,>])\s*')
+CSS_SPACE_AFTER = re.compile(r':\s+')
+CSS_SPACE = re.compile(r'\s+')
+
+
+def minify_css(css):
+    """
+    Remove the comments and the whitespace that is not needed from CSS.
+
+    Only whitespace around braces, semicolons, commas and child combinators and after colons is removed, and quoted
+    strings are left as they are, so the rules are unchanged.
+
+    Parameters:
+        css (str): The CSS.
+
+    Returns:
+        str: The minified CSS.
+    """
+    css = CSS_COMMENT_OR_STRING.sub(lambda match: match.group(1) or '', css)
+    parts = CSS_STRING.split(css)
+    # split() with a group puts the strings at the odd indexes
+    for index in range(0, len(parts), 2):
+        part = CSS_SPACE.sub(' ', parts[index])
+        part = CSS_SPACE_AROUND.sub(r'\1', part)
+        parts[index] = CSS_SPACE_AFTER.sub(':', part)
+    return ''.join(parts).replace(';}', '}').strip()
+
+
+class BundledStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    WhiteNoise's compressed manifest storage, which also builds the bundles in STATIC_BUNDLES.
+
+    Bundle sources are concatenated as they are, so relative url() references in a source must also resolve from the
+    bundle's directory.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            for name, sources in getattr(settings, 'STATIC_BUNDLES', {}).items():
+                self.build_bundle(name, sources, paths)
+                paths[name] = (self, name)
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+
+    def build_bundle(self, name, sources, paths):
+        """
+        Write a minified bundle of collected static files to STATIC_ROOT.
+
+        Parameters:
+            name (str): The bundle's name, e.g. 'application/bundle.css'.
+            sources (list): The names of the static files to bundle, in order.
+            paths (dict): The collected files, as passed to post_process().
+        """
+        contents = []
+        for source in sources:
+            if source not in paths:
+                raise ValueError(f"The static bundle '{name}' includes '{source}', which was not collected.")
+            storage, path = paths[source]
+            with storage.open(path) as source_file:
+                contents.append(source_file.read().decode())
+        if self.exists(name):
+            self.delete(name)
+        self._save(name, ContentFile(minify_css('\n'.join(contents)).encode()))
@@ -0,0 +1,58 @@
+"""
+Template cache warm-up.
+
+With the cached template loader each worker parses a template the first time it is used and then reuses the compiled
+template. warm_template_cache() compiles them up front, when the worker boots, instead of during its first requests.
+"""
+import logging
+from pathlib import Path
+
+from django.conf import settings
+from django.template import engines
+from django.template.utils import get_app_template_dirs
+
+logger = logging.getLogger(__name__)
+
+
+def find_templates(engine, prefixes):
+    """
+    Find the templates an engine can load whose names start with one of the prefixes.
+
+    Parameters:
+        engine (Engine): The Django template engine.
+        prefixes (tuple): Template name prefixes, e.g. ('application/',).
+
+    Returns:
+        list: The sorted template names.
+    """
+    names = set()
+    for root in [*engine.dirs, *get_app_template_dirs('templates')]:
+        for path in Path(root).rglob('*'):
+            name = path.relative_to(root).as_posix()
+            if path.is_file() and name.startswith(tuple(prefixes)):
+                names.add(name)
+    return sorted(names)
+
+
+def warm_template_cache(prefixes=None, engine=None):
+    """
+    Compile templates into the cached loader. Templates that fail to compile are logged and skipped, so they only
+    break the pages using them.
+
+    Parameters:
+        prefixes (tuple, optional): Template name prefixes. Defaults to TEMPLATE_WARMUP_PREFIXES.
+        engine (Engine, optional): The template engine. Defaults to the 'django' engine.
+
+    Returns:
+        list: The names of the compiled templates.
+    """
+    engine = engine or engines['django'].engine
+    compiled = []
+    for name in find_templates(engine, prefixes or settings.TEMPLATE_WARMUP_PREFIXES):
+        try:
+            engine.get_template(name)
+        except Exception:
+            logger.exception("Template %s could not be compiled.", name)
+        else:
+            compiled.append(name)
+    return compiled
@@ -0,0 +1,249 @@
+"""
+Test runner that restores a pre-built SQLite template database instead of migrating on every run.
+
+The first run migrates the in-memory test database as usual and saves a copy of it in TEST_SNAPSHOT_DIR. Later runs
+copy that snapshot into the in-memory database with the SQLite backup API. Snapshots are keyed by the installed apps
+and the contents of every migration file, so any schema change builds a new one.
+
+load_fixture_snapshot() does the same for fixture data: the fixtures are deserialized once, dumped as INSERT
+statements and replayed directly on later loads.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+from collections import defaultdict
+from functools import lru_cache
+from pathlib import Path
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.core import serializers
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.migrations.loader import MigrationLoader
+from django.test.runner import DiscoverRunner
+
+
+def get_snapshot_dir():
+    """
+    Get the directory used to store database and fixture snapshots.
+
+    Returns:
+        Path: The snapshot directory (created if missing).
+    """
+    snapshot_dir = Path(getattr(settings, 'TEST_SNAPSHOT_DIR', Path(settings.BASE_DIR) / '.test_snapshots'))
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    return snapshot_dir
+
+
+@lru_cache(maxsize=None)
+def get_schema_key():
+    """
+    Build a key identifying the current database schema.
+
+    Returns:
+        str: A hash of the Django version, installed apps and every migration file on disk.
+    """
+    digest = hashlib.sha256()
+    digest.update(django.get_version().encode())
+    digest.update(json.dumps(list(settings.INSTALLED_APPS)).encode())
+    loader = MigrationLoader(None, ignore_no_migrations=True)
+    for key in sorted(loader.disk_migrations):
+        digest.update(repr(key).encode())
+        module = sys.modules.get(loader.disk_migrations[key].__module__)
+        module_file = getattr(module, '__file__', None)
+        if module_file and os.path.exists(module_file):
+            digest.update(Path(module_file).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def get_schema_snapshot_path():
+    """
+    Get the path of the schema snapshot for the current migrations.
+
+    Returns:
+        Path: The snapshot file path (which may not exist yet).
+    """
+    return get_snapshot_dir() / f'schema-{get_schema_key()}.sqlite3'
+
+
+class SnapshotCreationMixin:
+    """
+    Mixin for a backend's DatabaseCreation class that restores in-memory test databases from a snapshot.
+    """
+
+    def create_test_db(self, verbosity=1, autoclobber=False, serialize=True, keepdb=False):
+        """
+        Create the test database, copying it from the schema snapshot instead of migrating when one exists.
+
+        Returns:
+            str: The name of the test database.
+        """
+        test_database_name = self._get_test_db_name()
+        if keepdb or not self.is_in_memory_db(test_database_name):
+            return super().create_test_db(verbosity, autoclobber, serialize, keepdb)
+
+        snapshot_path = get_schema_snapshot_path()
+        if not snapshot_path.exists():
+            test_database_name = super().create_test_db(verbosity, autoclobber, serialize, keepdb)
+            self.save_snapshot(snapshot_path)
+            return test_database_name
+
+        if verbosity >= 1:
+            self.log('Restoring test database for alias %s from snapshot...' % (
+                self._get_database_display_str(verbosity, test_database_name),
+            ))
+        self.connection.close()
+        settings.DATABASES[self.connection.alias]['NAME'] = test_database_name
+        self.connection.settings_dict['NAME'] = test_database_name
+        self.connection.ensure_connection()
+        source = sqlite3.connect(snapshot_path)
+        try:
+            source.backup(self.connection.connection)
+        finally:
+            source.close()
+        if serialize:
+            self.connection._test_serialized_contents = self.serialize_db_to_string()
+        call_command('createcachetable', database=self.connection.alias)
+        return test_database_name
+
+    def save_snapshot(self, snapshot_path):
+        """
+        Copy the migrated test database to the snapshot file.
+
+        Parameters:
+            snapshot_path (Path): Where to write the snapshot.
+        """
+        temp_path = snapshot_path.with_suffix(f'.{os.getpid()}.tmp')
+        target = sqlite3.connect(temp_path)
+        try:
+            self.connection.connection.backup(target)
+        finally:
+            target.close()
+        os.replace(temp_path, snapshot_path)
+
+
+class SnapshotTestRunner(DiscoverRunner):
+    """
+    Test runner that creates SQLite test databases from a schema snapshot.
+
+    Non-SQLite databases, file-based test databases and --keepdb runs use the default behaviour.
+    Cloning for --parallel is left to Django, so it works with both the fork and spawn start methods.
+    """
+
+    def setup_databases(self, **kwargs):
+        """
+        Create the test databases, restoring SQLite databases from the schema snapshot when possible.
+
+        Returns:
+            list: The old database configuration, used by teardown_databases.
+        """
+        for alias in connections:
+            connection = connections[alias]
+            if connection.vendor == 'sqlite' and not isinstance(connection.creation, SnapshotCreationMixin):
+                creation_class = type(
+                    f'Snapshot{connection.creation_class.__name__}',
+                    (SnapshotCreationMixin, connection.creation_class),
+                    {},
+                )
+                connection.creation = creation_class(connection)
+        return super().setup_databases(**kwargs)
+
+
+def _find_fixture(label):
+    """
+    Find a fixture file by name in FIXTURE_DIRS or any app's 'fixtures' directory.
+    """
+    candidates = [Path(directory) / label for directory in settings.FIXTURE_DIRS]
+    candidates += [Path(app_config.path) / 'fixtures' / label for app_config in apps.get_app_configs()]
+    for candidate in candidates:
+        if candidate.exists():
+            return candidate
+    raise FileNotFoundError(f"Fixture '{label}' not found.")
+
+
+def load_fixture_snapshot(*fixture_labels, using=DEFAULT_DB_ALIAS):
+    """
+    Load JSON fixtures from a cached SQL dump.
+
+    On the first call the fixtures are loaded with loaddata and the rows they created, found by the primary keys in the
+    fixtures (and the many-to-many rows of those objects), are dumped to TEST_SNAPSHOT_DIR as INSERT statements. Rows
+    already in the tables, e.g. created by setUpTestData, are not. Later calls replay the dump without deserializing or
+    saving model instances. Non-SQLite databases, and fixtures with objects without a primary key, always fall back to
+    loaddata.
+
+    Parameters:
+        *fixture_labels: File names of the fixtures to load (e.g. 'ticket_fixture.json').
+        using (str): The database alias to load into. Defaults to 'default'.
+
+    Returns:
+        bool: True if the fixtures were loaded from an existing dump, False otherwise.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        call_command('loaddata', *fixture_labels, verbosity=0, database=using)
+        return False
+
+    paths = [_find_fixture(label) for label in fixture_labels]
+    digest = hashlib.sha256(get_schema_key().encode())
+    for path in paths:
+        digest.update(path.read_bytes())
+    dump_path = get_snapshot_dir() / f'fixtures-{digest.hexdigest()[:16]}.json'
+
+    if dump_path.exists():
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            for statement in json.loads(dump_path.read_text()):
+                cursor.execute(statement)
+        return True
+
+    # The rows the fixtures create: the column identifying them in each table, and its values
+    key_columns = {}
+    keys = defaultdict(set)
+    for path in paths:
+        with open(path) as fixture:
+            for deserialized in serializers.deserialize('json', fixture, using=using):
+                obj = deserialized.object
+                if obj.pk is None:
+                    # Rows without a primary key in the fixture cannot be told apart from others, so nothing is cached
+                    call_command('loaddata', *fixture_labels, verbosity=0, database=using)
+                    return False
+                for model in (type(obj), *obj._meta.get_parent_list()):
+                    key_columns[model._meta.db_table] = model._meta.pk.column
+                    keys[model._meta.db_table].add(obj.pk)
+                for field in obj._meta.local_many_to_many:
+                    through = field.remote_field.through._meta
+                    key_columns[through.db_table] = through.get_field(field.m2m_field_name()).column
+                    keys[through.db_table].add(obj.pk)
+
+    call_command('loaddata', *fixture_labels, verbosity=0, database=using)
+    with connection.cursor() as cursor:
+        statements = [
+            statement for table, column in key_columns.items()
+            for statement in _dump_rows(connection, cursor, table, column, keys[table])
+        ]
+    temp_path = dump_path.with_suffix(f'.{os.getpid()}.tmp')
+    temp_path.write_text(json.dumps(statements))
+    os.replace(temp_path, dump_path)
+    return False
+
+
+def _dump_rows(connection, cursor, table, column, values, batch_size=500):
+    """
+    Get INSERT statements recreating the rows of a table whose column holds one of the given values, with the values
+    quoted by SQLite itself as in iterdump().
+    """
+    quote_name = connection.ops.quote_name
+    columns = [info.name for info in connection.introspection.get_table_description(cursor, table)]
+    literals = " || ',' || ".join(f'quote({quote_name(name)})' for name in columns)
+    insert = f'INSERT INTO {quote_name(table)} ({", ".join(quote_name(name) for name in columns)}) VALUES('
+    values = sorted(values)
+    statements = []
+    for start in range(0, len(values), batch_size):
+        batch = values[start:start + batch_size]
+        condition = f'{quote_name(column)} IN ({", ".join(["%s"] * len(batch))})'
+        cursor.execute(f'SELECT {literals} FROM {quote_name(table)} WHERE {condition}', batch)
+        statements += [f'{insert}{row_literals});' for row_literals, in cursor.fetchall()]
+    return statements
@@ -0,0 +1,532 @@
+import gzip
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+import zlib
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.hashers import get_hashers
+from django.contrib.staticfiles import finders
+from django.core.management import call_command
+from django.db import connection, connections
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.template import Context, Engine, engines
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from application.models import EngineerUser, Ticket
+from webapplicationproject.compression import CompressionMiddleware, negotiate_encoding
+from webapplicationproject.db.backends.sqlite3.base import DatabaseWrapper as PooledSQLiteWrapper
+from webapplicationproject.db.pool import ConnectionPool, PoolTimeout, close_pools, get_pool, get_pool_stats
+from webapplicationproject.routers import ReplicaStickinessMiddleware, read_from_replica
+from webapplicationproject.storage import minify_css
+from webapplicationproject.template_warmup import warm_template_cache
+from webapplicationproject.test_runner import get_schema_snapshot_path, load_fixture_snapshot
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class SnapshotTestRunnerTestCase(TestCase):
+    def test_fast_password_hasher(self):
+        self.assertEqual(get_hashers()[0].algorithm, "md5")
+
+    def test_schema_snapshot_exists(self):
+        self.assertTrue(get_schema_snapshot_path().exists())
+
+    def test_load_fixture_snapshot(self):
+        load_fixture_snapshot("engineeruser_fixture.json", "ticket_fixture.json")
+
+        self.assertEqual(EngineerUser.objects.count(), 2)
+        self.assertEqual(Ticket.objects.count(), 2)
+        self.assertEqual(Ticket.objects.get(pk=2).reporter.username, "janesmith")
+
+        # A second load replays the cached dump instead of deserializing the fixtures
+        Ticket.objects.all().delete()
+        EngineerUser.objects.all().delete()
+        self.assertTrue(load_fixture_snapshot("engineeruser_fixture.json", "ticket_fixture.json"))
+        self.assertEqual(EngineerUser.objects.count(), 2)
+        self.assertEqual(Ticket.objects.get(pk=1).title, "Fix Bug")
+
+
+    def test_fixture_snapshot_only_dumps_fixture_rows(self):
+        EngineerUser.objects.create(pk=10, username="existing", email="existing@qa.com")
+
+        with tempfile.TemporaryDirectory() as snapshot_dir, override_settings(TEST_SNAPSHOT_DIR=snapshot_dir):
+            self.assertFalse(load_fixture_snapshot("engineeruser_fixture.json", "ticket_fixture.json"))
+            (dump_path,) = Path(snapshot_dir).glob("fixtures-*.json")
+            statements = json.loads(dump_path.read_text())
+
+        self.assertEqual(len(statements), 4)
+        self.assertFalse(any("existing" in statement for statement in statements))
+        self.assertEqual(EngineerUser.objects.count(), 3)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.usable = True
+
+    def rollback(self):
+        if not self.usable:
+            raise RuntimeError("connection lost")
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTestCase(SimpleTestCase):
+    def create_pool(self, **kwargs):
+        self.opened = []
+
+        def connect():
+            conn = FakeConnection()
+            self.opened.append(conn)
+            return conn
+
+        return ConnectionPool(connect=connect, check=lambda conn: conn.usable, reset=lambda conn: conn.rollback(),
+                              **kwargs)
+
+    def test_connections_reused(self):
+        pool = self.create_pool(max_size=2)
+
+        conn = pool.getconn()
+        pool.putconn(conn)
+        self.assertIs(pool.getconn(), conn)
+
+        stats = pool.stats()
+        self.assertEqual(stats["connections_opened"], 1)
+        self.assertEqual(stats["checkouts"], 2)
+        self.assertEqual(stats["in_use"], 1)
+
+    def test_timeout_when_pool_exhausted(self):
+        pool = self.create_pool(max_size=1, timeout=0.05)
+        pool.getconn()
+
+        with self.assertRaises(PoolTimeout):
+            pool.getconn()
+        self.assertEqual(pool.stats()["timeouts"], 1)
+
+    def test_wait_for_returned_connection(self):
+        pool = self.create_pool(max_size=1, timeout=5)
+        conn = pool.getconn()
+        timer = threading.Timer(0.05, pool.putconn, args=(conn,))
+        timer.start()
+
+        self.assertIs(pool.getconn(), conn)
+        timer.join()
+
+        stats = pool.stats()
+        self.assertEqual(stats["waits"], 1)
+        self.assertGreater(stats["wait_time_max"], 0)
+
+    def test_unhealthy_connection_replaced(self):
+        pool = self.create_pool(health_check_interval=0)
+        conn = pool.getconn()
+        pool.putconn(conn)
+        conn.usable = False
+
+        new_conn = pool.getconn()
+
+        self.assertIsNot(new_conn, conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.stats()["health_check_failures"], 1)
+        self.assertEqual(pool.stats()["size"], 1)
+
+    def test_connection_discarded_when_reset_fails(self):
+        pool = self.create_pool()
+        conn = pool.getconn()
+        conn.usable = False
+
+        pool.putconn(conn)
+
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.stats()["size"], 0)
+
+    def test_idle_connections_above_min_size_closed(self):
+        pool = self.create_pool(min_size=1, max_size=3, max_idle=0)
+        first, second = pool.getconn(), pool.getconn()
+
+        pool.putconn(first)
+        pool.putconn(second)
+
+        self.assertEqual(pool.stats()["idle"], 1)
+        self.assertTrue(first.closed)
+
+    def test_fill_opens_min_size(self):
+        pool = self.create_pool(min_size=2, max_size=3)
+
+        pool.fill()
+
+        self.assertEqual(pool.stats()["idle"], 2)
+
+
+class PooledBackendTestCase(SimpleTestCase):
+    def setUp(self):
+        handle, self.database_name = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        self.settings_dict = {
+            **connection.settings_dict,
+            "ENGINE": "webapplicationproject.db.backends.sqlite3",
+            "NAME": self.database_name,
+            "CONN_MAX_AGE": 0,
+            "POOL": {"MIN_SIZE": 1, "MAX_SIZE": 1, "TIMEOUT": 0.05},
+        }
+
+    def tearDown(self):
+        close_pools()
+        os.remove(self.database_name)
+
+    def test_close_returns_connection_to_pool(self):
+        wrapper = PooledSQLiteWrapper(self.settings_dict, alias="pooled_reuse")
+        with wrapper.cursor() as cursor:
+            cursor.execute("CREATE TABLE pooled (id INTEGER)")
+        raw_connection = wrapper.connection
+        wrapper.close()
+
+        other_wrapper = PooledSQLiteWrapper(self.settings_dict, alias="pooled_reuse")
+        with other_wrapper.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM pooled")
+            self.assertEqual(cursor.fetchone(), (0,))
+        self.assertIs(other_wrapper.connection, raw_connection)
+        other_wrapper.close()
+
+        stats = get_pool_stats()["pooled_reuse"]
+        self.assertEqual(stats["connections_opened"], 1)
+        self.assertEqual(stats["checkouts"], 2)
+        self.assertEqual(stats["idle"], 1)
+
+    def test_open_transaction_rolled_back_on_return(self):
+        wrapper = PooledSQLiteWrapper(self.settings_dict, alias="pooled_rollback")
+        with wrapper.cursor() as cursor:
+            cursor.execute("CREATE TABLE pooled (id INTEGER)")
+        wrapper.set_autocommit(False)
+        with wrapper.cursor() as cursor:
+            cursor.execute("INSERT INTO pooled VALUES (1)")
+        wrapper.close()
+
+        other_wrapper = PooledSQLiteWrapper(self.settings_dict, alias="pooled_rollback")
+        with other_wrapper.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM pooled")
+            self.assertEqual(cursor.fetchone(), (0,))
+        other_wrapper.close()
+
+    def test_pool_exhausted(self):
+        wrapper = PooledSQLiteWrapper(self.settings_dict, alias="pooled_exhausted")
+        wrapper.ensure_connection()
+
+        start = time.monotonic()
+        with self.assertRaises(PoolTimeout):
+            PooledSQLiteWrapper(self.settings_dict, alias="pooled_exhausted").ensure_connection()
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(get_pool(wrapper).stats()["timeouts"], 1)
+        wrapper.close()
+
+
+@override_settings(DATABASE_REPLICAS=["replica"], REPLICA_STICKY_SECONDS=5)
+class ReplicaRoutingTestCase(TestCase):
+    """
+    Primary and replica harness: the test database is the primary and a second SQLite file, copied from it before any
+    test data is written, is the replica. Writes made by the tests only reach the primary, like replication lag.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        handle, cls.replica_name = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        connection.ensure_connection()
+        replica = sqlite3.connect(cls.replica_name)
+        try:
+            connection.connection.backup(replica)
+        finally:
+            replica.close()
+        # Registered here rather than in 'databases' as the test runner only sets up databases from settings
+        connections.settings["replica"] = {**connection.settings_dict, "NAME": cls.replica_name}
+        cls.databases = {"default", "replica"}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections["replica"].close()
+        del connections["replica"]
+        del connections.settings["replica"]
+        os.remove(cls.replica_name)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = EngineerUser.objects.create_superuser(username="admin", email="admin@qa.com", password="password")
+        Ticket.objects.create(title="Primary Only", created=timezone.now(), priority="H",
+                              description="Not replicated yet", status="TD", reporter=cls.user)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_reads_use_replica_and_writes_use_primary(self):
+        self.assertEqual(Ticket.objects.db, "default")
+        with read_from_replica():
+            self.assertEqual(Ticket.objects.db, "replica")
+            self.assertFalse(Ticket.objects.exists())
+
+            ticket = Ticket.objects.create(title="New", created=timezone.now(), priority="L", description="New",
+                                           status="TD", reporter=self.user)
+            self.assertEqual(ticket._state.db, "default")
+            # Reads after a write in the same block see it
+            self.assertEqual(Ticket.objects.db, "default")
+            self.assertEqual(Ticket.objects.count(), 2)
+
+    def test_ticket_list_reads_from_replica(self):
+        with CaptureQueriesContext(connections["replica"]) as replica_queries:
+            response = self.client.get("/tickets/")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, "Primary Only")
+        self.assertTrue(replica_queries.captured_queries)
+        self.assertNotIn(ReplicaStickinessMiddleware.cookie_name, response.cookies)
+
+    def test_reads_pinned_to_primary_after_write(self):
+        response = self.client.post("/ticket_form/", data={
+            "title": "Created", "priority": "M", "description": "Created", "status": "TD",
+        })
+        self.assertEqual(response.status_code, 302)
+        pin = response.cookies[ReplicaStickinessMiddleware.cookie_name]
+        self.assertEqual(pin["max-age"], 5)
+
+        response = self.client.get("/tickets/")
+        self.assertContains(response, "Primary Only")
+        self.assertContains(response, "Created")
+
+        # Once the window has passed, reads go back to the replica
+        self.client.cookies[ReplicaStickinessMiddleware.cookie_name] = str(int(time.time()) - 1)
+        response = self.client.get("/tickets/")
+        self.assertNotContains(response, "Created")
+
+    def test_log_admin_reads_from_replica(self):
+        for url in ("/admin/logger/customstatuslog/", "/admin/logger/customlogentry/"):
+            with CaptureQueriesContext(connections["replica"]) as replica_queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(replica_queries.captured_queries)
+
+
+class TemplateWarmupTestCase(SimpleTestCase):
+    def new_engine(self, dirs):
+        return Engine(dirs=dirs, loaders=[("django.template.loaders.cached.Loader",
+                                           ["django.template.loaders.filesystem.Loader"])])
+
+    def test_production_loaders_are_cached(self):
+        loaders = engines["django"].engine.loaders
+        self.assertEqual(loaders[0][0], "django.template.loaders.cached.Loader")
+
+    def test_warm_template_cache(self):
+        with tempfile.TemporaryDirectory() as template_dir:
+            os.makedirs(os.path.join(template_dir, "application"))
+            for name, source in (("base.html", "{% block content %}{% endblock %}"),
+                                 ("page.html", "{% extends 'application/base.html' %}"),
+                                 ("broken.html", "{% if %}")):
+                with open(os.path.join(template_dir, "application", name), "w") as template_file:
+                    template_file.write(source)
+            engine = self.new_engine([template_dir])
+
+            with self.assertLogs("webapplicationproject.template_warmup", "ERROR"):
+                compiled = warm_template_cache(prefixes=("application/",), engine=engine)
+            self.assertEqual(compiled, ["application/base.html", "application/page.html"])
+
+            # Compiled templates are served from memory, even once the files are gone
+            os.remove(os.path.join(template_dir, "application", "page.html"))
+            self.assertEqual(engine.get_template("application/page.html").render(Context()), "")
+
+    def test_benchmark_templates(self):
+        out = StringIO()
+        call_command("benchmark_templates", "--iterations", "1", stdout=out)
+
+        self.assertIn("application/layout.html", out.getvalue())
+        self.assertIn("Warm renders are", out.getvalue())
+
+
+class StaticBundleTestCase(SimpleTestCase):
+    def setUp(self):
+        self.static_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.static_root.cleanup)
+        settings_override = override_settings(
+            STATIC_ROOT=self.static_root.name,
+            STATICFILES_STORAGE="webapplicationproject.storage.BundledStaticFilesStorage",
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def collectstatic(self):
+        call_command("collectstatic", interactive=False, verbosity=0, ignore_patterns=["admin"])
+        with open(os.path.join(self.static_root.name, "staticfiles.json")) as manifest:
+            return json.load(manifest)["paths"]
+
+    def test_minify_css(self):
+        css = """/* Comment with a 'quote' */
+            .a, .b > .c {
+                color : red;
+                font-family: 'Segoe UI',  sans-serif;
+            }
+            .d::after { content: "a ,  b"; }
+        """
+        self.assertEqual(minify_css(css),
+                         """.a,.b>.c{color :red;font-family:'Segoe UI',sans-serif}.d::after{content:"a ,  b"}""")
+
+    def test_collectstatic_builds_hashed_bundle(self):
+        paths = self.collectstatic()
+
+        hashed_name = paths["application/bundle.css"]
+        self.assertRegex(hashed_name, r"^application/bundle\.[0-9a-f]{12}\.css$")
+        with open(finders.find("application/site.css")) as source, \
+                open(os.path.join(self.static_root.name, hashed_name)) as bundle:
+            self.assertEqual(bundle.read(), minify_css(source.read()))
+        self.assertTrue(os.path.exists(os.path.join(self.static_root.name, hashed_name + ".gz")))
+        if brotli:
+            self.assertTrue(os.path.exists(os.path.join(self.static_root.name, hashed_name + ".br")))
+
+    @override_settings(STATIC_BUNDLES={"application/bundle.css": ["application/missing.css"]})
+    def test_missing_bundle_source(self):
+        with self.assertRaisesMessage(ValueError, "includes 'application/missing.css'"):
+            self.collectstatic()
+
+    def test_hashed_bundle_is_immutable(self):
+        paths = self.collectstatic()
+        whitenoise = WhiteNoiseMiddleware(get_response=lambda request: None)
+
+        response = whitenoise(RequestFactory().get("/static/" + paths["application/bundle.css"],
+                                                   HTTP_ACCEPT_ENCODING="gzip"))
+        self.assertEqual(response["Cache-Control"], "max-age=315360000, public, immutable")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        response = whitenoise(RequestFactory().get("/static/application/bundle.css"))
+        self.assertNotIn("immutable", response["Cache-Control"])
+
+    @unittest.skipUnless(brotli, "Brotli is not installed")
+    def test_brotli_preferred(self):
+        paths = self.collectstatic()
+        whitenoise = WhiteNoiseMiddleware(get_response=lambda request: None)
+
+        response = whitenoise(RequestFactory().get("/static/" + paths["application/bundle.css"],
+                                                   HTTP_ACCEPT_ENCODING="gzip, br"))
+        self.assertEqual(response["Content-Encoding"], "br")
+
+    def test_build_static(self):
+        out = StringIO()
+        call_command("build_static", "--ignore", "admin", stdout=out)
+
+        self.assertIn("application/bundle.css: 1 source file(s)", out.getvalue())
+        self.assertIn("public, immutable", out.getvalue())
+        self.assertRegex(out.getvalue(), r"application/tickets\.html +1 +1")
+
+
+class CompressionMiddlewareTestCase(SimpleTestCase):
+    body = "<tr><td>Ticket</td></tr>" * 100
+
+    def get(self, response, accept_encoding="gzip, br"):
+        middleware = CompressionMiddleware(lambda request: response)
+        return middleware(RequestFactory().get("/tickets/", HTTP_ACCEPT_ENCODING=accept_encoding))
+
+    def test_negotiate_encoding(self):
+        encodings = ["br", "zstd", "gzip"]
+        self.assertEqual(negotiate_encoding("gzip, deflate, br", encodings), "br")
+        self.assertEqual(negotiate_encoding("br;q=0.5, gzip", encodings), "gzip")
+        self.assertEqual(negotiate_encoding("zstd, gzip;q=0.9", encodings), "zstd")
+        self.assertEqual(negotiate_encoding("*", encodings), "br")
+        self.assertEqual(negotiate_encoding("br;q=0, *;q=0.1", encodings), "zstd")
+        self.assertIsNone(negotiate_encoding("identity", encodings))
+        self.assertIsNone(negotiate_encoding("", encodings))
+
+    def test_gzip_response(self):
+        response = self.get(HttpResponse(self.body), accept_encoding="gzip")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(int(response["Content-Length"]), len(response.content))
+        self.assertEqual(gzip.decompress(response.content).decode(), self.body)
+
+    @unittest.skipUnless(brotli, "Brotli is not installed")
+    def test_brotli_response(self):
+        response = self.get(HttpResponse(self.body))
+
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(response.content).decode(), self.body)
+
+    def test_streaming_response(self):
+        rows = [f"<tr><td>{i}</td></tr>".encode() for i in range(100)]
+        response = self.get(StreamingHttpResponse(iter(rows)), accept_encoding="gzip")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertFalse(response.has_header("Content-Length"))
+        chunks = list(response.streaming_content)
+        # Each row is flushed as it is compressed
+        self.assertEqual(len(chunks), len(rows) + 1)
+        self.assertEqual(gzip.decompress(b"".join(chunks)), b"".join(rows))
+
+    @override_settings(COMPRESSION={"CONTENT_TYPES": {"text/csv": {"gzip": 1}}})
+    def test_level_per_content_type(self):
+        with mock.patch("webapplicationproject.compression.zlib.compressobj",
+                        wraps=zlib.compressobj) as compressobj:
+            response = self.get(HttpResponse(self.body, content_type="text/csv"), accept_encoding="gzip")
+        compressobj.assert_called_once_with(1, zlib.DEFLATED, -zlib.MAX_WBITS)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+
+        # Content types without levels are not compressed
+        response = self.get(HttpResponse(self.body), accept_encoding="gzip")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_skipped_responses(self):
+        self.assertFalse(self.get(HttpResponse("<p>Small</p>")).has_header("Content-Encoding"))
+        self.assertFalse(self.get(HttpResponse(self.body), accept_encoding="identity").has_header("Content-Encoding"))
+        self.assertFalse(self.get(HttpResponse(self.body, content_type="image/png")).has_header("Content-Encoding"))
+
+        response = HttpResponse(self.body)
+        response["Content-Encoding"] = "gzip"
+        self.assertIs(self.get(response), response)
+        self.assertEqual(response.content, self.body.encode())
+
+        with tempfile.TemporaryFile() as static_file:
+            static_file.write(self.body.encode())
+            static_file.seek(0)
+            response = FileResponse(static_file, content_type="text/html")
+            self.assertFalse(self.get(response).has_header("Content-Encoding"))
+
+    def test_length_randomised(self):
+        randbelow_path = "webapplicationproject.compression.secrets.randbelow"
+        lengths = {"gzip": set(), "br": set()}
+        for padding in (0, 1, 42, 99):
+            for encoding, decompress in (("gzip", gzip.decompress), ("br", brotli and brotli.decompress)):
+                if decompress is None:
+                    continue
+                with mock.patch(randbelow_path, return_value=padding) as randbelow:
+                    response = self.get(HttpResponse(self.body), accept_encoding=encoding)
+                randbelow.assert_called_once_with(100)
+                self.assertEqual(decompress(response.content).decode(), self.body)
+                lengths[encoding].add(len(response.content))
+
+                rows = [f"<tr><td>{i}</td></tr>".encode() for i in range(10)]
+                with mock.patch(randbelow_path, return_value=padding):
+                    response = self.get(StreamingHttpResponse(iter(rows)), accept_encoding=encoding)
+                self.assertEqual(decompress(b"".join(response.streaming_content)), b"".join(rows))
+        self.assertEqual(len(lengths["gzip"]), 4)
+        if brotli:
+            self.assertEqual(len(lengths["br"]), 4)
+
+    @override_settings(COMPRESSION={"MAX_RANDOM_BYTES": 0})
+    def test_length_randomisation_disabled(self):
+        response = self.get(HttpResponse(self.body), accept_encoding="gzip")
+        # No file name flag in the gzip header
+        self.assertEqual(response.content[3], 0)
+        self.assertEqual(gzip.decompress(response.content).decode(), self.body)
+
+    def test_etag_is_weakened(self):
+        response = HttpResponse(self.body)
+        response["ETag"] = '"abc"'
+
+        self.assertEqual(self.get(response, accept_encoding="gzip")["ETag"], 'W/"abc"')
@@ -1,8 +1,13 @@
 """webapplicationproject URL Configuration"""
-from django.contrib import admin
+from django.conf import settings
 from django.urls import include, path
 
 urlpatterns = [
     path("", include("application.urls")),
-    path('admin/', admin.site.urls)
 ]
+
+# Workers started with WORKER_PROFILE=api do not load the admin site
+if settings.ADMIN_ENABLED:
+    from django.contrib import admin
+
+    urlpatterns.append(path('admin/', admin.site.urls))
@@ -3,6 +3,8 @@ WSGI config for webapplicationproject project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
 
+Each worker compiles the app's templates when it imports this module (see TEMPLATE_WARMUP), before it serves requests.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/wsgi/
 """
@@ -13,3 +15,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'webapplicationproject.settings')
 
 application = get_wsgi_application()
+
+from django.conf import settings  # noqa: E402
+from webapplicationproject.template_warmup import warm_template_cache  # noqa: E402
+
+if settings.TEMPLATE_WARMUP:
+    warm_template_cache()